@@ -0,0 +1,34 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+# Benchmarks of the routers on the Luxembourg dump, one module for each
+# module of pynavigo. They check their results too and exit with the
+# status 1 if a result is wrong:
+# python -m benchmarks.engine
+
+import os
+import pickle
+
+DUMP = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir,
+    "pynavigo",
+    "var",
+    "luxembourg-little.osm.dump",
+)
+
+
+def load_graph(path=DUMP):
+    """
+    Load the serialized graph (simpleGraph.Graph) of the benchmarks.
+    """
+    with open(path, "rb") as dump_graph:
+        # dumps written by Python 2 contain byte strings
+        return pickle.load(dump_graph, encoding="latin1")
@@ -0,0 +1,101 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+from pynavigo.alternatives import AlternativesEngine
+from pynavigo.engine import DijkstraEngine
+
+from . import load_graph
+
+NB_QUERIES = 100
+
+
+def main():
+    """
+    Alternatives on the Luxembourg dump, their number, stretch and
+    overlap, and their cost relative to one shortest path query
+    (bidirectional DijkstraEngine.route).
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = DijkstraEngine(compact_graph)
+    alternatives_engine = AlternativesEngine(compact_graph)
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(NB_QUERIES)]
+    start = time.time()
+    expected = [engine.route(s, t) for s, t in queries]
+    reference = time.time() - start
+    start = time.time()
+    results = []
+    nb_settled = 0
+    for s, t in queries:
+        results.append(alternatives_engine.alternatives(s, t))
+        nb_settled += alternatives_engine.nb_settled
+    elapsed = time.time() - start
+    print(
+        "Shortest path: %.2f ms/query, alternatives: %.2f ms/query (%.1fx), "
+        "%.0f nodes settled"
+        % (
+            1000 * reference / NB_QUERIES,
+            1000 * elapsed / NB_QUERIES,
+            elapsed / reference,
+            nb_settled / NB_QUERIES,
+        )
+    )
+
+    nb_errors = 0
+    counts = [0] * 4
+    stretches, overlaps = [], []
+    for (path, cost), routes in zip(expected, results):
+        counts[len(routes)] += 1
+        if not path:
+            continue
+        if abs(routes[0][1] - cost) > 1e-6:
+            nb_errors += 1
+        for i, (alternative, alternative_cost) in enumerate(routes):
+            if abs(compact_graph.len_way(alternative) - alternative_cost) > 1e-6:
+                nb_errors += 1
+            if alternative[0] != path[0] or alternative[-1] != path[-1]:
+                nb_errors += 1
+            if i:
+                stretches.append(alternative_cost / cost)
+                shared = set(zip(path, path[1:])) & set(
+                    zip(alternative, alternative[1:])
+                )
+                overlaps.append(
+                    sum(compact_graph.len_way(edge) for edge in shared)
+                    / alternative_cost
+                )
+    print(
+        "Queries with 0, 1, 2 and 3 routes: %s" % ", ".join(map(str, counts)),
+    )
+    if stretches:
+        print(
+            "Alternatives: mean stretch %.3f (max %.3f), mean overlap %.2f "
+            "(max %.2f)"
+            % (
+                sum(stretches) / len(stretches),
+                max(stretches),
+                sum(overlaps) / len(overlaps),
+                max(overlaps),
+            )
+        )
+    print("%d error(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
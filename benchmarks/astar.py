@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import time
+import random
+
+from pynavigo.astar import AStar
+
+from . import load_graph
+
+
+def main():
+    """
+    Compares A* with Dijkstra on the Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    random.seed(42)
+    nodes = list(graph.graph_structure.keys())
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(200)]
+
+    for metric in ("distance", "time"):
+        astar = AStar(compact_graph, metric)
+        reference = AStar(compact_graph, metric)
+        reference.scale = 0  # Dijkstra
+        settled = [0, 0]
+        elapsed = [0.0, 0.0]
+        for source, target in queries:
+            for position, router in enumerate((reference, astar)):
+                start = time.time()
+                path, cost = router.route(source, target)
+                elapsed[position] += time.time() - start
+                settled[position] += router.nb_settled
+                if position == 0:
+                    expected = cost
+            if abs(expected - cost) > 1e-9 * max(1, expected):
+                print("Different costs:", source, target, expected, cost)
+        print(
+            "%-8s Dijkstra: %.2f ms/query, %d settled - A*: %.2f ms/query, %d settled"
+            % (
+                metric,
+                1000 * elapsed[0] / len(queries),
+                settled[0] / len(queries),
+                1000 * elapsed[1] / len(queries),
+                settled[1] / len(queries),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
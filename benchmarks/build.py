@@ -0,0 +1,51 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+
+import numpy
+
+from pynavigo import build
+from pynavigo.build import node_arrays, stage
+
+from . import load_graph
+
+
+def main():
+    """
+    Time of the computation of the segments with 1, 2 and 4 processes on
+    copies of the Luxembourg dump.
+
+    python -m benchmarks.build [number of copies]
+    """
+    graph = load_graph()
+    nb_copies = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    node_ids, latitudes, longitudes = node_arrays(graph.graph_info)
+    # each copy of the network gets new OSM ids (offset)
+    offset = int(node_ids[-1]) + 1
+    node_ids = numpy.concatenate(
+        [node_ids + copy * offset for copy in range(nb_copies)]
+    )
+    latitudes = numpy.tile(latitudes, nb_copies)
+    longitudes = numpy.tile(longitudes, nb_copies)
+    ways_refs = [
+        numpy.asarray(way.refs, dtype=numpy.int64) + copy * offset
+        for copy in range(nb_copies)
+        for way in graph.ways
+    ]
+    print(("%d nodes, %d ways" % (len(node_ids), len(ways_refs))))
+    for jobs in (1, 2, 4):
+        with stage("Segments (%d jobs)" % jobs):
+            result = build.segments(node_ids, latitudes, longitudes, ways_refs, jobs)
+    print(("%d segments" % len(result[0])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import os
+import time
+import random
+import tempfile
+
+from pynavigo import engine
+from pynavigo.ch import ContractionHierarchy
+
+from . import load_graph
+
+
+def main():
+    """
+    Builds the hierarchy of the Luxembourg dump and compares the queries
+    with Dijkstra.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+
+    start = time.time()
+    hierarchy = ContractionHierarchy.build(compact_graph)
+    print(
+        "Contraction of %d nodes: %.2f seconds, %d edges (initial graph: %d)"
+        % (
+            compact_graph.nb_nodes(),
+            time.time() - start,
+            len(hierarchy.up[1]) + len(hierarchy.down[1]),
+            compact_graph.nb_edges(),
+        )
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "luxembourg-little.osm.ch")
+        hierarchy.save(path)
+        hierarchy = ContractionHierarchy.load(path)
+
+    dijkstra_engine = engine.DijkstraEngine(compact_graph)
+    random.seed(42)
+    nodes = list(graph.graph_structure.keys())
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(200)]
+    elapsed = [0.0, 0.0]
+    settled = 0
+    for source, target in queries:
+        start = time.time()
+        expected_path, expected = dijkstra_engine.query(source, target).get(target)
+        elapsed[0] += time.time() - start
+        start = time.time()
+        path, cost = hierarchy.route(source, target)
+        elapsed[1] += time.time() - start
+        settled += hierarchy.nb_settled
+        if abs(expected - cost) > 1e-6 or (
+            path and abs(compact_graph.len_way(path) - cost) > 1e-6
+        ):
+            print("Different costs:", source, target, expected, cost)
+    print(
+        "Dijkstra: %.2f ms/query - CH: %.2f ms/query, %d settled"
+        % (
+            1000 * elapsed[0] / len(queries),
+            1000 * elapsed[1] / len(queries),
+            settled / len(queries),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
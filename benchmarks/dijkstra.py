@@ -0,0 +1,44 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import random
+
+from pynavigo.dijkstra import Dijkstra, BidirectionalDijkstra
+
+from . import load_graph
+
+
+def main():
+    """
+    Checks that the bidirectional search returns the same costs as
+    Dijkstra on the Luxembourg dump.
+    """
+    graph = load_graph()
+    nodes = list(graph.graph_structure.keys())
+    random.seed(42)
+    nb_errors = 0
+    for _ in range(500):
+        start, end = random.choice(nodes), random.choice(nodes)
+        shortest_path, distance = Dijkstra(graph.graph_structure, start, end).get(end)
+        if distance == float("inf"):
+            # only reachable through the reverse direction of one way streets
+            shortest_path, distance = [], 0
+        bidirectional = BidirectionalDijkstra(
+            graph.graph_structure, graph.reverse_structure, start
+        )
+        path, cost = bidirectional.get(end)
+        if abs(distance - cost) > 1e-6 or bool(shortest_path) != bool(path):
+            nb_errors += 1
+            print("Different costs:", start, end, distance, cost)
+    print(nb_errors, "error(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+from pynavigo import dijkstra
+from pynavigo.engine import DijkstraEngine
+
+from . import load_graph
+
+NB_QUERIES = 200
+
+
+def main():
+    """
+    Benchmark against dijkstra.Dijkstra on the bundled Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = DijkstraEngine(compact_graph)
+    print(compact_graph)
+
+    random.seed(42)
+    nodes = list(graph.graph_structure.keys())
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(NB_QUERIES)]
+
+    def bench(name, function):
+        start = time.time()
+        for source, target in queries:
+            function(source, target)
+        elapsed = time.time() - start
+        print(
+            "%-40s %8.2f ms/query" % (name, 1000 * elapsed / len(queries)),
+        )
+        return elapsed
+
+    reference = bench(
+        "Dijkstra (priorityDictionary, full)",
+        lambda s, t: dijkstra.Dijkstra(graph.graph_structure, s).get(t),
+    )
+    bench(
+        "Dijkstra (priorityDictionary, end)",
+        lambda s, t: dijkstra.Dijkstra(graph.graph_structure, s, t).get(t),
+    )
+    full = bench("DijkstraEngine (heapq, full)", lambda s, t: engine.query(s).get(t))
+    early = bench(
+        "DijkstraEngine (heapq, early exit)", lambda s, t: engine.query(s, t).get(t)
+    )
+    print("Speedup (full search): %.1fx" % (reference / full))
+    print("Speedup (early termination): %.1fx" % (reference / early))
+
+    for source, target in queries:
+        _, expected = dijkstra.Dijkstra(graph.graph_structure, source).get(target)
+        _, cost = engine.query(source, target).get(target)
+        if expected != float("inf") and abs(expected - cost) > 1e-6:
+            print("Different costs:", source, target, expected, cost)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+import numpy
+
+from pynavigo.engine import DijkstraEngine
+from pynavigo.isochrone import IsochroneEngine
+
+from . import load_graph
+
+
+def main():
+    """
+    Isochrones of growing budgets on the Luxembourg dump compared with a
+    full search, and service areas of several depots.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = IsochroneEngine(compact_graph)
+    dijkstra_engine = DijkstraEngine(compact_graph)
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    sources = random.sample(nodes, 20)
+    start = time.time()
+    full = [dijkstra_engine.query(source, metric="time").tree() for source in sources]
+    reference = (time.time() - start) / len(sources)
+    print("Full search: %.2f ms" % (1000 * reference))
+
+    nb_errors = 0
+    for minutes in (1, 2, 5):
+        start = time.time()
+        isochrones = [engine.isochrone(source, minutes / 60.0) for source in sources]
+        elapsed = (time.time() - start) / len(sources)
+        start = time.time()
+        polygons = [isochrone.polygon() for isochrone in isochrones]
+        hull_time = (time.time() - start) / len(sources)
+        print(
+            "%d minute(s): %5.1f nodes, search %.2f ms (%.1fx faster), "
+            "polygon %.2f ms (%.1f points)"
+            % (
+                minutes,
+                numpy.mean([len(isochrone) for isochrone in isochrones]),
+                1000 * elapsed,
+                reference / elapsed,
+                1000 * hull_time,
+                numpy.mean([len(polygon) for polygon in polygons]),
+            )
+        )
+        for tree, isochrone in zip(full, isochrones):
+            # the same nodes as a filter of the full search
+            expected = sorted(
+                compact_graph.osm_ids[i]
+                for i in range(compact_graph.nb_nodes())
+                if tree.dist[i] <= minutes / 60.0
+            )
+            if expected != sorted(isochrone.osm_ids.tolist()):
+                nb_errors += 1
+
+    depots = sources[:5]
+    start = time.time()
+    areas = engine.service_areas(depots, 5 / 60.0)
+    print(
+        "Service areas of %d depots: %d nodes (%s) in %.2f ms"
+        % (
+            len(depots),
+            len(areas),
+            ", ".join(str(len(areas.area(i))) for i in range(len(depots))),
+            1000 * (time.time() - start),
+        )
+    )
+    # each node is served by the closest depot
+    for osm_id, cost, origin in zip(areas.osm_ids, areas.costs, areas.origins):
+        i = compact_graph.index[osm_id]
+        if abs(min(full[j].dist[i] for j in range(len(depots))) - cost) > 1e-9:
+            nb_errors += 1
+        if abs(full[origin].dist[i] - cost) > 1e-9:
+            nb_errors += 1
+    print("%d error(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
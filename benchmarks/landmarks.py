@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import time
+import random
+
+from pynavigo.astar import AStar
+from pynavigo.landmarks import ALT, Landmarks
+
+from . import load_graph
+
+
+def main():
+    """
+    Preprocessing time and query speedups on the Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    random.seed(42)
+    nodes = list(graph.graph_structure.keys())
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(200)]
+
+    dijkstra = AStar(compact_graph)
+    dijkstra.scale = 0
+    routers = [("Dijkstra", dijkstra), ("A*", AStar(compact_graph))]
+    for nb_landmarks in (4, 8, 16):
+        start = time.time()
+        landmarks = Landmarks.compute(compact_graph, nb_landmarks)
+        print(
+            "Preprocessing of %d landmarks: %.2f seconds"
+            % (nb_landmarks, time.time() - start)
+        )
+        routers.append(
+            ("ALT (%d landmarks)" % nb_landmarks, ALT(compact_graph, landmarks))
+        )
+
+    reference = None
+    for name, router in routers:
+        settled, start = 0, time.time()
+        for source, target in queries:
+            path, cost = router.route(source, target)
+            settled += router.nb_settled
+        elapsed = time.time() - start
+        if reference is None:
+            reference = elapsed
+        print(
+            "%-20s %.2f ms/query, %5d settled, speedup %.1fx"
+            % (
+                name,
+                1000 * elapsed / len(queries),
+                settled / len(queries),
+                reference / elapsed,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
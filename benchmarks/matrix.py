@@ -0,0 +1,85 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+import numpy
+
+from pynavigo import matrix
+from pynavigo.engine import INFINITY, DijkstraEngine
+
+from . import load_graph
+
+
+def main():
+    """
+    Matrix of random nodes of the Luxembourg dump compared with the
+    previous over-graph loop, then time of a bigger matrix with 1, 2, 4
+    and 8 processes.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    matrix_engine = matrix.MatrixEngine(compact_graph)
+    random.seed(42)
+    nodes = random.sample(list(compact_graph.osm_ids), 100)
+
+    start = time.time()
+    engine = DijkstraEngine(compact_graph)
+    expected = {}
+    for node in nodes:
+        result = engine.query(node, nodes)
+        for node1 in nodes:
+            path, distance = result.get(node1)
+            if path != []:
+                expected[node, node1] = (distance, graph.average_speed(path))
+    reference = time.time() - start
+
+    start = time.time()
+    distance_matrix = matrix_engine.compute(nodes)
+    elapsed = time.time() - start
+    print(
+        "%dx%d matrix: %.2f seconds (query + paths: %.2f seconds)"
+        % (len(nodes), len(nodes), elapsed, reference)
+    )
+    nb_errors = 0
+    for i, node in enumerate(nodes):
+        for j, node1 in enumerate(nodes):
+            distance, speed = expected.get((node, node1), (INFINITY, None))
+            if distance != distance_matrix.distances[i, j] and (
+                abs(distance - distance_matrix.distances[i, j]) > 1e-6
+            ):
+                nb_errors += 1
+            average = distance_matrix.average_speed(i, j)
+            if speed is not None and abs(speed - average) > 1e-6:
+                nb_errors += 1
+    print("%d different distance(s) or speed(s)" % nb_errors)
+
+    nodes = random.sample(list(compact_graph.osm_ids), 400)
+    reference = None
+    for jobs in (1, 2, 4, 8):
+        start = time.time()
+        result = matrix_engine.compute(nodes, jobs=jobs)
+        elapsed = time.time() - start
+        if reference is None:
+            reference, expected_matrix = elapsed, result
+        elif not numpy.array_equal(result.distances, expected_matrix.distances):
+            nb_errors += 1
+        print(
+            "%dx%d matrix, %d process(es): %.2f seconds, speedup %.1fx"
+            % (len(nodes), len(nodes), jobs, elapsed, reference / elapsed)
+        )
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
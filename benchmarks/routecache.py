@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+from pynavigo.engine import DijkstraEngine
+from pynavigo.routecache import RouteCache
+
+from . import load_graph
+
+
+def main():
+    """
+    Time of repeated queries (few origins, many destinations) without
+    and with the cache on the Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = DijkstraEngine(compact_graph)
+    cache = RouteCache(engine, capacity=1000)
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    origins = random.sample(nodes, 10)
+    destinations = random.sample(nodes, 100)
+    queries = [
+        (random.choice(origins), random.choice(destinations)) for _ in range(2000)
+    ]
+    start = time.time()
+    expected = [engine.route(source, target) for source, target in queries]
+    reference = time.time() - start
+    start = time.time()
+    results = [cache.route(source, target) for source, target in queries]
+    elapsed = time.time() - start
+    print(
+        "No cache: %.3f ms/query, cache: %.3f ms/query (speedup %.1fx)"
+        % (
+            1000 * reference / len(queries),
+            1000 * elapsed / len(queries),
+            reference / elapsed,
+        )
+    )
+    print(cache.stats())
+    nb_errors = sum(
+        1
+        for (_, cost), (_, expected_cost) in zip(results, expected)
+        if abs(cost - expected_cost) > 1e-6
+    )
+    print("%d different cost(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
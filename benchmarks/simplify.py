@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+from pynavigo.engine import DijkstraEngine
+
+from . import load_graph
+
+
+def main():
+    """
+    Size of the graph and query times before and after the
+    simplification of the Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    start = time.time()
+    simplified = graph.simplify()
+    print(compact_graph)
+    print(simplified, "in %.3f seconds" % (time.time() - start))
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(500)]
+    engine = DijkstraEngine(compact_graph)
+    start = time.time()
+    expected = [engine.route(source, target) for source, target in queries]
+    reference = time.time() - start
+    start = time.time()
+    results = [simplified.route(source, target) for source, target in queries]
+    elapsed = time.time() - start
+    print(
+        "Original: %.2f ms/query, simplified: %.2f ms/query (speedup %.1fx)"
+        % (
+            1000 * reference / len(queries),
+            1000 * elapsed / len(queries),
+            reference / elapsed,
+        )
+    )
+    nb_errors = 0
+    for (path, cost), (expected_path, expected_cost) in zip(results, expected):
+        if abs(cost - expected_cost) > 1e-6 or (
+            abs(compact_graph.len_way(path) - expected_cost) > 1e-6
+        ):
+            nb_errors += 1
+    print("%d different route(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import time
+import random
+
+from pynavigo import utils
+from pynavigo.spatial import KDTree
+
+from . import load_graph
+
+
+def main():
+    """
+    Compares the tree with a linear scan on the Luxembourg dump.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+
+    start = time.time()
+    tree = KDTree(compact_graph.latitudes, compact_graph.longitudes)
+    print("Construction of the tree: %.3f seconds" % (time.time() - start))
+
+    random.seed(42)
+    lat_min, lat_max = min(tree.latitudes), max(tree.latitudes)
+    lon_min, lon_max = min(tree.longitudes), max(tree.longitudes)
+    points = [
+        (random.uniform(lat_min, lat_max), random.uniform(lon_min, lon_max))
+        for _ in range(1000)
+    ]
+    start = time.time()
+    expected = [
+        min(
+            graph.graph_info.values(),
+            key=lambda node: utils.EarthDistance(
+                (latitude, longitude), (node.latitude, node.longitude)
+            ),
+        ).osm_id
+        for latitude, longitude in points[:100]
+    ]
+    linear = (time.time() - start) / 100
+    start = time.time()
+    result = tree.nearest_many(points)
+    indexed = (time.time() - start) / len(points)
+    nb_errors = sum(
+        1 for osm_id, i in zip(expected, result) if osm_id != compact_graph.osm_ids[i]
+    )
+    print(
+        "Linear scan: %.3f ms/query - KD-tree: %.3f ms/query, %d difference(s)"
+        % (1000 * linear, 1000 * indexed, nb_errors)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+import datetime
+
+from pynavigo.engine import DijkstraEngine
+from pynavigo.timedependent import TimeDependentEngine
+
+from . import load_graph
+
+
+def main():
+    """
+    Travel times at several times of a weekday on the Luxembourg dump,
+    compared with the static fastest paths, and check of the reverse
+    queries.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = TimeDependentEngine(compact_graph)
+    static = DijkstraEngine(compact_graph)
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(100)]
+    day = datetime.datetime(2012, 4, 2)
+    nb_errors = 0
+    for hour in (3, 8, 12, 17.5):
+        departure = day + datetime.timedelta(hours=hour)
+        start = time.time()
+        results = [engine.route(s, t, departure) for s, t in queries]
+        elapsed = time.time() - start
+        total = sum(cost for _, cost in results)
+        reference = sum(static.route(s, t, "time")[1] for s, t in queries)
+        print(
+            "Departure %s: %.2f ms/query, %.1f%% slower than the free flow"
+            % (
+                departure.strftime("%H:%M"),
+                1000 * elapsed / len(queries),
+                100 * (total / reference - 1),
+            )
+        )
+        for (s, t), (path, cost) in zip(queries, results):
+            # same travel time as the time-dependent Dijkstra
+            expected = engine.query(s, departure, t).cost(t)
+            if expected is not None and abs(expected - cost) > 1e-9:
+                nb_errors += 1
+            # arriving at the arrival time of the path leaves at departure
+            if path:
+                arrival = departure + datetime.timedelta(hours=cost)
+                _, duration = engine.route_arrival(s, t, arrival)
+                if abs(duration - cost) > 1e-6:
+                    nb_errors += 1
+    print("%d error(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import sys
+import time
+import random
+
+from pynavigo.engine import DijkstraEngine
+from pynavigo.turns import TurnEngine
+
+from . import load_graph
+
+NB_QUERIES = 200
+
+
+def main():
+    """
+    Benchmark of the overhead of the turn restrictions on the Luxembourg
+    dump, with random restrictions at a growing share of the
+    intersections, and check of the routes.
+    """
+    graph = load_graph()
+    compact_graph = graph.compact()
+    engine = DijkstraEngine(compact_graph)
+
+    random.seed(42)
+    nodes = list(compact_graph.osm_ids)
+    queries = [(random.choice(nodes), random.choice(nodes)) for _ in range(NB_QUERIES)]
+    start = time.time()
+    expected = [engine.query(s, t).get(t) for s, t in queries]
+    reference = time.time() - start
+    print("DijkstraEngine: %.2f ms/query" % (1000 * reference / NB_QUERIES))
+
+    osm_ids, offsets, heads = (
+        compact_graph.osm_ids,
+        compact_graph.offsets,
+        compact_graph.targets,
+    )
+    reverse = compact_graph.reverse()
+    intersections = [
+        v for v in range(compact_graph.nb_nodes()) if offsets[v + 1] - offsets[v] >= 3
+    ]
+    nb_errors = 0
+    for share in (0, 0.05, 0.2, 0.5):
+        graph.restrictions = []
+        for v in random.sample(intersections, int(share * len(intersections))):
+            # one forbidden turn at the intersection
+            u = reverse.targets[
+                random.randrange(reverse.offsets[v], reverse.offsets[v + 1])
+            ]
+            w = heads[random.randrange(offsets[v], offsets[v + 1])]
+            graph.addRestriction(osm_ids[u], osm_ids[v], osm_ids[w])
+        restricted = graph.compact()
+        turn_engine = TurnEngine(restricted)
+        turns = restricted.turn_restrictions()
+        start = time.time()
+        results = [turn_engine.route(s, t) for s, t in queries]
+        elapsed = time.time() - start
+        print(
+            "%4d forbidden turns at %3d%% of the intersections: %.2f ms/query "
+            "(overhead %.2fx)"
+            % (
+                len(restricted.restrictions) // 2,
+                100 * share,
+                1000 * elapsed / NB_QUERIES,
+                elapsed / reference,
+            )
+        )
+        for (path, cost), (expected_path, expected_cost) in zip(results, expected):
+            if bool(path) != bool(expected_path):
+                # a target can become unreachable
+                continue
+            if not share and abs(cost - expected_cost) > 1e-6:
+                nb_errors += 1
+            if cost < expected_cost - 1e-6:
+                nb_errors += 1
+            # no forbidden turn on the path
+            indices = [restricted.index[node] for node in path]
+            for u, v, w in zip(indices, indices[1:], indices[2:]):
+                a, b = restricted.edge(u, v), restricted.edge(v, w)
+                if b in turns.get(v, {}).get(a, ()):
+                    nb_errors += 1
+            if path and abs(restricted.len_way(path) - cost) > 1e-6:
+                nb_errors += 1
+    print("%d error(s)" % nb_errors)
+    if nb_errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
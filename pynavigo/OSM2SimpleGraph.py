@@ -8,14 +8,13 @@ __revision__ = "$Date: 2012/05/10 $"
 __copyright__ = "Copyright (c) 2013-2021 Cedric Bonhomme"
 __license__ = ""
 
-from imposm.parser import OSMParser
-
 from . import simpleGraph
 from . import utils
 
 # import client
 from . import dijkstra
 from . import maxspeed
+from .osmreader import OSMReader
 
 whitelist = set(
     (
@@ -36,6 +35,13 @@ whitelist = set(
 )
 
 
+def is_road(tags):
+    """
+    Return True if the tags of a way are the ones of a road of the graph.
+    """
+    return tags.get("highway") in whitelist
+
+
 class OSM2SimpleGraph(object):
     """
     Simple class that handles the parsed OSM data.
@@ -46,6 +52,11 @@ class OSM2SimpleGraph(object):
         Initialization.
         """
         self.graph = graph
+        # turn restrictions (from way, via node, to way, only) and the
+        # nodes of the ways they refer to
+        self.restrictions = []
+        self.restricted_ways = {}
+        self.nb_ignored_restrictions = 0
         try:
             self.max_speed = maxspeed.load_max_speed("france")
         except Exception as e:
@@ -88,7 +99,9 @@ class OSM2SimpleGraph(object):
                 except:
                     speed_limit = self.max_speed["default"]
 
-            self.graph.addWay(refs, oneway, speed_limit)
+            self.graph.addWay(refs, oneway, speed_limit, tags["highway"])
+            if osm_id in self.restricted_ways:
+                self.restricted_ways[osm_id] = refs
 
     def nodes(self, nodes):
         """
@@ -98,9 +111,74 @@ class OSM2SimpleGraph(object):
             self.graph.addNode(osm_id, position[0], position[1])
 
     def relations(self, relations):
-        """ """
-        for osm_id, tags, link in relations:
-            print(link)
+        """
+        Callback method for relations: keeps the turn restrictions
+        (type=restriction) whose via member is a node. The relations
+        are read before the ways.
+        """
+        for osm_id, tags, members in relations:
+            if tags.get("type") != "restriction":
+                continue
+            restriction = tags.get("restriction") or tags.get("restriction:motorcar")
+            if restriction is None or not restriction.startswith(("no_", "only_")):
+                continue
+            roles = {}
+            for ref, kind, role in members:
+                roles.setdefault(role, []).append((ref, kind))
+            try:
+                [(from_way, from_kind)] = roles["from"]
+                [(via, via_kind)] = roles["via"]
+                [(to_way, to_kind)] = roles["to"]
+            except (KeyError, ValueError):
+                # incomplete relation
+                self.nb_ignored_restrictions += 1
+                continue
+            if (from_kind, via_kind, to_kind) != ("way", "node", "way"):
+                # the restrictions with a via way are not supported
+                self.nb_ignored_restrictions += 1
+                continue
+            self.restrictions.append(
+                (from_way, via, to_way, restriction.startswith("only_"))
+            )
+            self.restricted_ways[from_way] = None
+            self.restricted_ways[to_way] = None
+
+    def add_restrictions(self):
+        """
+        Adds the turn restrictions to the graph once the ways are read:
+        the from and to ways are replaced by their nodes next to the via
+        node. Return the number of restrictions added.
+        """
+        nb_restrictions = 0
+        for from_way, via, to_way, only in self.restrictions:
+            fromnodes = neighbors(self.restricted_ways.get(from_way), via)
+            tonodes = neighbors(self.restricted_ways.get(to_way), via)
+            if not fromnodes or not tonodes:
+                # ways which are not roads or do not cross the via node
+                self.nb_ignored_restrictions += 1
+                continue
+            for fromnode in fromnodes:
+                for tonode in tonodes:
+                    self.graph.addRestriction(fromnode, via, tonode, only)
+            nb_restrictions += 1
+        self.restrictions, self.restricted_ways = [], {}
+        return nb_restrictions
+
+
+def neighbors(refs, node):
+    """
+    Return the nodes next to node in a way (list of node ids).
+    """
+    if refs is None:
+        return []
+    result = []
+    for i, ref in enumerate(refs):
+        if ref == node:
+            if i > 0:
+                result.append(refs[i - 1])
+            if i + 1 < len(refs):
+                result.append(refs[i + 1])
+    return result
 
 
 if __name__ == "__main__":
@@ -116,20 +194,22 @@ if __name__ == "__main__":
 
     print(("Generation of the graph for", OSM_FILE))
     print("Creating nodes...")
-    p = OSMParser(
-        concurrency=2,
+    p = OSMReader(
         coords_callback=simple_graph.coords,
         ways_callback=simple_graph.ways,
+        relations_callback=simple_graph.relations,
+        way_filter=is_road,
     )
     start_user = time.time()
     p.parse(OSM_FILE)
+    print((simple_graph.add_restrictions(), "turn restriction(s)."))
     print("Creating structures (relations between nodes and distance)...")
     graph.create_graph_structure()
     print("Removing isolated nodes...")
     nb_isolated_nodes = graph.remove_isolated_nodes()
     print((nb_isolated_nodes, "node(s) removed."))
     print("Trying to remove islands...")
-    graph.remove_islands()
+    print(graph.remove_islands(strong=True))
     end_user = time.time()
     print("Generation done.")
     print(("User time:", end_user - start_user, "seconds."))
@@ -0,0 +1,220 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+from heapq import heappush, heappop
+
+from .engine import INFINITY, DijkstraEngine
+from .snapping import SnappedLocation
+
+# an alternative costs at most STRETCH times the shortest route
+STRETCH = 1.25
+# at most OVERLAP of the cost of an alternative is shared with each
+# route already selected
+OVERLAP = 0.6
+# the plateau of an alternative (the part which is a shortest path
+# from the source and to the destination) is at least PLATEAU times
+# the cost of the shortest route, so that its detour is locally optimal
+PLATEAU = 0.2
+
+
+class AlternativesEngine(object):
+    """
+    Alternative routes on a CompactGraph with the plateau method.
+
+    The shortest path tree from the source and the one to the
+    destination (on the reversed graph) are computed once, both bounded
+    by STRETCH times the cost of the shortest route. The edges which are
+    in both trees form chains (plateaus): the route through a plateau
+    follows the first tree to its start and the second tree from its
+    end. The longest plateaus give the alternatives, kept if they are
+    not too long (stretch), not too similar to the routes already
+    selected (overlap) and without loop.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.engine = DijkstraEngine(graph)
+        self.nb_settled = 0
+
+    def alternatives(
+        self,
+        source,
+        target,
+        metric="distance",
+        count=3,
+        stretch=STRETCH,
+        overlap=OVERLAP,
+        plateau=PLATEAU,
+    ):
+        """
+        Return up to count routes (path, cost) between two OSM nodes (or
+        SnappedLocation), the shortest one first, like
+        DijkstraEngine.route.
+        """
+        sources = self.engine.seeds(source, SnappedLocation.sources, metric)
+        targets = self.engine.seeds(target, SnappedLocation.targets, metric)
+        if not sources or not targets:
+            return []
+        weights = self.graph.weights(metric)
+        forward = self.engine.scratch("alternatives_forward")
+        backward = self.engine.scratch("alternatives_backward")
+        self.nb_settled = 0
+
+        # tree from the source, until the destination is settled and
+        # then up to the stretch
+        forward_order = self.search(
+            self.graph, forward, sources, targets, stretch, metric
+        )
+        best, last = min(
+            (
+                (forward.dist[node] + cost, node)
+                for node, cost in targets
+                if forward.settled[node] == forward.generation
+            ),
+            default=(INFINITY, -1),
+        )
+        if last == -1:
+            return []
+        limit = stretch * best
+        # a node out of the first tree costs more than limit from the
+        # source, no route within the stretch goes through it
+        self.search(
+            self.graph.reverse(), backward, targets, None, limit, metric, forward
+        )
+
+        # edges u -> v in both trees: plateaus
+        following, previous = {}, set()
+        for v in forward_order:
+            u = forward.pred[v]
+            if (
+                u != -1
+                and backward.settled[u] == backward.generation
+                and backward.pred[u] == v
+            ):
+                following[u] = v
+                previous.add(v)
+        candidates = []
+        for start in following:
+            if start in previous:
+                continue
+            end = start
+            while end in following:
+                end = following[end]
+            cost = forward.dist[end] + backward.dist[end]
+            length = forward.dist[end] - forward.dist[start]
+            if cost <= limit and length >= plateau * best:
+                candidates.append((-length, cost, end))
+        candidates.sort()
+
+        # the shortest route first
+        path = self.path(forward, None, last)
+        routes = [(self.edge_costs(path, weights), (path, best))]
+        for _, cost, end in candidates:
+            if len(routes) == count:
+                break
+            path = self.path(forward, backward, end)
+            if len(set(path)) != len(path):
+                continue
+            edges = self.edge_costs(path, weights)
+            if any(
+                sum(weight for edge, weight in edges.items() if edge in selected)
+                > overlap * cost
+                for selected, _ in routes
+            ):
+                continue
+            routes.append((edges, (path, cost)))
+        osm_ids = self.graph.osm_ids
+        return [([osm_ids[i] for i in path], cost) for _, (path, cost) in routes]
+
+    def search(self, graph, scratch, seeds, targets, limit, metric, within=None):
+        """
+        Dijkstra from the seeds (node index, initial cost) in the
+        scratch buffers. With targets (node index, exit cost), the
+        search goes on until limit times the cost of the closest target,
+        otherwise until limit. With within (scratch buffers of another
+        search), only its settled nodes are visited. Return the list of
+        the settled nodes.
+        """
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = graph.offsets, graph.targets, graph.weights(metric)
+        remaining = {}
+        budget = limit
+        if targets is not None:
+            remaining = dict(targets)
+            budget = INFINITY
+        heap = []
+        for node, cost in seeds:
+            if stamp[node] != generation or cost < dist[node]:
+                dist[node] = cost
+                pred[node] = -1
+                stamp[node] = generation
+                heappush(heap, (cost, node))
+        order = []
+        found = INFINITY
+        while heap:
+            d, v = heappop(heap)
+            if budget == INFINITY and d >= found:
+                # no target can be reached for less than found
+                budget = limit * found
+            if d > budget:
+                break
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            order.append(v)
+            if v in remaining:
+                found = min(found, d + remaining.pop(v))
+                if not remaining:
+                    budget = limit * found
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                if within is not None and within.settled[w] != within.generation:
+                    continue
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd, w))
+        self.nb_settled += len(order)
+        return order
+
+    def path(self, forward, backward, node):
+        """
+        Return the path (node indices) following the tree from the
+        source to node and the tree to the destination (if any) from
+        node.
+        """
+        path = []
+        i = node
+        while i != -1:
+            path.append(i)
+            i = forward.pred[i]
+        path.reverse()
+        if backward is None:
+            return path
+        i = backward.pred[node]
+        while i != -1:
+            path.append(i)
+            i = backward.pred[i]
+        return path
+
+    def edge_costs(self, path, weights):
+        """
+        Return the dictionary {(u, v): cost} of the edges of a path.
+        """
+        edge = self.graph.edge
+        return {(u, v): weights[edge(u, v)] for u, v in zip(path, path[1:])}
@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import math
+import threading
+from heapq import heappush, heappop
+
+from . import utils
+from . import maxspeed
+from .engine import Scratch
+from .compactgraph import DEFAULT_SPEED
+
+# The edges are computed with utils.EarthDistance, which uses the radius
+# of curvature at the middle of the edge. Rounding errors on very short
+# edges can make them up to 0.5% shorter than the chord, so the
+# heuristic is scaled down a little to stay a lower bound.
+HEURISTIC_FACTOR = 0.99
+
+
+class AStar(object):
+    """
+    A* on a CompactGraph.
+
+    The heuristic is the chord between the node and the destination on
+    the unit sphere (precomputed unit vectors, no trigonometry during the
+    search) multiplied by the smallest radius of curvature of the map.
+    The chord is shorter than the arc, so the heuristic never
+    overestimates the remaining distance.
+
+    With metric="time" the cost of an edge is the time needed to cross
+    it (in hours) and the heuristic is divided by the max speed, the
+    same bound is used for the time part of a blended metric (see
+    CompactGraph.weights).
+    """
+
+    def __init__(self, graph, metric="distance", country="france"):
+        self.graph = graph
+        self.metric = metric
+        self.local = threading.local()
+        self.nb_settled = 0
+
+        smallest_latitude = min(
+            (abs(latitude) for latitude in graph.latitudes), default=0
+        )
+        self.scale = HEURISTIC_FACTOR * utils.CalcRad(smallest_latitude)
+        self.weights = graph.weights(metric)
+        if metric != "distance":
+            max_speed = max(
+                max(maxspeed.load_max_speed(country).values()),
+                max(graph.speeds, default=0),
+            )
+            if metric == "time":
+                # meters to hours at the max speed
+                self.scale /= max_speed * 1000
+            else:
+                # the time part is converted to meters at DEFAULT_SPEED
+                self.scale *= 1 - metric + metric * DEFAULT_SPEED / max_speed
+
+    def scratch(self):
+        """
+        Return the search buffers of the current thread.
+        """
+        scratch = getattr(self.local, "scratch", None)
+        if scratch is None:
+            scratch = Scratch(self.graph.nb_nodes())
+            self.local.scratch = scratch
+        return scratch
+
+    def route(self, source, target):
+        """
+        Return the shortest path from the OSM node source to the OSM
+        node target and its cost, or ([], 0).
+        """
+        index = self.graph.index
+        if source not in index or target not in index:
+            return ([], 0)
+        s, t = index[source], index[target]
+        osm_ids = self.graph.osm_ids
+        path, cost = self.route_indices(s, t)
+        return ([osm_ids[i] for i in path], cost)
+
+    def route_indices(self, s, t):
+        """
+        Same as route with node indices.
+        """
+        scratch = self.scratch()
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = self.graph.offsets, self.graph.targets, self.weights
+        x, y, z = self.graph.unit_vectors()
+        xt, yt, zt = x[t], y[t], z[t]
+        scale = self.scale
+        sqrt = math.sqrt
+
+        dist[s] = 0.0
+        pred[s] = -1
+        stamp[s] = generation
+        heap = [(0.0, 0.0, s)]
+        nb_settled = 0
+        while heap:
+            _, d, v = heappop(heap)
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            nb_settled += 1
+            if v == t:
+                break
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    dx, dy, dz = x[w] - xt, y[w] - yt, z[w] - zt
+                    heappush(
+                        heap, (nd + scale * sqrt(dx * dx + dy * dy + dz * dz), nd, w)
+                    )
+        self.nb_settled = nb_settled
+
+        if settled[t] != generation:
+            return ([], 0)
+        path = []
+        i = t
+        while i != -1:
+            path.append(i)
+            i = pred[i]
+        path.reverse()
+        return (path, dist[t])
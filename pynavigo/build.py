@@ -0,0 +1,204 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import time
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy
+
+from . import utils
+
+# a shard is not split further below this number of node references
+MIN_SHARD_SIZE = 10000
+
+
+@contextmanager
+def stage(name):
+    """
+    Prints the time spent in a stage of the build.
+    """
+    start = time.time()
+    yield
+    print(("%s:" % name, round(time.time() - start, 3), "seconds."))
+
+
+def node_arrays(graph_info):
+    """
+    Return the sorted OSM ids of the nodes of graph_info and the
+    arrays of their latitudes and longitudes.
+    """
+    osm_ids = sorted(graph_info)
+    latitudes = numpy.array(
+        [graph_info[osm_id].latitude for osm_id in osm_ids], dtype=numpy.float64
+    )
+    longitudes = numpy.array(
+        [graph_info[osm_id].longitude for osm_id in osm_ids], dtype=numpy.float64
+    )
+    return numpy.array(osm_ids, dtype=numpy.int64), latitudes, longitudes
+
+
+def shards(way_offsets, nb_shards):
+    """
+    Splits the ways in nb_shards ranges (first way, last way + 1) with
+    about the same number of node references.
+    """
+    nb_ways = len(way_offsets) - 1
+    bounds = numpy.searchsorted(
+        way_offsets, numpy.linspace(0, way_offsets[-1], nb_shards + 1)
+    )
+    bounds = numpy.unique(numpy.clip(bounds, 0, nb_ways))
+    bounds[0], bounds[-1] = 0, nb_ways
+    return [
+        (int(first), int(last))
+        for first, last in zip(bounds, bounds[1:])
+        if last > first
+    ]
+
+
+def shard_segments(arrays, first, last):
+    """
+    Computes the segments of the ways first to last - 1.
+
+    arrays holds the node arrays (node_ids, latitudes, longitudes),
+    the concatenated refs of the ways with their way_offsets and the
+    outputs, indexed like refs: the segment refs[k] -> refs[k + 1]
+    is stored in fromnodes[k], tonodes[k] and lengths[k] (node
+    positions in node_ids), fromnodes[k] being -1 if there is no
+    segment. Like Graph.create_graph_structure, a way is cut at its
+    first node missing from the node arrays.
+    """
+    node_ids, way_offsets = arrays["node_ids"], arrays["way_offsets"]
+    start, end = way_offsets[first], way_offsets[last]
+    refs = arrays["refs"][start:end]
+    fromnodes = arrays["fromnodes"][start:end]
+    fromnodes[:] = -1
+    if len(node_ids) == 0 or end - start < 2:
+        return
+    positions = numpy.minimum(numpy.searchsorted(node_ids, refs), len(node_ids) - 1)
+    missing = node_ids[positions] != refs
+    # way of each reference and number of missing nodes of the way so far
+    way_of = numpy.repeat(
+        numpy.arange(last - first), numpy.diff(way_offsets[first : last + 1])
+    )
+    nb_missing = numpy.cumsum(missing)
+    before_way = nb_missing - missing
+    nb_missing -= before_way[way_offsets[first:last] - start][way_of]
+    valid = (way_of[:-1] == way_of[1:]) & (nb_missing[1:] == 0)
+    (indices,) = numpy.nonzero(valid)
+    fromnodes[indices] = positions[indices]
+    arrays["tonodes"][start:end][indices] = positions[indices + 1]
+    latitudes, longitudes = arrays["latitudes"], arrays["longitudes"]
+    arrays["lengths"][start:end][indices] = utils.earth_distance_many(
+        latitudes[positions[indices]],
+        longitudes[positions[indices]],
+        latitudes[positions[indices + 1]],
+        longitudes[positions[indices + 1]],
+    )
+
+
+def shared_shard_segments(specs, first, last):
+    """
+    shard_segments run in a worker process on the shared memory blocks
+    described by specs: name -> (block name, dtype, length).
+    """
+    blocks, arrays = [], {}
+    for name, (block_name, dtype, length) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = numpy.ndarray(length, dtype=dtype, buffer=block.buf)
+    try:
+        shard_segments(arrays, first, last)
+    finally:
+        del arrays
+        for block in blocks:
+            block.close()
+
+
+def segments(node_ids, latitudes, longitudes, ways_refs, jobs=1):
+    """
+    Return the arrays (fromnodes, tonodes, way indices, lengths) of the
+    segments of the ways whose refs are given, in the order of the ways.
+    fromnodes and tonodes are positions in node_ids (sorted OSM ids).
+
+    With jobs > 1 the ways are sharded across a pool of processes
+    which read and write the arrays in shared memory.
+    """
+    way_offsets = numpy.zeros(len(ways_refs) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(refs) for refs in ways_refs], out=way_offsets[1:])
+    nb_refs = int(way_offsets[-1])
+    inputs = {
+        "node_ids": numpy.asarray(node_ids, dtype=numpy.int64),
+        "latitudes": numpy.asarray(latitudes, dtype=numpy.float64),
+        "longitudes": numpy.asarray(longitudes, dtype=numpy.float64),
+        "way_offsets": way_offsets,
+        "refs": numpy.fromiter(
+            (ref for refs in ways_refs for ref in refs),
+            dtype=numpy.int64,
+            count=nb_refs,
+        ),
+    }
+    outputs = {
+        "fromnodes": numpy.int64,
+        "tonodes": numpy.int64,
+        "lengths": numpy.float64,
+    }
+    jobs = max(1, min(jobs, nb_refs // MIN_SHARD_SIZE))
+    if "fork" not in multiprocessing.get_all_start_methods():
+        jobs = 1
+
+    blocks, arrays = [], {}
+    try:
+        if jobs == 1:
+            arrays.update(inputs)
+            for name, dtype in outputs.items():
+                arrays[name] = numpy.zeros(nb_refs, dtype=dtype)
+            shard_segments(arrays, 0, len(ways_refs))
+        else:
+            specs = {}
+            for name, dtype, source in [
+                (name, values.dtype, values) for name, values in inputs.items()
+            ] + [(name, numpy.dtype(dtype), None) for name, dtype in outputs.items()]:
+                length = nb_refs if source is None else len(source)
+                block = shared_memory.SharedMemory(
+                    create=True, size=max(1, length * numpy.dtype(dtype).itemsize)
+                )
+                blocks.append(block)
+                arrays[name] = numpy.ndarray(length, dtype=dtype, buffer=block.buf)
+                if source is not None:
+                    arrays[name][:] = source
+                specs[name] = (block.name, dtype, length)
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                futures = [
+                    executor.submit(shared_shard_segments, specs, first, last)
+                    for first, last in shards(way_offsets, jobs)
+                ]
+                for future in futures:
+                    future.result()
+
+        (indices,) = numpy.nonzero(arrays["fromnodes"] != -1)
+        way_indices = numpy.searchsorted(way_offsets, indices, side="right") - 1
+        result = (
+            arrays["fromnodes"][indices],
+            arrays["tonodes"][indices],
+            way_indices,
+            arrays["lengths"][indices],
+        )
+    finally:
+        # the results are copies, the shared blocks can be released
+        arrays.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return result
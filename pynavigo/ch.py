@@ -0,0 +1,386 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import struct
+import threading
+from array import array
+from heapq import heappush, heappop
+
+from .engine import Scratch, INFINITY
+from .landmarks import digest
+
+MAGIC = b"PYNAVCH\x00"
+VERSION = 2
+# magic, version, digest of the graph, number of nodes, number of edges
+# of the up and of the down graphs
+HEADER = struct.Struct("<8sI20sqqq")
+
+# maximum number of nodes settled by a witness search
+WITNESS_SETTLE_LIMIT = 500
+# smaller limit when a contraction is only simulated to compute a priority
+PRIORITY_SETTLE_LIMIT = 50
+
+
+class ContractionHierarchy(object):
+    """
+    Contraction hierarchies (CH).
+
+    The nodes are contracted one after the other (rank order). When a
+    node v is contracted, a shortcut u -> w is added for each pair of
+    neighbors such that u -> v -> w is the only shortest path (no witness
+    path avoiding v is found). A query is a bidirectional search where
+    the forward search only follows edges toward higher ranked nodes
+    (up graph) and the backward search edges coming from higher ranked
+    nodes (down graph).
+
+    The up and down graphs are stored in CSR form: the edges of the
+    node i are at the positions offsets[i] to offsets[i + 1] - 1 of
+    targets, weights and middles. middles[k] is the contracted node of
+    a shortcut, or -1 for an edge of the initial graph. An edge u -> w
+    is stored in the up graph of u if rank[u] < rank[w], else in the down
+    graph of w (with target u).
+    """
+
+    def __init__(self, osm_ids, rank, up, down, graph_digest=None):
+        self.osm_ids = osm_ids
+        self.rank = rank
+        self.up = up
+        self.down = down
+        # digest of the CompactGraph the hierarchy is built from
+        self.graph_digest = graph_digest
+        self.index = {osm_id: i for i, osm_id in enumerate(osm_ids)}
+        self.local = threading.local()
+        self.nb_settled = 0
+
+    @classmethod
+    def from_graph(cls, graph, witness_limit=WITNESS_SETTLE_LIMIT):
+        """
+        Builds the hierarchy of a simpleGraph.Graph (as returned by
+        GraphLoader.load_graph). The infinite reverse edges of one way
+        streets are not part of the compact form and are ignored.
+        """
+        return cls.build(graph.compact(), witness_limit)
+
+    @classmethod
+    def build(cls, graph, witness_limit=WITNESS_SETTLE_LIMIT):
+        """
+        Builds the hierarchy of a CompactGraph.
+        """
+        nb_nodes = graph.nb_nodes()
+        # out_edges[u][w] = in_edges[w][u] = [weight, middle]
+        out_edges = [dict() for _ in range(nb_nodes)]
+        in_edges = [dict() for _ in range(nb_nodes)]
+        for u in range(nb_nodes):
+            for k in range(graph.offsets[u], graph.offsets[u + 1]):
+                w = graph.targets[k]
+                if w == u:
+                    continue
+                weight = graph.distances[k]
+                if w not in out_edges[u] or weight < out_edges[u][w][0]:
+                    out_edges[u][w] = in_edges[w][u] = [weight, -1]
+
+        contracted = [False] * nb_nodes
+        deleted_neighbors = [0] * nb_nodes
+
+        def witness_search(u, v, max_cost, limit):
+            """
+            Distances from u to the nodes reached before max_cost,
+            without going through v.
+            """
+            dist = {u: 0.0}
+            heap = [(0.0, u)]
+            settled = 0
+            while heap and settled < limit:
+                d, x = heappop(heap)
+                if d > dist[x]:
+                    continue
+                if d > max_cost:
+                    break
+                settled += 1
+                for y, (weight, _) in out_edges[x].items():
+                    if y == v or contracted[y]:
+                        continue
+                    nd = d + weight
+                    if nd < dist.get(y, INFINITY):
+                        dist[y] = nd
+                        heappush(heap, (nd, y))
+            return dist
+
+        def shortcuts(v, limit):
+            """
+            Shortcuts (u, w, weight) needed to contract v.
+            """
+            result = []
+            outgoing = [
+                (w, edge[0]) for w, edge in out_edges[v].items() if not contracted[w]
+            ]
+            if not outgoing:
+                return result
+            max_out = max(weight for _, weight in outgoing)
+            for u, (in_weight, _) in in_edges[v].items():
+                if contracted[u]:
+                    continue
+                dist = witness_search(u, v, in_weight + max_out, limit)
+                for w, out_weight in outgoing:
+                    if w == u:
+                        continue
+                    weight = in_weight + out_weight
+                    if dist.get(w, INFINITY) > weight:
+                        result.append((u, w, weight))
+            return result
+
+        def priority(v):
+            """
+            Edge difference plus the number of contracted neighbors.
+            """
+            removed = sum(1 for u in in_edges[v] if not contracted[u]) + sum(
+                1 for w in out_edges[v] if not contracted[w]
+            )
+            added = len(shortcuts(v, PRIORITY_SETTLE_LIMIT))
+            return added - removed + deleted_neighbors[v]
+
+        heap = [(priority(v), v) for v in range(nb_nodes)]
+        heap.sort()
+        rank = array("i", bytes(4 * nb_nodes))
+        order = 0
+        while heap:
+            _, v = heappop(heap)
+            current = priority(v)
+            if heap and current > heap[0][0]:
+                # lazy update: the priority has increased since it was computed
+                heappush(heap, (current, v))
+                continue
+            for u, w, weight in shortcuts(v, witness_limit):
+                if w not in out_edges[u] or weight < out_edges[u][w][0]:
+                    out_edges[u][w] = in_edges[w][u] = [weight, v]
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for neighbor in set(in_edges[v]) | set(out_edges[v]):
+                deleted_neighbors[neighbor] += 1
+
+        up = [[] for _ in range(nb_nodes)]
+        down = [[] for _ in range(nb_nodes)]
+        for u in range(nb_nodes):
+            for w, (weight, middle) in out_edges[u].items():
+                if rank[u] < rank[w]:
+                    up[u].append((w, weight, middle))
+                else:
+                    down[w].append((u, weight, middle))
+        return cls(graph.osm_ids, rank, to_csr(up), to_csr(down), digest(graph))
+
+    def save(self, path):
+        """
+        Serializes the hierarchy in a binary file.
+        """
+        with open(path, "wb") as dump:
+            dump.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    self.graph_digest or bytes(20),
+                    len(self.osm_ids),
+                    len(self.up[1]),
+                    len(self.down[1]),
+                )
+            )
+            array("q", self.osm_ids).tofile(dump)
+            self.rank.tofile(dump)
+            for csr in (self.up, self.down):
+                for values in csr:
+                    values.tofile(dump)
+
+    @classmethod
+    def load(cls, path, graph=None):
+        """
+        Loads a hierarchy serialized with save. If graph is given, its
+        digest must match. Raise ValueError for a file of an older
+        version.
+        """
+        with open(path, "rb") as dump:
+            header = dump.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Not a contraction hierarchy file: %s" % path)
+            magic, version, graph_digest, nb_nodes, nb_up, nb_down = HEADER.unpack(
+                header
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Not a contraction hierarchy file: %s" % path)
+            if graph is not None and (
+                nb_nodes != graph.nb_nodes() or graph_digest != digest(graph)
+            ):
+                raise ValueError("Hierarchy built for another graph: %s" % path)
+
+            def read(typecode, count):
+                values = array(typecode)
+                values.fromfile(dump, count)
+                return values
+
+            osm_ids = read("q", nb_nodes)
+            rank = read("i", nb_nodes)
+            csrs = []
+            for nb_edges in (nb_up, nb_down):
+                csrs.append(
+                    (
+                        read("q", nb_nodes + 1),
+                        read("i", nb_edges),
+                        read("d", nb_edges),
+                        read("i", nb_edges),
+                    )
+                )
+        return cls(osm_ids, rank, csrs[0], csrs[1], graph_digest)
+
+    def scratch(self, name):
+        """
+        Return the search buffers of the current thread.
+        """
+        scratch = getattr(self.local, name, None)
+        if scratch is None:
+            scratch = Scratch(len(self.osm_ids))
+            setattr(self.local, name, scratch)
+        return scratch
+
+    def route(self, source, target):
+        """
+        Return the shortest path (OSM ids) from source to target and its
+        cost, like dijkstra.Dijkstra.get.
+        """
+        if source not in self.index or target not in self.index:
+            return ([], 0)
+        s, t = self.index[source], self.index[target]
+        path, cost = self.route_indices(s, t)
+        return ([self.osm_ids[i] for i in path], cost)
+
+    def route_indices(self, s, t):
+        """
+        Same as route with node indices.
+        """
+        if s == t:
+            return ([s], 0)
+        forward, backward = self.scratch("forward"), self.scratch("backward")
+        scratches = (forward, backward)
+        generations = (forward.next_generation(), backward.next_generation())
+        graphs = (self.up, self.down)
+        heaps = ([(0.0, s)], [(0.0, t)])
+        for scratch, node, generation in zip(scratches, (s, t), generations):
+            scratch.dist[node] = 0.0
+            scratch.pred[node] = -1
+            scratch.stamp[node] = generation
+
+        best, meeting, nb_settled = INFINITY, -1, 0
+        while heaps[0] or heaps[1]:
+            # each search stops when its smallest key exceeds the best path
+            for direction in (0, 1):
+                heap = heaps[direction]
+                if heap and heap[0][0] >= best:
+                    del heap[:]
+            if heaps[0] and (not heaps[1] or heaps[0][0][0] <= heaps[1][0][0]):
+                direction = 0
+            elif heaps[1]:
+                direction = 1
+            else:
+                break
+            heap = heaps[direction]
+            d, v = heappop(heap)
+            scratch, generation = scratches[direction], generations[direction]
+            if scratch.settled[v] == generation:
+                continue
+            scratch.settled[v] = generation
+            nb_settled += 1
+            other, other_generation = (
+                scratches[1 - direction],
+                generations[1 - direction],
+            )
+            if other.settled[v] == other_generation and d + other.dist[v] < best:
+                best = d + other.dist[v]
+                meeting = v
+            dist, pred, stamp = scratch.dist, scratch.pred, scratch.stamp
+            offsets, heads, weights, _ = graphs[direction]
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd, w))
+                if other.stamp[w] == other_generation and nd + other.dist[w] < best:
+                    best = nd + other.dist[w]
+                    meeting = w
+        self.nb_settled = nb_settled
+
+        if meeting == -1:
+            return ([], 0)
+        # up part s -> meeting, then down part meeting -> t
+        nodes = []
+        i = meeting
+        while i != -1:
+            nodes.append(i)
+            i = forward.pred[i]
+        nodes.reverse()
+        i = backward.pred[meeting]
+        while i != -1:
+            nodes.append(i)
+            i = backward.pred[i]
+        path = [nodes[0]]
+        for u, w in zip(nodes, nodes[1:]):
+            path.extend(self.unpack(u, w))
+        return (path, best)
+
+    def find(self, u, w):
+        """
+        Return the (weight, middle) of the edge u -> w of the hierarchy.
+        """
+        if self.rank[u] < self.rank[w]:
+            (offsets, targets, weights, middles), i, j = self.up, u, w
+        else:
+            (offsets, targets, weights, middles), i, j = self.down, w, u
+        for k in range(offsets[i], offsets[i + 1]):
+            if targets[k] == j:
+                return weights[k], middles[k]
+        raise KeyError((u, w))
+
+    def unpack(self, u, w):
+        """
+        Return the nodes (u excluded) of the path in the initial graph
+        represented by the edge u -> w.
+        """
+        path = []
+        stack = [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            _, middle = self.find(u, w)
+            if middle == -1:
+                path.append(w)
+            else:
+                # the middle node has a lower rank than u and w
+                stack.append((middle, w))
+                stack.append((u, middle))
+        return path
+
+
+def to_csr(adjacency):
+    """
+    Converts a list of lists of (target, weight, middle) in arrays
+    (offsets, targets, weights, middles).
+    """
+    offsets, targets, weights, middles = (
+        array("q", [0]),
+        array("i"),
+        array("d"),
+        array("i"),
+    )
+    for edges in adjacency:
+        for target, weight, middle in edges:
+            targets.append(target)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(targets))
+    return (offsets, targets, weights, middles)
@@ -0,0 +1,482 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+from array import array
+
+from . import build
+from . import utils
+
+# speed (km/h) used for the edges with no speed limit
+DEFAULT_SPEED = 50
+
+# road classes (highway tag) of the edges, stored as their position
+ROAD_CLASSES = (
+    "default",
+    "motorway",
+    "motorway_link",
+    "trunk",
+    "trunk_link",
+    "primary",
+    "primary_link",
+    "secondary",
+    "tertiary",
+    "minor",
+    "unclassified",
+    "residential",
+    "living_street",
+    "mini_roundabout",
+)
+ROAD_CLASS_IDS = {name: i for i, name in enumerate(ROAD_CLASSES)}
+
+
+def edge_time(distance, speed):
+    """
+    Return the time (in hours) needed to cross an edge of length
+    distance (meters) at speed (km/h, DEFAULT_SPEED if unknown).
+    """
+    return distance / ((speed or DEFAULT_SPEED) * 1000)
+
+
+def road_class(highway):
+    """
+    Return the road class id of a highway tag (0 if it is unknown).
+    """
+    return ROAD_CLASS_IDS.get(highway, 0)
+
+
+class CompactGraph(object):
+    """
+    Frozen, array-backed representation of a graph.
+
+    Nodes are renumbered with dense indices (0 to n - 1). The outgoing
+    edges of the node i are stored at the positions
+    offsets[i] to offsets[i + 1] - 1 of the arrays targets, distances
+    and speeds (compressed sparse row format).
+    The arrays osm_ids, latitudes and longitudes are indexed by node
+    index and index maps an OSM id to its node index.
+
+    The cost of the edges depends on the metric of the queries (see
+    weights): "distance" (meters), "time" (hours, computed when the
+    graph is built) or a number w between 0 and 1 which blends them:
+    (1 - w) * distance + w * time converted to meters at DEFAULT_SPEED.
+    road_classes gives the road class (position in ROAD_CLASSES) of
+    each edge, used by the time-dependent queries.
+    restrictions is the flat array of the pairs (from edge, to edge) of
+    the forbidden turns, sorted, used by the turns.TurnEngine queries
+    (see turn_restrictions).
+
+    Edges with an infinite cost (the reverse direction of one way
+    streets) are not stored.
+    """
+
+    def __init__(
+        self,
+        osm_ids,
+        latitudes,
+        longitudes,
+        offsets,
+        targets,
+        distances,
+        speeds,
+        index=None,
+        travel_times=None,
+        road_classes=None,
+        restrictions=None,
+    ):
+        """
+        Initializes the graph with already built arrays. The travel
+        times are computed from the speeds if they are not given.
+        """
+        self.osm_ids = osm_ids
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.offsets = offsets
+        self.targets = targets
+        self.distances = distances
+        self.speeds = speeds
+        if index is None:
+            index = {osm_id: i for i, osm_id in enumerate(osm_ids)}
+        self.index = index
+        self.reverse_graph = None
+        self.vectors = None
+        self.travel_times = travel_times
+        if road_classes is None:
+            road_classes = array("B", bytes(len(targets)))
+        self.road_classes = road_classes
+        if restrictions is None:
+            restrictions = array("i")
+        self.restrictions = restrictions
+        self.turns = None
+        self.weight_arrays = {}
+
+    @classmethod
+    def from_edges(cls, nodes, edges, restrictions=()):
+        """
+        Builds the graph from a list of (osm_id, longitude, latitude)
+        and a dictionary
+        {(fromnode, tonode): (distance, speed, time, road class id)},
+        time being computed from distance and speed if it is None,
+        and the turn restrictions (see forbidden_turns).
+        """
+        osm_ids = array("q")
+        latitudes = array("d")
+        longitudes = array("d")
+        for osm_id, longitude, latitude in nodes:
+            osm_ids.append(osm_id)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+        index = {osm_id: i for i, osm_id in enumerate(osm_ids)}
+
+        nb_nodes = len(osm_ids)
+        degrees = [0] * (nb_nodes + 1)
+        for fromnode, tonode in edges:
+            degrees[index[fromnode] + 1] += 1
+        offsets = array("q", degrees)
+        for i in range(nb_nodes):
+            offsets[i + 1] += offsets[i]
+
+        nb_edges = offsets[nb_nodes]
+        targets = array("i", bytes(4 * nb_edges))
+        distances = array("d", bytes(8 * nb_edges))
+        speeds = array("d", bytes(8 * nb_edges))
+        times = array("d", bytes(8 * nb_edges))
+        road_classes = array("B", bytes(nb_edges))
+        position = offsets[:-1]
+        for (fromnode, tonode), (distance, speed, time, road) in edges.items():
+            i = index[fromnode]
+            k = position[i]
+            position[i] += 1
+            targets[k] = index[tonode]
+            distances[k] = distance
+            speeds[k] = speed if speed is not None else 0
+            times[k] = time if time is not None else edge_time(distance, speed)
+            road_classes[k] = road
+
+        graph = cls(
+            osm_ids,
+            latitudes,
+            longitudes,
+            offsets,
+            targets,
+            distances,
+            speeds,
+            index,
+            times,
+            road_classes,
+        )
+        graph.restrictions = graph.forbidden_turns(restrictions)
+        return graph
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Builds the compact form of a simpleGraph.Graph object.
+        """
+        nodes = [
+            (
+                node_id,
+                graph.graph_info[node_id].longitude,
+                graph.graph_info[node_id].latitude,
+            )
+            for node_id in graph.graph_structure
+        ]
+        edges = {}
+        for fromnode, neighbors in graph.graph_structure.items():
+            for tonode, edge in neighbors.items():
+                if edge.distance != float("inf"):
+                    edges[(fromnode, tonode)] = (
+                        edge.distance,
+                        edge.speed,
+                        edge.time,
+                        # edges of the graphs serialized without road class
+                        road_class(getattr(edge, "highway", None)),
+                    )
+        return cls.from_edges(nodes, edges, getattr(graph, "restrictions", ()))
+
+    @classmethod
+    def from_ways(cls, graph_info, ways, jobs=1, restrictions=()):
+        """
+        Builds the compact form directly from the nodes and the ways
+        stored in a simpleGraph.Graph object, without creating the
+        dictionaries of Edge objects.
+        Edges are created like in Graph.create_graph_structure: when
+        several ways share a pair of nodes, the last way wins.
+        """
+        edges = {}
+        segments, lengths = way_segments(graph_info, ways, jobs)
+        for (fromnode, tonode, way), distance in zip(segments, lengths.tolist()):
+            edge = (
+                distance,
+                way.speed_limit,
+                edge_time(distance, way.speed_limit),
+                road_class(getattr(way, "highway", None)),
+            )
+            edges[(fromnode, tonode)] = edge
+            if way.oneway:
+                edges.pop((tonode, fromnode), None)
+            else:
+                edges[(tonode, fromnode)] = edge
+        nodes = [
+            (node.osm_id, node.longitude, node.latitude) for node in graph_info.values()
+        ]
+        return cls.from_edges(nodes, edges, restrictions)
+
+    def reverse(self):
+        """
+        Return the graph with all the edges reversed (the edges of the
+        node i are the edges entering i in this graph). The nodes
+        arrays are shared and the result is cached.
+        """
+        if self.reverse_graph is not None:
+            return self.reverse_graph
+        nb_nodes = len(self.osm_ids)
+        degrees = [0] * (nb_nodes + 1)
+        for j in self.targets:
+            degrees[j + 1] += 1
+        offsets = array("q", degrees)
+        for i in range(nb_nodes):
+            offsets[i + 1] += offsets[i]
+
+        nb_edges = len(self.targets)
+        targets = array("i", bytes(4 * nb_edges))
+        distances = array("d", bytes(8 * nb_edges))
+        speeds = array("d", bytes(8 * nb_edges))
+        times = array("d", bytes(8 * nb_edges))
+        road_classes = array("B", bytes(nb_edges))
+        travel_times = self.times()
+        # position of each edge in the reversed graph
+        positions = array("i", bytes(4 * nb_edges))
+        position = offsets[:-1]
+        for i in range(nb_nodes):
+            for k in range(self.offsets[i], self.offsets[i + 1]):
+                j = self.targets[k]
+                r = position[j]
+                position[j] += 1
+                positions[k] = r
+                targets[r] = i
+                distances[r] = self.distances[k]
+                speeds[r] = self.speeds[k]
+                times[r] = travel_times[k]
+                road_classes[r] = self.road_classes[k]
+        # the turn u -> v -> w is the turn w -> v -> u of the reversed graph
+        pairs = sorted(
+            (positions[self.restrictions[p + 1]], positions[self.restrictions[p]])
+            for p in range(0, len(self.restrictions), 2)
+        )
+        restrictions = array("i", [k for pair in pairs for k in pair])
+
+        self.reverse_graph = CompactGraph(
+            self.osm_ids,
+            self.latitudes,
+            self.longitudes,
+            offsets,
+            targets,
+            distances,
+            speeds,
+            self.index,
+            times,
+            road_classes,
+            restrictions,
+        )
+        self.reverse_graph.reverse_graph = self
+        return self.reverse_graph
+
+    def unit_vectors(self):
+        """
+        Return the arrays (x, y, z) of the coordinates of the nodes on
+        the unit sphere, computed once.
+        """
+        if self.vectors is None and self.reverse_graph is not None:
+            self.vectors = self.reverse_graph.vectors
+        if self.vectors is None:
+            x, y, z = array("d"), array("d"), array("d")
+            for latitude, longitude in zip(self.latitudes, self.longitudes):
+                vector = utils.UnitVector(latitude, longitude)
+                x.append(vector[0])
+                y.append(vector[1])
+                z.append(vector[2])
+            self.vectors = (x, y, z)
+        return self.vectors
+
+    def times(self):
+        """
+        Return the array of the times (in hours, like
+        simpleGraph.Graph.time_way) needed to cross the edges.
+        """
+        if self.travel_times is None:
+            # graphs built before the times were stored
+            self.travel_times = array(
+                "d",
+                (
+                    edge_time(distance, speed)
+                    for distance, speed in zip(self.distances, self.speeds)
+                ),
+            )
+        return self.travel_times
+
+    def weights(self, metric="distance"):
+        """
+        Return the array of the costs of the edges for a metric (see
+        the class), computed once.
+        """
+        if metric == "distance":
+            return self.distances
+        if metric == "time":
+            return self.times()
+        weights = self.weight_arrays.get(metric)
+        if weights is None:
+            if not isinstance(metric, (int, float)) or not 0 <= metric <= 1:
+                raise ValueError("Unknown metric: %s" % (metric,))
+            # hours to meters at the default speed
+            factor = metric * DEFAULT_SPEED * 1000
+            weights = array(
+                "d",
+                (
+                    (1 - metric) * distance + factor * time
+                    for distance, time in zip(self.distances, self.times())
+                ),
+            )
+            self.weight_arrays[metric] = weights
+        return weights
+
+    def nb_nodes(self):
+        """
+        Return the number of nodes.
+        """
+        return len(self.osm_ids)
+
+    def nb_edges(self):
+        """
+        Return the number of (oriented) edges.
+        """
+        return len(self.targets)
+
+    def node_index(self, osm_id):
+        """
+        Return the dense index of an OSM node.
+        """
+        return self.index[osm_id]
+
+    def coordinates(self, i):
+        """
+        Return the (latitude, longitude) of the node i.
+        """
+        return self.latitudes[i], self.longitudes[i]
+
+    def neighbors(self, i):
+        """
+        Iterates over the (target, distance, speed) of the edges
+        leaving the node i.
+        """
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            yield self.targets[k], self.distances[k], self.speeds[k]
+
+    def forbidden_turns(self, restrictions):
+        """
+        Return the flat array of the pairs (from edge, to edge) of the
+        turns forbidden by a list of (fromnode, via, tonode, only) OSM
+        ids (see simpleGraph.Graph.addRestriction). A restriction whose
+        nodes or edges are not in the graph is ignored.
+        """
+        index = self.index
+        forbidden, allowed = set(), {}
+        for fromnode, via, tonode, only in restrictions:
+            if fromnode not in index or via not in index or tonode not in index:
+                continue
+            a = self.edge(index[fromnode], index[via])
+            b = self.edge(index[via], index[tonode])
+            if a is None or b is None:
+                continue
+            if only:
+                allowed.setdefault(a, set()).add(b)
+            else:
+                forbidden.add((a, b))
+        for a, edges in allowed.items():
+            v = self.targets[a]
+            for b in range(self.offsets[v], self.offsets[v + 1]):
+                if b not in edges:
+                    forbidden.add((a, b))
+        return array("i", [k for pair in sorted(forbidden) for k in pair])
+
+    def turn_restrictions(self):
+        """
+        Return the lookup of the forbidden turns
+        {via node index: {from edge: frozenset of the to edges}},
+        computed once.
+        """
+        if self.turns is None:
+            turns = {}
+            restrictions, targets = self.restrictions, self.targets
+            for p in range(0, len(restrictions), 2):
+                a, b = restrictions[p], restrictions[p + 1]
+                turns.setdefault(targets[a], {}).setdefault(a, set()).add(b)
+            self.turns = {
+                via: {a: frozenset(edges) for a, edges in turns_at.items()}
+                for via, turns_at in turns.items()
+            }
+        return self.turns
+
+    def edge(self, i, j):
+        """
+        Return the position of the edge i -> j in the edge arrays
+        or None.
+        """
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            if self.targets[k] == j:
+                return k
+        return None
+
+    def len_way(self, way):
+        """
+        Return the length in meter of a way (list of OSM ids).
+        """
+        index = self.index
+        return sum(
+            self.distances[self.edge(index[fromnode], index[tonode])]
+            for fromnode, tonode in zip(way, way[1:])
+        )
+
+    def time_way(self, way):
+        """
+        Return the time in hours needed to follow a way (list of OSM ids).
+        """
+        index, times = self.index, self.times()
+        return sum(
+            times[self.edge(index[fromnode], index[tonode])]
+            for fromnode, tonode in zip(way, way[1:])
+        )
+
+    def __len__(self):
+        return len(self.osm_ids)
+
+    def __repr__(self):
+        return "<CompactGraph nodes=%s edges=%s>" % (self.nb_nodes(), self.nb_edges())
+
+
+def way_segments(graph_info, ways, jobs=1):
+    """
+    Return the list of the (fromnode, tonode, way) of the consecutive
+    nodes of the ways and the NumPy array of their lengths in meters,
+    computed in one vectorized pass (sharded across jobs processes).
+    Like in Graph.create_graph_structure, a way is cut at its first
+    node missing from graph_info.
+    """
+    node_ids, latitudes, longitudes = build.node_arrays(graph_info)
+    fromnodes, tonodes, way_indices, lengths = build.segments(
+        node_ids, latitudes, longitudes, [way.refs for way in ways], jobs
+    )
+    osm_ids = node_ids.tolist()
+    segments = [
+        (osm_ids[fromnode], osm_ids[tonode], ways[way])
+        for fromnode, tonode, way in zip(
+            fromnodes.tolist(), tonodes.tolist(), way_indices.tolist()
+        )
+    ]
+    return segments, lengths
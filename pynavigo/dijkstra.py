@@ -1,12 +1,18 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import heapq
+
 from .priodict import priorityDictionary
+from .compactgraph import CompactGraph
 
 
 class Dijkstra(object):
     """
     Implementation of Dijkstra.
+
+    G is either a graph structure (dictionary of dictionaries of
+    edges) or a CompactGraph.
     """
 
     def __init__(self, G, start, end=None):
@@ -14,6 +20,9 @@ class Dijkstra(object):
         self.P = {}  # dictionary of predecessors
         self.Q = priorityDictionary()  # est.dist. of non-final vert.
         self.start = start
+        if isinstance(G, CompactGraph):
+            self.compact_search(G, start, end)
+            return
         self.Q[start] = 0
 
         for v in self.Q:
@@ -34,6 +43,30 @@ class Dijkstra(object):
                     self.Q[w] = vwLength
                     self.P[w] = v
 
+    def compact_search(self, G, start, end=None):
+        """
+        Search on the arrays of a CompactGraph. The distances and the
+        predecessors are stored by OSM id.
+        """
+        osm_ids, index = G.osm_ids, G.index
+        offsets, targets, distances = G.offsets, G.targets, G.distances
+        self.Q[start] = 0
+
+        for v in self.Q:
+            self.D[v] = self.Q[v]
+            if v == end:
+                break
+
+            i = index[v]
+            for k in range(offsets[i], offsets[i + 1]):
+                w = osm_ids[targets[k]]
+                vwLength = self.D[v] + distances[k]
+                if w in self.D:
+                    continue
+                elif w not in self.Q or vwLength < self.Q[w]:
+                    self.Q[w] = vwLength
+                    self.P[w] = v
+
     def get(self, end):
         try:
             Path = []
@@ -48,3 +81,77 @@ class Dijkstra(object):
         except Exception as e:
             # print(e)
             return ([], 0)
+
+
+class BidirectionalDijkstra(object):
+    """
+    Bidirectional implementation of Dijkstra for point-to-point queries.
+
+    A forward search from start on G and a backward search from the
+    destination on RG (the reverse graph structure, see
+    simpleGraph.Graph.reverse_structure) are run alternately until the
+    sum of the smallest tentative distances of the two queues is not
+    smaller than the best path found.
+    Edges with an infinite cost (reverse direction of one way streets)
+    are never traversed.
+    """
+
+    def __init__(self, G, RG, start):
+        self.G = G
+        self.RG = RG
+        self.start = start
+        self.nb_settled = 0
+
+    def get(self, end):
+        """
+        Return the shortest path from start to end and its cost, or
+        ([], 0) if end can not be reached.
+        """
+        if self.start not in self.G or end not in self.RG:
+            return ([], 0)
+        if end == self.start:
+            return ([end], 0)
+
+        D = ({self.start: 0}, {end: 0})  # tentative distances
+        P = ({self.start: None}, {end: None})  # predecessors / successors
+        S = (set(), set())  # final vertices
+        Q = ([(0, self.start)], [(0, end)])
+        graphs = (self.G, self.RG)
+        best, meeting = float("inf"), None
+
+        while Q[0] and Q[1]:
+            if Q[0][0][0] + Q[1][0][0] >= best:
+                break
+            # expand the direction with the smallest queue
+            direction = 0 if len(Q[0]) <= len(Q[1]) else 1
+            dist, v = heapq.heappop(Q[direction])
+            if v in S[direction]:
+                continue
+            S[direction].add(v)
+            self.nb_settled += 1
+            other = 1 - direction
+            for w, edge in graphs[direction][v].items():
+                if edge.distance < 0 or edge.distance == float("inf"):
+                    continue
+                vwLength = dist + edge.distance
+                if w not in D[direction] or vwLength < D[direction][w]:
+                    D[direction][w] = vwLength
+                    P[direction][w] = v
+                    heapq.heappush(Q[direction], (vwLength, w))
+                if w in D[other] and vwLength + D[other][w] < best:
+                    best = vwLength + D[other][w]
+                    meeting = w
+
+        if meeting is None:
+            return ([], 0)
+        Path = []
+        node = meeting
+        while node is not None:
+            Path.append(node)
+            node = P[0][node]
+        Path.reverse()
+        node = P[1][meeting]
+        while node is not None:
+            Path.append(node)
+            node = P[1][node]
+        return (Path, best)
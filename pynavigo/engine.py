@@ -0,0 +1,357 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import threading
+from array import array
+from heapq import heappush, heappop
+
+from .snapping import SnappedLocation
+
+INFINITY = float("inf")
+
+
+class Scratch(object):
+    """
+    Search buffers of one thread, reused from one query to the next.
+
+    A value of dist or pred is only meaningful if the stamp of the node
+    is equal to the current generation, and a node is settled if its
+    settled stamp is equal to the current generation. Starting a new
+    query only increments the generation, the lists are never cleared.
+    """
+
+    def __init__(self, nb_nodes):
+        self.dist = [INFINITY] * nb_nodes
+        self.pred = [-1] * nb_nodes
+        self.stamp = [0] * nb_nodes
+        self.settled = [0] * nb_nodes
+        self.generation = 0
+
+    def next_generation(self):
+        """
+        Invalidates the previous query.
+        """
+        self.generation += 1
+        return self.generation
+
+
+class SearchResult(object):
+    """
+    Shortest path tree of a query, backed by the scratch buffers of
+    the thread which ran it. The result is only valid until the next
+    query of the same thread.
+    """
+
+    def __init__(self, graph, scratch, source):
+        self.graph = graph
+        self.scratch = scratch
+        self.source = source
+        self.generation = scratch.generation
+
+    def check(self):
+        if self.scratch.generation != self.generation:
+            raise RuntimeError("Search result invalidated by a more recent query.")
+
+    def settled(self, i):
+        """
+        Return True if the final cost of the node i is known.
+        """
+        self.check()
+        return self.scratch.settled[i] == self.generation
+
+    def cost_index(self, i):
+        """
+        Return the cost from the source to the node i or None.
+        """
+        if not self.settled(i):
+            return None
+        return self.scratch.dist[i]
+
+    def path_indices(self, i):
+        """
+        Return the path (node indices) from the source to the node i.
+        """
+        if not self.settled(i):
+            return []
+        pred = self.scratch.pred
+        path = []
+        while i != -1:
+            path.append(i)
+            i = pred[i]
+        path.reverse()
+        return path
+
+    def cost(self, end):
+        """
+        Return the cost from the source to the OSM node end or None.
+        """
+        i = self.graph.index.get(end)
+        if i is None:
+            return None
+        return self.cost_index(i)
+
+    def get(self, end):
+        """
+        Return the shortest path (OSM ids) to the node end and its cost,
+        like dijkstra.Dijkstra.get.
+        """
+        i = self.graph.index.get(end)
+        if i is None or not self.settled(i):
+            return ([], 0)
+        osm_ids = self.graph.osm_ids
+        return (
+            [osm_ids[j] for j in self.path_indices(i)],
+            self.scratch.dist[i],
+        )
+
+    def tree(self):
+        """
+        Return a copy of the shortest path tree (ShortestPathTree) which
+        stays valid after the next queries.
+        """
+        self.check()
+        generation, scratch = self.generation, self.scratch
+        settled = scratch.settled
+        nb_nodes = self.graph.nb_nodes()
+        dist = array("d", [INFINITY]) * nb_nodes
+        pred = array("i", [-1]) * nb_nodes
+        for i in range(nb_nodes):
+            if settled[i] == generation:
+                dist[i] = scratch.dist[i]
+                pred[i] = scratch.pred[i]
+        return ShortestPathTree(self.graph, self.source, dist, pred)
+
+
+class ShortestPathTree(object):
+    """
+    Shortest path tree kept after its query: cost (INFINITY if the node
+    was not settled) and predecessor of each node index.
+    """
+
+    def __init__(self, graph, source, dist, pred):
+        self.graph = graph
+        self.source = source
+        self.dist = dist
+        self.pred = pred
+
+    def get(self, end):
+        """
+        Return the shortest path (OSM ids) to the node end and its cost,
+        like SearchResult.get.
+        """
+        i = self.graph.index.get(end)
+        if i is None or self.dist[i] == INFINITY:
+            return ([], 0)
+        cost, osm_ids, pred = self.dist[i], self.graph.osm_ids, self.pred
+        path = []
+        while i != -1:
+            path.append(osm_ids[i])
+            i = pred[i]
+        path.reverse()
+        return (path, cost)
+
+
+class DijkstraEngine(object):
+    """
+    Dijkstra on a CompactGraph with a binary heap (heapq) and lazy
+    deletion: a node can be pushed several times and the outdated
+    entries are skipped when they are popped.
+
+    The search stops as soon as all the targets are settled.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.local = threading.local()
+
+    def scratch(self, name="scratch"):
+        """
+        Return the search buffers of the current thread.
+        """
+        scratch = getattr(self.local, name, None)
+        if scratch is None:
+            scratch = Scratch(self.graph.nb_nodes())
+            setattr(self.local, name, scratch)
+        return scratch
+
+    def seeds(self, location, snapped_costs, metric="distance"):
+        """
+        Return the list of (node index, initial cost) of a search from
+        (or to) an OSM id or a snapping.SnappedLocation, whose method
+        snapped_costs gives the entry nodes of the segment.
+        """
+        if isinstance(location, SnappedLocation):
+            return snapped_costs(location, metric)
+        if location not in self.graph.index:
+            return []
+        return [(self.graph.index[location], 0.0)]
+
+    def query(self, source, targets=None, metric="distance"):
+        """
+        Shortest paths from the OSM node (or SnappedLocation) source to
+        one (OSM id) or many (iterable of OSM ids) targets. With no target,
+        the whole graph reachable from source is settled. The cost of
+        the edges depends on the metric (see CompactGraph.weights).
+        Return a SearchResult.
+        """
+        index = self.graph.index
+        if targets is None:
+            target_indices = None
+        elif isinstance(targets, (list, tuple, set, frozenset)):
+            target_indices = [index[target] for target in targets if target in index]
+        else:
+            target_indices = [index[targets]] if targets in index else []
+        return self.query_indices(
+            self.seeds(source, SnappedLocation.sources, metric), target_indices, metric
+        )
+
+    def query_indices(self, source, targets=None, metric="distance"):
+        """
+        Same as query with node indices. source is a node index or a
+        list of (node index, initial cost).
+        """
+        scratch = self.scratch()
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = (
+            self.graph.offsets,
+            self.graph.targets,
+            self.graph.weights(metric),
+        )
+
+        if targets is None:
+            remaining = -1
+            is_target = ()
+        else:
+            is_target = set(targets)
+            remaining = len(is_target)
+
+        if isinstance(source, int):
+            source = [(source, 0.0)]
+        heap = []
+        for node, cost in source:
+            if stamp[node] != generation or cost < dist[node]:
+                dist[node] = cost
+                pred[node] = -1
+                stamp[node] = generation
+                heappush(heap, (cost, node))
+        while heap and remaining:
+            d, v = heappop(heap)
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            if v in is_target:
+                remaining -= 1
+                if not remaining:
+                    break
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd, w))
+        return SearchResult(self.graph, scratch, source)
+
+    def route(self, source, target, metric="distance"):
+        """
+        Bidirectional point-to-point query between two OSM nodes (or
+        SnappedLocation): a forward search on the graph and a backward
+        search on the reversed graph, until the sum of the two smallest
+        keys exceeds the best path found. Return (path, cost) like
+        dijkstra.Dijkstra.get. For a SnappedLocation, the path starts or
+        ends with a node of its segment and the cost includes the part
+        of the segment. When the shortest route stays on the segment of
+        both locations, the path is empty and only the cost is returned.
+        """
+        sources = self.seeds(source, SnappedLocation.sources, metric)
+        targets = self.seeds(target, SnappedLocation.targets, metric)
+        if not sources or not targets:
+            return ([], 0)
+        best, meeting = INFINITY, -1
+        direct = None
+        if isinstance(source, SnappedLocation) and isinstance(target, SnappedLocation):
+            direct = source.direct_cost(target, metric)
+            if direct is not None:
+                best = direct
+
+        forward = self.scratch("forward")
+        backward = self.scratch("backward")
+        generations = (forward.next_generation(), backward.next_generation())
+        graphs = (self.graph, self.graph.reverse())
+        weights = tuple(graph.weights(metric) for graph in graphs)
+        scratches = (forward, backward)
+        heaps = ([], [])
+        for scratch, seeds, generation, heap in zip(
+            scratches, (sources, targets), generations, heaps
+        ):
+            for node, cost in seeds:
+                if scratch.stamp[node] != generation or cost < scratch.dist[node]:
+                    scratch.dist[node] = cost
+                    scratch.pred[node] = -1
+                    scratch.stamp[node] = generation
+                    heappush(heap, (cost, node))
+        for node, cost in sources:
+            if backward.stamp[node] == generations[1]:
+                if forward.dist[node] + backward.dist[node] < best:
+                    best = forward.dist[node] + backward.dist[node]
+                    meeting = node
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            direction = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            heap = heaps[direction]
+            d, v = heappop(heap)
+            scratch = scratches[direction]
+            generation = generations[direction]
+            if scratch.settled[v] == generation:
+                continue
+            scratch.settled[v] = generation
+            dist, pred, stamp = scratch.dist, scratch.pred, scratch.stamp
+            other = scratches[1 - direction]
+            other_dist, other_stamp = other.dist, other.stamp
+            other_generation = generations[1 - direction]
+            graph = graphs[direction]
+            offsets, heads, weight = graph.offsets, graph.targets, weights[direction]
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weight[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd, w))
+                if other_stamp[w] == other_generation and nd + other_dist[w] < best:
+                    best = nd + other_dist[w]
+                    meeting = w
+
+        if meeting == -1:
+            if direct is not None:
+                return ([], direct)
+            return ([], 0)
+        osm_ids = self.graph.osm_ids
+        path = []
+        i = meeting
+        while i != -1:
+            path.append(osm_ids[i])
+            i = forward.pred[i]
+        path.reverse()
+        i = backward.pred[meeting]
+        while i != -1:
+            path.append(osm_ids[i])
+            i = backward.pred[i]
+        return (path, best)
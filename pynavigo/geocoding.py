@@ -0,0 +1,323 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import re
+import json
+import time
+import pickle
+import logging
+import sqlite3
+import threading
+import unicodedata
+import http.client
+import urllib.request, urllib.parse, urllib.error
+
+from .osmreader import OSMReader
+
+GOOGLE_URL = "http://maps.google.com/maps/api/geocode/json"
+
+# seconds before a backend request is abandoned
+TIMEOUT = 5
+
+# seconds before an address which was not found is requested again
+NEGATIVE_TTL = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodingError(Exception):
+    """
+    The backend could not answer (network error, timeout, quota).
+    The address is not cached.
+    """
+
+
+def normalize(address):
+    """
+    Return the form of an address used as key: lower case, no accents,
+    no punctuation and single spaces.
+
+    >>> normalize(" 17, Chemin sous les Vignes -  Montenach ")
+    '17 chemin sous les vignes montenach'
+    """
+    address = unicodedata.normalize("NFKD", address)
+    address = "".join(char for char in address if not unicodedata.combining(char))
+    return " ".join(re.split(r"[\W_]+", address.lower())).strip()
+
+
+class Backend(object):
+    """
+    Interface of the geocoding backends.
+    """
+
+    def geocode(self, address, timeout=TIMEOUT):
+        """
+        Return the coordinates {"lat": ..., "lng": ...} of an address,
+        None if the address is unknown. Raise GeocodingError if the
+        backend can not answer.
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(Backend):
+    """
+    Google Maps geocoding API (or a server answering in the same
+    format at url).
+    """
+
+    def __init__(self, url=GOOGLE_URL, key=None):
+        self.url = url
+        self.key = key
+
+    def geocode(self, address, timeout=TIMEOUT):
+        parameters = {"address": address, "sensor": "false"}
+        if self.key is not None:
+            parameters["key"] = self.key
+        url = self.url + "?" + urllib.parse.urlencode(parameters)
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                result = json.loads(response.read().decode("utf-8"))
+        # network errors and timeouts are OSError, invalid JSON ValueError
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise GeocodingError(str(e))
+        try:
+            status = result.get("status")
+            if status == "ZERO_RESULTS":
+                return None
+            if status != "OK":
+                raise GeocodingError("Geocoding status: %s" % status)
+            location = result["results"][0]["geometry"]["location"]
+            return {"lat": float(location["lat"]), "lng": float(location["lng"])}
+        except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+            raise GeocodingError("Malformed geocoding answer: %r" % e)
+
+
+def has_address(tags):
+    """
+    Return True if the tags of an element give an address.
+    """
+    return "addr:street" in tags or "addr:place" in tags
+
+
+class Gazetteer(Backend):
+    """
+    Offline backend: the addresses (addr:* tags) of the nodes and of
+    the ways (centroid of their nodes) of an OSM file. An address can
+    be given with or without its house number, postcode and city.
+    """
+
+    def __init__(self):
+        self.addresses = {}
+        # coordinates of the nodes of the ways with an address
+        self.coordinates = {}
+
+    @classmethod
+    def from_osm(cls, path):
+        """
+        Reads the addresses of an OSM file.
+        """
+        gazetteer = cls()
+        reader = OSMReader(
+            coords_callback=gazetteer.coords,
+            nodes_callback=gazetteer.nodes,
+            ways_callback=gazetteer.ways,
+            way_filter=has_address,
+        )
+        reader.parse(path)
+        gazetteer.coordinates = {}
+        return gazetteer
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as gazetteer_file:
+            gazetteer = cls()
+            gazetteer.addresses = pickle.load(gazetteer_file)
+        return gazetteer
+
+    def save(self, path):
+        with open(path, "wb") as gazetteer_file:
+            pickle.dump(self.addresses, gazetteer_file)
+
+    def coords(self, coords):
+        """
+        Callback method for the coordinates of the nodes of the ways.
+        """
+        for osm_id, longitude, latitude in coords:
+            self.coordinates[osm_id] = (latitude, longitude)
+
+    def nodes(self, nodes):
+        """
+        Callback method for the tagged nodes.
+        """
+        for osm_id, tags, (longitude, latitude) in nodes:
+            if has_address(tags):
+                self.add(tags, latitude, longitude)
+
+    def ways(self, ways):
+        """
+        Callback method for the ways with an address.
+        """
+        for osm_id, tags, refs in ways:
+            points = [self.coordinates[ref] for ref in refs if ref in self.coordinates]
+            if points:
+                self.add(
+                    tags,
+                    sum(point[0] for point in points) / len(points),
+                    sum(point[1] for point in points) / len(points),
+                )
+
+    def add(self, tags, latitude, longitude):
+        """
+        Adds the forms of an address. The first element found keeps
+        a form shared by several elements (a street without number).
+        """
+        street = tags.get("addr:street") or tags.get("addr:place")
+        number = tags.get("addr:housenumber")
+        places = [""]
+        for place in (tags.get("addr:city"), tags.get("addr:postcode")):
+            if place:
+                places.append(place)
+        if tags.get("addr:postcode") and tags.get("addr:city"):
+            places.append(tags["addr:postcode"] + " " + tags["addr:city"])
+        streets = [street]
+        if number:
+            streets = [number + " " + street, street + " " + number, street]
+        for street in streets:
+            for place in places:
+                self.addresses.setdefault(
+                    normalize(street + " " + place), (latitude, longitude)
+                )
+
+    def geocode(self, address, timeout=TIMEOUT):
+        location = self.addresses.get(normalize(address))
+        if location is None:
+            return None
+        return {"lat": location[0], "lng": location[1]}
+
+    def __len__(self):
+        return len(self.addresses)
+
+
+class GeocodingCache(object):
+    """
+    Persistent cache (SQLite) of the geocoded addresses, keyed on their
+    normalized form. An address which was not found is stored without
+    coordinates and requested again after negative_ttl seconds.
+    """
+
+    def __init__(self, path, negative_ttl=NEGATIVE_TTL):
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS geocoding ("
+                "address TEXT PRIMARY KEY, latitude REAL, longitude REAL, "
+                "time REAL)"
+            )
+
+    def get(self, address):
+        """
+        Return (True, location) for a cached address, location being
+        None if it was not found, or (False, None).
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT latitude, longitude, time FROM geocoding WHERE address = ?",
+                (address,),
+            ).fetchone()
+        if row is None:
+            return False, None
+        latitude, longitude, timestamp = row
+        if latitude is None:
+            if time.time() - timestamp > self.negative_ttl:
+                return False, None
+            return True, None
+        return True, {"lat": latitude, "lng": longitude}
+
+    def put(self, address, location):
+        latitude, longitude = (
+            (None, None)
+            if location is None
+            else (
+                location["lat"],
+                location["lng"],
+            )
+        )
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO geocoding VALUES (?, ?, ?, ?)",
+                (address, latitude, longitude, time.time()),
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+class Geocoder(object):
+    """
+    Translates addresses to coordinates with the first backend which
+    knows them. The answers, including the unknown addresses, are
+    cached; the failures of the backends are not.
+    """
+
+    def __init__(self, backends, cache=None, timeout=TIMEOUT):
+        self.backends = backends
+        self.cache = cache
+        self.timeout = timeout
+
+    def geocode(self, address, timeout=None):
+        """
+        Return the coordinates {"lat": ..., "lng": ...} of an address
+        or None. timeout (seconds) bounds the request to each backend,
+        self.timeout by default.
+        """
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        key = normalize(address)
+        if not key:
+            return None
+        if self.cache is not None:
+            cached, location = self.cache.get(key)
+            if cached:
+                return location
+        location, failed = None, False
+        for backend in self.backends:
+            try:
+                location = backend.geocode(address, timeout)
+            except GeocodingError as e:
+                logger.warning("Geocoding of %r failed: %s", address, e)
+                failed = True
+                continue
+            if location is not None:
+                break
+        if self.cache is not None and (location is not None or not failed):
+            self.cache.put(key, location)
+        return location
+
+
+if __name__ == "__main__":
+    # Point of entry in execution mode: geocodes addresses with the
+    # gazetteer of an OSM file.
+    # python -m pynavigo.geocoding <file.osm> "<address>" ...
+    import sys
+
+    if len(sys.argv) < 3:
+        print('Usage: python -m pynavigo.geocoding <file.osm> "<address>" ...')
+        sys.exit(1)
+    start = time.time()
+    gazetteer = Gazetteer.from_osm(sys.argv[1])
+    print(
+        "%d forms of addresses read in %.2f seconds"
+        % (len(gazetteer), time.time() - start)
+    )
+    geocoder = Geocoder([gazetteer], cache=GeocodingCache(":memory:"))
+    for address in sys.argv[2:]:
+        print((address, geocoder.geocode(address)))
@@ -10,16 +10,38 @@ __license__ = ""
 
 import os
 import time
+import functools
 import pickle
 import random
 import configparser
 import threading
 
-from . import dijkstra
+from . import alternatives
+from . import ch
+from . import build
+from . import engine
+from . import geocoding
+from . import isochrone
+from . import landmarks
+from . import matrix
+from . import overgraph
+from . import routecache
+from . import simplify
+from . import snapping
+from . import snapshot
 from . import simpleGraph
+from . import timedependent
+from . import turns
 from . import OSM2SimpleGraph
+from .osmreader import OSMReader
 
-from imposm.parser import OSMParser
+# engines of a GraphLoader created on their first use
+LAZY_ENGINES = (
+    "matrix_engine",
+    "isochrone_engine",
+    "alternatives_engine",
+    "td_engine",
+)
 
 
 class GraphLoader(object):
@@ -27,12 +49,34 @@ class GraphLoader(object):
     Generates or loads the graph and over-graph.
     """
 
-    def __init__(self, osm_file, clients_file=None, serialize=True):
+    def __init__(
+        self,
+        osm_file,
+        clients_file=None,
+        serialize=True,
+        nb_landmarks=16,
+        jobs=None,
+        data_dir=None,
+    ):
         self.nb_cores = os.sysconf("SC_NPROCESSORS_ONLN")
+        # number of processes used to build the graph
+        self.jobs = jobs or self.nb_cores
         self.serialize = serialize
         self.osm_file = osm_file
         self.clients_file = clients_file
-        self.dump_over_graph = os.path.splitext(osm_file)[0] + "_over-graph.dump"
+        self.nb_landmarks = nb_landmarks
+        # the files generated from the map are written in data_dir
+        # (next to the map by default)
+        self.data_dir = data_dir or os.path.dirname(osm_file)
+        if data_dir and serialize:
+            os.makedirs(data_dir, exist_ok=True)
+        name = os.path.join(self.data_dir, os.path.basename(osm_file))
+        self.dump_graph = os.path.normpath(name + ".dump")
+        self.dump_over_graph = os.path.splitext(name)[0] + "_over-graph.dump"
+        self.dump_landmarks = os.path.normpath(name + ".landmarks")
+        self.dump_hierarchy = os.path.normpath(name + ".ch")
+        self.dump_snapshot = os.path.normpath(name + ".snapshot")
+        self.dump_gazetteer = os.path.normpath(name + ".gazetteer")
 
     def load_graph(self):
         """
@@ -41,9 +85,11 @@ class GraphLoader(object):
         """
         self.graph = None
         try:
-            dump_graph = open(os.path.normpath(self.osm_file + ".dump"), "r")
-            print(("Loading serialized graph from:", self.osm_file + ".dump"))
-            self.graph = pickle.load(dump_graph)
+            dump_file = self.graph_dump()
+            dump_graph = open(dump_file, "rb")
+            print(("Loading serialized graph from:", dump_file))
+            # dumps written by Python 2 contain byte strings
+            self.graph = pickle.load(dump_graph, encoding="latin1")
             dump_graph.close()
         except:
             self.graph = simpleGraph.Graph()
@@ -52,29 +98,317 @@ class GraphLoader(object):
 
             print(("Generation of the graph for", self.osm_file))
             print("Creating nodes...")
-            p = OSMParser(
-                concurrency=self.nb_cores,
+            # two passes: only the nodes of the roads are kept
+            p = OSMReader(
                 coords_callback=simple_graph.coords,
                 ways_callback=simple_graph.ways,
+                relations_callback=simple_graph.relations,
+                way_filter=OSM2SimpleGraph.is_road,
             )
             start_user = time.time()
-            p.parse(self.osm_file)
+            with build.stage("Parsing"):
+                p.parse(self.osm_file)
+            print(
+                (
+                    simple_graph.add_restrictions(),
+                    "turn restriction(s),",
+                    simple_graph.nb_ignored_restrictions,
+                    "ignored.",
+                )
+            )
             print("Creating structures (relations between nodes and distance)...")
-            self.graph.create_graph_structure()
+            with build.stage("Edges (%d jobs)" % self.jobs):
+                self.graph.create_graph_structure(jobs=self.jobs)
             print("Removing isolated nodes...")
             # nb_isolated_nodes = graph.remove_isolated_nodes()
             # print nb_isolated_nodes, "node(s) removed."
             print("Trying to remove islands...")
-            self.graph.remove_islands()
+            with build.stage("Islands"):
+                # nodes which can be entered but not left are removed too
+                statistics = self.graph.remove_islands(strong=True)
+            print(
+                (
+                    statistics["components"],
+                    "component(s),",
+                    statistics["removed"],
+                    "node(s) removed, biggest:",
+                    statistics["largest"],
+                )
+            )
             end_user = time.time()
             print("Generation done.")
             print(("User time:", end_user - start_user, "seconds."))
-            print(("Serializing graph to", self.osm_file + ".dump"))
-            dump_graph = open(os.path.normpath(self.osm_file + ".dump"), "w")
+            print(("Serializing graph to", self.dump_graph))
+            dump_graph = open(self.dump_graph, "wb")
             pickle.dump(self.graph, dump_graph)
             dump_graph.close()
+        with build.stage("Spatial index"):
+            self.graph.build_spatial_index()
+        # The queries are done on the compact form of the graph.
+        with build.stage("Compaction"):
+            self.prepare_queries(self.graph.compact())
+        if self.serialize:
+            print(("Writing snapshot of the graph to", self.dump_snapshot))
+            snapshot.save(self.compact_graph, self.dump_snapshot, self.source_file())
         return self.graph
 
+    def graph_dump(self):
+        """
+        Return the path of the serialized graph: in data_dir, or next to
+        the OSM file if only the map comes with one.
+        """
+        shipped = os.path.normpath(self.osm_file + ".dump")
+        if not os.path.exists(self.dump_graph) and os.path.exists(shipped):
+            return shipped
+        return self.dump_graph
+
+    def source_file(self):
+        """
+        Return the file the graph is built from: its serialized form if
+        there is one, otherwise the OSM file (None if none exists).
+        """
+        for path in (self.graph_dump(), self.osm_file):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load_snapshot(self):
+        """
+        Load the compact graph from its snapshot file (memory-mapped,
+        shared between the processes), or from the graph if there is
+        no snapshot yet or if it is out of date (built from another
+        state of the source file, or of an older version). The
+        dictionaries of the graph are not loaded.
+        """
+        try:
+            compact_graph = snapshot.load(self.dump_snapshot, self.source_file())
+            print(("Mapping graph snapshot from:", self.dump_snapshot))
+        except (IOError, ValueError) as e:
+            print(("Snapshot not used:", e))
+            self.load_graph()
+            return self.compact_graph
+        self.prepare_queries(compact_graph)
+        return self.compact_graph
+
+    def prepare_queries(self, compact_graph):
+        """
+        Creates the structures used by the queries on the compact graph.
+        The engines of the other queries are created when they are first
+        used (see LAZY_ENGINES).
+        """
+        self.compact_graph = compact_graph
+        if len(compact_graph.restrictions):
+            # the routes honour the turn restrictions
+            self.engine = turns.TurnEngine(self.compact_graph)
+            self.simplified_graph = None
+        else:
+            self.engine = engine.DijkstraEngine(self.compact_graph)
+            # the routes of the cache are computed without the chains
+            self.simplified_graph = simplify.SimplifiedGraph.from_graph(
+                self.compact_graph
+            )
+        self.segment_index = snapping.SegmentIndex(self.compact_graph)
+        for name in LAZY_ENGINES:
+            self.__dict__.pop(name, None)
+        # the routes of the previous graph are no longer valid
+        if getattr(self, "route_cache", None) is not None:
+            self.route_cache.clear()
+        self.route_cache = routecache.RouteCache(
+            self.engine, simplified=self.simplified_graph
+        )
+
+    @functools.cached_property
+    def matrix_engine(self):
+        """
+        Distance matrices of the over-graph.
+        """
+        return matrix.MatrixEngine(self.compact_graph)
+
+    @functools.cached_property
+    def isochrone_engine(self):
+        """
+        Isochrones and service areas.
+        """
+        return isochrone.IsochroneEngine(self.compact_graph)
+
+    @functools.cached_property
+    def alternatives_engine(self):
+        """
+        Alternative routes.
+        """
+        return alternatives.AlternativesEngine(self.compact_graph)
+
+    @functools.cached_property
+    def td_engine(self):
+        """
+        Time-dependent routes (reads the speed profiles).
+        """
+        return timedependent.TimeDependentEngine(self.compact_graph)
+
+    def load_landmarks(self):
+        """
+        Load the landmarks used by the ALT router from a serialized
+        file next to the graph dump, or select them and compute their
+        distances (farthest-point selection). The file is used if it
+        was computed for the same graph (digest) and the same number of
+        landmarks, even if fewer of them could be selected.
+        """
+        self.landmarks = None
+        try:
+            self.landmarks = landmarks.Landmarks.load(
+                self.dump_landmarks, self.compact_graph
+            )
+            if self.landmarks.requested != self.nb_landmarks:
+                raise ValueError("Different number of landmarks.")
+            print(("Loading serialized landmarks from:", self.dump_landmarks))
+        except (IOError, ValueError):
+            print(("Preprocessing of", self.nb_landmarks, "landmarks..."))
+            start_user = time.time()
+            self.landmarks = landmarks.Landmarks.compute(
+                self.compact_graph, self.nb_landmarks
+            )
+            end_user = time.time()
+            print(("Preprocessing time:", end_user - start_user, "seconds."))
+            if self.serialize:
+                print(("Serializing landmarks to", self.dump_landmarks))
+                self.landmarks.save(self.dump_landmarks)
+        self.alt = landmarks.ALT(self.compact_graph, self.landmarks)
+        return self.landmarks
+
+    def load_hierarchy(self):
+        """
+        Load the contraction hierarchy of the graph from a serialized
+        file next to the graph dump, or build it.
+        """
+        self.hierarchy = None
+        try:
+            self.hierarchy = ch.ContractionHierarchy.load(
+                self.dump_hierarchy, self.compact_graph
+            )
+            print(
+                ("Loading serialized contraction hierarchy from:", self.dump_hierarchy)
+            )
+        except (IOError, ValueError):
+            print("Contraction of the graph...")
+            start_user = time.time()
+            self.hierarchy = ch.ContractionHierarchy.build(self.compact_graph)
+            end_user = time.time()
+            print(("Preprocessing time:", end_user - start_user, "seconds."))
+            if self.serialize:
+                print(("Serializing contraction hierarchy to", self.dump_hierarchy))
+                self.hierarchy.save(self.dump_hierarchy)
+        return self.hierarchy
+
+    def load_gazetteer(self):
+        """
+        Load the addresses of the map (offline geocoding backend) from
+        a serialized file next to the graph dump, or read them from the
+        OSM file. The gazetteer is empty if the OSM file is missing.
+        """
+        try:
+            self.gazetteer = geocoding.Gazetteer.load(self.dump_gazetteer)
+            print(("Loading serialized gazetteer from:", self.dump_gazetteer))
+        except (IOError, EOFError, pickle.UnpicklingError):
+            self.gazetteer = geocoding.Gazetteer()
+            try:
+                with build.stage("Gazetteer"):
+                    self.gazetteer = geocoding.Gazetteer.from_osm(self.osm_file)
+            except IOError as e:
+                print(("No gazetteer:", e))
+            if self.serialize and len(self.gazetteer):
+                print(("Serializing gazetteer to", self.dump_gazetteer))
+                self.gazetteer.save(self.dump_gazetteer)
+        return self.gazetteer
+
+    def load_clients(self, clients_file=None):
+        """
+        Read the clients configuration (a file, or the content of the
+        configuration itself when the Web service calls with serialize
+        set to False). Return its content and the list of the clients
+        (OSM node, latitude and longitude of the departure and of the
+        destination).
+        """
+        if clients_file is None:
+            clients_file = self.clients_file
+        if self.serialize:
+            with open(clients_file) as config_file:
+                content = config_file.read()
+        else:
+            # When this method is called via the Web service.
+            content = clients_file
+        clients = []
+        config = configparser.RawConfigParser()
+        config.read_string(content)
+
+        # Get the list of client sections available in the config file.
+        clients_sections = [section for section in config.sections()]
+        # Creation of clients
+        for client_section in clients_sections:
+            print(("\t- " + client_section))
+            try:
+                client_depart_original = config.get(client_section, "depart")
+                client_destination_original = config.get(client_section, "destination")
+            except configparser.NoOptionError:
+                continue
+            try:
+                client_depart_latitude_original = float(
+                    client_depart_original.split(" ")[0]
+                )
+                client_depart_longitude_original = float(
+                    client_depart_original.split(" ")[1]
+                )
+                client_destination_latitude_original = float(
+                    client_destination_original.split(" ")[0]
+                )
+                client_destination_longitude_original = float(
+                    client_destination_original.split(" ")[1]
+                )
+            except (ValueError, IndexError):
+                continue
+
+            departure = self.closest_node(
+                client_depart_latitude_original, client_depart_longitude_original
+            )
+            destination = self.closest_node(
+                client_destination_latitude_original,
+                client_destination_longitude_original,
+            )
+            if departure is None or destination is None:
+                continue
+            (
+                client_depart_OSM,
+                client_depart_latitude,
+                client_depart_longitude,
+            ) = departure
+            (
+                client_destination_OSM,
+                client_destination_latitude,
+                client_destination_longitude,
+            ) = destination
+            clients.append(
+                (
+                    client_depart_OSM,
+                    client_depart_latitude,
+                    client_depart_longitude,
+                    client_destination_OSM,
+                    client_destination_latitude,
+                    client_destination_longitude,
+                )
+            )
+        return content, clients
+
+    def closest_node(self, latitude, longitude):
+        """
+        Return the OSM id, the latitude and the longitude of the node
+        of the compact graph closest to a point (the closest end of its
+        segment, see snapping.SegmentIndex), or None.
+        """
+        location = self.segment_index.snap(latitude, longitude)
+        if location is None:
+            return None
+        node = location.node
+        return (node,) + self.compact_graph.coordinates(self.compact_graph.index[node])
+
     def load_over_graph(self):
         """
         Load the over-graph in memory from a
@@ -86,93 +420,55 @@ class GraphLoader(object):
         vertices is connected by a unique edge.
         If 'n' is the number of vertices, 'n(n-1) / 2' is the
         number of edges. K(5000): 1247500 edges.
+
+        The serialized over-graph is only used if it was built from
+        the same clients configuration and the same graph, otherwise it
+        is updated.
         """
-        self.over_graph = simpleGraph.Graph()
+        self.over_graph_state = None
         try:
-            dump_graph = open(self.dump_over_graph, "r")
+            dump_graph = open(self.dump_over_graph, "rb")
             print(("Loading serialized over-graph from:", self.dump_over_graph))
-            self.over_graph = pickle.load(dump_graph)
+            self.over_graph_state = pickle.load(dump_graph)
             dump_graph.close()
+            if not isinstance(self.over_graph_state, overgraph.OverGraph):
+                # over-graph serialized without its pickup points
+                self.over_graph_state = None
         except:
-            if self.clients_file == None:
+            pass
+        if self.clients_file == None:
+            if self.over_graph_state is None:
                 return None
-            print(
-                "Generation of the over-graph (complete graph based only of pickup points)..."
-            )
+            self.over_graph = self.over_graph_state.graph
+            return self.over_graph
+        return self.update_over_graph()
 
-            # Automatically place pickup points at clients depart and destination nodes.
+    def update_over_graph(self, clients_file=None):
+        """
+        Updates the over-graph after a change of the clients: only the
+        rows of the new pickup points are computed and the
+        pickup points no longer used are removed.
+        """
+        if clients_file is not None:
+            self.clients_file = clients_file
+        if getattr(self, "over_graph_state", None) is None:
+            self.over_graph_state = overgraph.OverGraph()
+        if getattr(self, "compact_graph", None) is None:
+            self.load_snapshot()
+        print(
+            "\tPreparing pickup points (based on clients departure/destination points)..."
+        )
+        content, clients = self.load_clients()
+        clients_digest = overgraph.digest(content)
+        graph_digest = landmarks.digest(self.compact_graph)
+        if (clients_digest, graph_digest) != (
+            self.over_graph_state.digest,
+            getattr(self.over_graph_state, "graph_digest", None),
+        ):
             print(
-                "\tPreparing pickup points (based on clients departure/destination points)..."
+                "Generation of the over-graph (complete graph based only of pickup points)..."
             )
-            clients = []
-            config = configparser.RawConfigParser()
-            if self.serialize:
-                config.read(self.clients_file)
-            else:
-                # When this method is called via the Web service.
-                from io import StringIO
-
-                f = StringIO(self.clients_file)
-                f.seek(0)
-                config.readfp(f)
-                del f
-
-            # Get the list of client sections available in the config file.
-            clients_sections = [section for section in config.sections()]
-            # Creation of clients
-            for client_section in clients_sections:
-                print(("\t- " + client_section))
-                try:
-                    client_depart_original = config.get(client_section, "depart")
-                    client_destination_original = config.get(
-                        client_section, "destination"
-                    )
-                except configparser.NoOptionError:
-                    continue
-                try:
-                    client_depart_latitude_original = float(
-                        client_depart_original.split(" ")[0]
-                    )
-                    client_depart_longitude_original = float(
-                        client_depart_original.split(" ")[1]
-                    )
-                    client_destination_latitude_original = float(
-                        client_destination_original.split(" ")[0]
-                    )
-                    client_destination_longitude_original = float(
-                        client_destination_original.split(" ")[1]
-                    )
-                except (ValueError, IndexError):
-                    continue
-
-                (
-                    client_depart_OSM,
-                    client_depart_latitude,
-                    client_depart_longitude,
-                ) = self.graph.osm_node_from_coordinates(
-                    client_depart_latitude_original, client_depart_longitude_original
-                )
-                (
-                    client_destination_OSM,
-                    client_destination_latitude,
-                    client_destination_longitude,
-                ) = self.graph.osm_node_from_coordinates(
-                    client_destination_latitude_original,
-                    client_destination_longitude_original,
-                )
-                clients.append(
-                    (
-                        client_depart_OSM,
-                        client_depart_latitude,
-                        client_depart_longitude,
-                        client_destination_OSM,
-                        client_destination_latitude,
-                        client_destination_longitude,
-                    )
-                )
-
             nodes = []
-            result = []
             # pickup points will be departure and destinations of clients
             for client in clients:
                 nodes.append(client[0])
@@ -181,71 +477,39 @@ class GraphLoader(object):
             # for i in range(5000):
             # node = random.choice(self.graph.graph_structure.keys())
             # nodes.append(node)
-
-            for node in nodes:
-                self.over_graph.addNode(
-                    node,
-                    self.graph.get_node(node).longitude,
-                    self.graph.get_node(node).latitude,
-                )
-                dj = dijkstra.Dijkstra(self.graph.graph_structure, node)
-                for node1 in nodes:
-                    shortest_path, distance = dj.get(node1)
-                    if shortest_path != []:
-                        average = self.graph.average_speed(shortest_path)
-                        self.over_graph.addNode(
-                            node1,
-                            self.graph.get_node(node1).longitude,
-                            self.graph.get_node(node1).latitude,
-                        )
-                        self.over_graph.addEdge(
-                            node, node1, distance + 75 * 4, average, False
-                        )
-
-            # list_threads = []
-            # for i in range(self.nb_cores + 1):
-            ## Each thread (hopefully each core) will process a part of the list of pickup points
-            # sublist =  nodes[(i*(len(nodes))/self.nb_cores):((i+1)*(len(nodes)/self.nb_cores))]
-            # thr = threading.Thread(None, self.create_new_edges, None, (sublist,))
-            # list_threads.append(thr)
-            # thr.start()
-
-            # for thread in list_threads:
-            ## Waiting for all threads to be done.
-            # thread.join()
+            added, removed = self.create_new_edges(nodes, clients_digest, graph_digest)
+            print(
+                ("\t", len(added), "pickup point(s) added,", len(removed), "removed.")
+            )
 
             if self.serialize:
                 print(("Serializing graph to", self.dump_over_graph))
-                dump_graph = open(self.dump_over_graph, "w")
-                pickle.dump(self.over_graph, dump_graph)
+                dump_graph = open(self.dump_over_graph, "wb")
+                pickle.dump(self.over_graph_state, dump_graph)
                 dump_graph.close()
 
+        self.over_graph = self.over_graph_state.graph
         return self.over_graph
 
-    def create_new_edges(self, nodes):
+    def create_new_edges(self, nodes, clients_digest=None, graph_digest=None):
         """
-        Creates new edges of the over-graph.
-        Called in a separate thread.
+        Sets the pickup points of the over-graph: the edges of the new
+        points are created and the points not in nodes are removed.
+        The searches stop when all the pickup points are settled and
+        no path is built.
         """
-        for node in nodes:
-            self.over_graph.addNode(
-                node,
-                self.graph.get_node(node).longitude,
-                self.graph.get_node(node).latitude,
-            )
-            dj = dijkstra.Dijkstra(self.graph.graph_structure, node)
-            for node1 in nodes:
-                shortest_path, distance = dj.get(node1)
-                if shortest_path != []:
-                    average = self.graph.average_speed(shortest_path)
-                    self.over_graph.addNode(
-                        node1,
-                        self.graph.get_node(node1).longitude,
-                        self.graph.get_node(node1).latitude,
-                    )
-                    self.over_graph.addEdge(
-                        node, node1, distance + 75 * 4, average, False
-                    )
+
+        def progress(done, total):
+            print(("\tDistance matrix:", done, "/", total, "rows"))
+
+        return self.over_graph_state.update(
+            nodes,
+            self.matrix_engine,
+            clients_digest,
+            self.jobs,
+            progress,
+            graph_digest,
+        )
 
 
 if __name__ == "__main__":
@@ -266,19 +530,61 @@ if __name__ == "__main__":
         dest="graph_type",
         help="Type of the graph to generate (simple or complete.",
     )
+    parser.add_option(
+        "-l",
+        "--landmarks",
+        dest="nb_landmarks",
+        type="int",
+        help="Number of landmarks to preprocess for the ALT router (0 to disable).",
+    )
+    parser.add_option(
+        "-c",
+        "--contract",
+        dest="contract",
+        action="store_true",
+        help="Build the contraction hierarchy of the graph.",
+    )
+
+    parser.add_option(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type="int",
+        help="Number of processes used to build the graph (default: number of cores).",
+    )
+
+    parser.add_option(
+        "-d",
+        "--data-dir",
+        dest="data_dir",
+        help="Directory of the generated files (default: the directory of the map).",
+    )
 
-    parser.set_defaults(graph_type="graph")
+    parser.set_defaults(graph_type="graph", nb_landmarks=0, contract=False, jobs=None)
 
     (options, args) = parser.parse_args()
 
     gl = None
     if options.osm_file != "":
-        gl = GraphLoader(options.osm_file)
+        gl = GraphLoader(
+            options.osm_file,
+            nb_landmarks=options.nb_landmarks,
+            jobs=options.jobs,
+            data_dir=options.data_dir,
+        )
         if options.graph_type == "graph":
             gl.load_graph()
+            if options.nb_landmarks:
+                gl.load_landmarks()
+            if options.contract:
+                gl.load_hierarchy()
         elif options.graph_type == "over":
             gl.load_over_graph()
         else:
             gl.load_graph()
+            if options.nb_landmarks:
+                gl.load_landmarks()
+            if options.contract:
+                gl.load_hierarchy()
             gl.load_over_graph()
             # load_over_graph(os.path.splitext(OSM_FILE)[0] + "_over-graph.dump")
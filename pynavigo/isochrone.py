@@ -0,0 +1,342 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import math
+from heapq import heappush, heappop
+
+import numpy
+
+from . import utils
+from .engine import DijkstraEngine
+from .snapping import SnappedLocation
+
+# default concavity of the polygons: a side of the hull is replaced by
+# two sides through a point if it is longer than concavity times the
+# distance of the point to its closest end (1: very concave, large:
+# close to the convex hull)
+CONCAVITY = 2.0
+
+
+class Isochrone(object):
+    """
+    Nodes reachable from one or many sources within a budget (in the
+    units of the metric: meters or hours, see CompactGraph.weights).
+
+    nodes (node indices), osm_ids and costs are numpy arrays sorted by
+    cost, origins gives the position of the source which reaches each
+    node first (the service area of each source). frontier is the
+    array of the (latitude, longitude) of the points of the edges
+    where the budget runs out, frontier_origins their source.
+    """
+
+    def __init__(
+        self,
+        graph,
+        sources,
+        budget,
+        metric,
+        nodes,
+        costs,
+        origins,
+        frontier,
+        frontier_origins,
+    ):
+        self.graph = graph
+        self.sources = sources
+        self.budget = budget
+        self.metric = metric
+        self.nodes = nodes
+        self.osm_ids = numpy.asarray(graph.osm_ids)[nodes]
+        self.costs = costs
+        self.origins = origins
+        self.frontier = frontier
+        self.frontier_origins = frontier_origins
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def area(self, origin):
+        """
+        Return the OSM ids of the nodes reached first from sources[origin].
+        """
+        return self.osm_ids[self.origins == origin]
+
+    def coordinates(self, origin=None):
+        """
+        Return the array of the (latitude, longitude) of the reached
+        nodes and of the frontier of the area (of one source).
+        """
+        nodes, frontier = self.nodes, self.frontier
+        if origin is not None:
+            nodes = nodes[self.origins == origin]
+            frontier = frontier[self.frontier_origins == origin]
+        points = numpy.column_stack(
+            (
+                numpy.asarray(self.graph.latitudes)[nodes],
+                numpy.asarray(self.graph.longitudes)[nodes],
+            )
+        )
+        return numpy.concatenate((points, frontier))
+
+    def polygon(self, concavity=CONCAVITY, origin=None):
+        """
+        Return the concave hull (list of (latitude, longitude), the
+        first point repeated at the end) of the reached area, or of the
+        service area of one source.
+        """
+        return concave_hull(self.coordinates(origin), concavity)
+
+
+class IsochroneEngine(object):
+    """
+    One-to-all Dijkstra searches on a CompactGraph stopped when the
+    smallest cost of the heap exceeds a budget: only the nodes within
+    the budget (and their edges) are scanned.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.engine = DijkstraEngine(graph)
+
+    def isochrone(self, source, budget, metric="time"):
+        """
+        Return the Isochrone of the nodes reachable from an OSM node (or
+        a SnappedLocation) within budget.
+        """
+        return self.service_areas([source], budget, metric)
+
+    def service_areas(self, sources, budget, metric="time"):
+        """
+        Return the Isochrone of the nodes reachable from any of the
+        sources (OSM nodes or SnappedLocation) within budget, each
+        node being assigned to the closest source.
+        """
+        seeds = {}
+        for position, source in enumerate(sources):
+            for node, cost in self.engine.seeds(
+                source, SnappedLocation.sources, metric
+            ):
+                if node not in seeds or cost < seeds[node][0]:
+                    seeds[node] = (cost, position)
+        return self.search(sources, seeds, budget, metric)
+
+    def search(self, sources, seeds, budget, metric):
+        """
+        Bounded search from {node index: (initial cost, source position)}.
+        """
+        graph = self.graph
+        scratch = self.engine.scratch("isochrone")
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = (
+            graph.offsets,
+            graph.targets,
+            graph.weights(metric),
+        )
+
+        heap = []
+        for node, (cost, position) in seeds.items():
+            if cost <= budget:
+                dist[node] = cost
+                # the source of a seed is stored as -1 - its position
+                pred[node] = -1 - position
+                stamp[node] = generation
+                heappush(heap, (cost, node))
+        order = []
+        while heap:
+            d, v = heappop(heap)
+            if d > budget:
+                break
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            order.append(v)
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd, w))
+
+        # the nodes are settled after their predecessor
+        origin = {}
+        for v in order:
+            p = pred[v]
+            origin[v] = -1 - p if p < 0 else origin[p]
+
+        # points of the edges leaving the area where the budget runs out
+        latitudes, longitudes = graph.latitudes, graph.longitudes
+        frontier, frontier_origins = [], []
+        for v in order:
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                if settled[w] != generation and weights[k] > 0:
+                    fraction = (budget - dist[v]) / weights[k]
+                    frontier.append(
+                        (
+                            latitudes[v] + fraction * (latitudes[w] - latitudes[v]),
+                            longitudes[v] + fraction * (longitudes[w] - longitudes[v]),
+                        )
+                    )
+                    frontier_origins.append(origin[v])
+
+        return Isochrone(
+            graph,
+            list(sources),
+            budget,
+            metric,
+            numpy.array(order, dtype=numpy.int64),
+            numpy.array([dist[v] for v in order], dtype=numpy.float64),
+            numpy.array([origin[v] for v in order], dtype=numpy.int32),
+            numpy.array(frontier, dtype=numpy.float64).reshape(-1, 2),
+            numpy.array(frontier_origins, dtype=numpy.int32),
+        )
+
+
+def convex_hull(points):
+    """
+    Return the positions of the points (array of (x, y)) on their
+    convex hull, counterclockwise (monotone chain).
+    """
+    order = numpy.lexsort((points[:, 1], points[:, 0]))
+
+    def cross(o, a, b):
+        return (points[a, 0] - points[o, 0]) * (points[b, 1] - points[o, 1]) - (
+            points[a, 1] - points[o, 1]
+        ) * (points[b, 0] - points[o, 0])
+
+    lower, upper = [], []
+    for i in order:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], i) <= 0:
+            lower.pop()
+        lower.append(i)
+    for i in order[::-1]:
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], i) <= 0:
+            upper.pop()
+        upper.append(i)
+    return lower[:-1] + upper[:-1]
+
+
+def segments_intersect(a, b, starts, ends):
+    """
+    Return the boolean array of the segments (starts[i], ends[i]) which
+    properly intersect the segment (a, b).
+    """
+
+    def orientation(p, q, r):
+        return numpy.sign(
+            (q[..., 0] - p[..., 0]) * (r[..., 1] - p[..., 1])
+            - (q[..., 1] - p[..., 1]) * (r[..., 0] - p[..., 0])
+        )
+
+    o1 = orientation(a, b, starts)
+    o2 = orientation(a, b, ends)
+    o3 = orientation(starts, ends, a)
+    o4 = orientation(starts, ends, b)
+    return (o1 * o2 < 0) & (o3 * o4 < 0)
+
+
+def concave_hull(coordinates, concavity=CONCAVITY):
+    """
+    Return the concave hull (list of (latitude, longitude), closed) of
+    an array of (latitude, longitude).
+
+    The convex hull is dug: a side (a, b) is replaced by (a, p) and
+    (p, b), p being the inner point closest to the side, if the side is
+    longer than concavity times the distance from p to the closest of
+    a and b and if the new sides do not cross the hull. The points are
+    projected on a plane (meters) around their center.
+    """
+    coordinates = numpy.unique(numpy.asarray(coordinates, dtype=numpy.float64), axis=0)
+    if len(coordinates) < 3:
+        # the ring of one point or of a segment, empty without points
+        ring = [tuple(point) for point in coordinates]
+        return ring + ring[:1]
+    latitude = float(coordinates[:, 0].mean())
+    radius = utils.CalcRad(latitude)
+    points = numpy.column_stack(
+        (
+            numpy.radians(coordinates[:, 1])
+            * radius
+            * math.cos(math.radians(latitude)),
+            numpy.radians(coordinates[:, 0]) * radius,
+        )
+    )
+
+    hull = convex_hull(points)
+    inner = numpy.ones(len(points), dtype=bool)
+    inner[hull] = False
+    # the hull is the ring of the sides (i, following[i])
+    following = numpy.full(len(points), -1, dtype=numpy.int64)
+    following[hull] = numpy.roll(hull, -1)
+    # points sorted by x, to get the candidates near a side
+    order = numpy.argsort(points[:, 0], kind="stable")
+    xs = points[order, 0]
+    pending = list(zip(hull, numpy.roll(hull, -1).tolist()))
+    while pending:
+        a, b = pending.pop()
+        if following[a] != b:
+            continue
+        pa, pb = points[a], points[b]
+        length = math.hypot(*(pb - pa))
+        if length == 0:
+            continue
+        # a point may be selected only if it is closer than length /
+        # concavity to a or b, hence to the side: the closest point to
+        # the side is in the box of the side widened by this distance
+        reach = length / concavity
+        low, high = min(pa[0], pb[0]) - reach, max(pa[0], pb[0]) + reach
+        candidates = order[
+            numpy.searchsorted(xs, low) : numpy.searchsorted(xs, high, "right")
+        ]
+        y = points[candidates, 1]
+        candidates = candidates[
+            inner[candidates]
+            & (y >= min(pa[1], pb[1]) - reach)
+            & (y <= max(pa[1], pb[1]) + reach)
+        ]
+        if not len(candidates):
+            continue
+        # distance of the candidates to the side
+        vectors = points[candidates] - pa
+        t = numpy.clip(vectors @ (pb - pa) / (length * length), 0, 1)
+        projections = pa + t[:, None] * (pb - pa)
+        distances = numpy.hypot(*(points[candidates] - projections).T)
+        p = candidates[numpy.argmin(distances)]
+        nearest = min(math.hypot(*(points[p] - pa)), math.hypot(*(points[p] - pb)))
+        if length <= concavity * nearest:
+            continue
+        starts = numpy.flatnonzero(following >= 0)
+        starts = starts[starts != a]
+        ends = points[following[starts]]
+        starts = points[starts]
+        if (
+            segments_intersect(pa, points[p], starts, ends).any()
+            or segments_intersect(points[p], pb, starts, ends).any()
+        ):
+            continue
+        following[a], following[p] = p, b
+        pending.extend(((a, p), (p, b)))
+        inner[p] = False
+
+    ring = [hull[0]]
+    i = following[hull[0]]
+    while i != hull[0]:
+        ring.append(i)
+        i = following[i]
+    ring.append(hull[0])
+    return [tuple(coordinates[i]) for i in ring]
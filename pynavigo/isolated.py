@@ -3,60 +3,147 @@
 
 __author__ = "Cédric Bonhomme, Jose Hermida Prado"
 __date__ = "$Date: 2012/03/20 $"
-__revision__ = "$Date: 2012/04/03 $"
+__revision__ = "$Date: 2026/10/18 $"
 __license__ = ""
 
-import sys
-from . import simpleGraph
-
 
 class RemoveIslands(object):
     """
-    Remove islands in a graph. Return there
-    biggest connected graph.
+    Connected components of a graph, used to remove its islands.
+
+    The weakly connected components (one-way streets followed in both
+    directions) are computed with a union-find, the strongly connected
+    components with Tarjan's algorithm. Both are iterative and linear
+    in the size of the graph.
     """
 
     def __init__(self, graph):
         """
-        Initializes variables and set the maximum recursion limit to
-        the number of nodes.
+        Numbers the nodes of the graph.
         """
         self.graph = graph
-        self.graphs = {}
-        self.checked = []
-        self.allnodes = []
-        self.bigestGraph = []
-        self.allnodes = list(self.graph.graph_structure.keys())
-        sys.setrecursionlimit(len(self.allnodes))
-
-    def getNodesIslands(self):
-        n = 0
-        maxi = 0
-        while True:
-            self.checked = []
-            self.getIsland(self.allnodes[0])
-            if len(self.checked) > maxi:
-                self.bigestGraph = self.checked
-                maxi = len(self.checked)
-            for node in self.checked:
-                # remove of the list with all nodes the ones already used
-                self.allnodes.remove(node)
-            self.graphs[n] = {}
-            self.graphs[n] = self.checked
-            n = n + 1
-            if len(self.allnodes) == 0:
-                break
-        # return self.graphs
-        return self.bigestGraph
-
-    def getIsland(self, node):
-        if node in self.checked:
-            return
-        self.checked.append(node)
-        try:
-            # maybe there is a street of one way that finish in an isolated node
-            # (think about an entrance for a parking..)
-            for nod in self.graph.graph_structure[node]:
-                self.getIsland(nod)
-        except:
-            return
+        self.nodes = list(self.graph.graph_structure.keys())
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+
+    def successors(self):
+        """
+        Return the lists of the indices of the neighbors of each node.
+        The edges of infinite cost (reverse of one way streets) are
+        not followed.
+        """
+        index, infinity = self.index, float("inf")
+        return [
+            [
+                index[neighbor]
+                for neighbor, edge in self.graph.graph_structure[node].items()
+                if edge.distance != infinity
+            ]
+            for node in self.nodes
+        ]
+
+    def weak_components(self):
+        """
+        Return the component number of each node (union-find with
+        union by size and path halving).
+        """
+        parent = list(range(len(self.nodes)))
+        size = [1] * len(self.nodes)
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, neighbors in enumerate(self.successors()):
+            for j in neighbors:
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    continue
+                if size[root_i] < size[root_j]:
+                    root_i, root_j = root_j, root_i
+                parent[root_j] = root_i
+                size[root_i] += size[root_j]
+        numbers = {}
+        return [numbers.setdefault(find(i), len(numbers)) for i in range(len(parent))]
+
+    def strong_components(self):
+        """
+        Return the component number of each node (Tarjan's algorithm
+        with an explicit stack instead of recursion).
+        """
+        successors = self.successors()
+        nb_nodes = len(successors)
+        order, low = [-1] * nb_nodes, [0] * nb_nodes
+        component = [-1] * nb_nodes
+        on_stack = [False] * nb_nodes
+        stack, counter, nb_components = [], 0, 0
+        for root in range(nb_nodes):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            # (node, position of the next neighbor to visit)
+            work = [(root, 0)]
+            while work:
+                v, k = work[-1]
+                if k < len(successors[v]):
+                    work[-1] = (v, k + 1)
+                    w = successors[v][k]
+                    if order[w] == -1:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, 0))
+                    elif on_stack[w] and order[w] < low[v]:
+                        low[v] = order[w]
+                    continue
+                work.pop()
+                if work and low[v] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[v]
+                if low[v] == order[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component[w] = nb_components
+                        if w == v:
+                            break
+                    nb_components += 1
+        return component
+
+    def components(self, strong=False):
+        """
+        Return the components (lists of nodes), the biggest first.
+        """
+        numbers = self.strong_components() if strong else self.weak_components()
+        components = [[] for _ in range(max(numbers, default=-1) + 1)]
+        for node, number in zip(self.nodes, numbers):
+            components[number].append(node)
+        components.sort(key=len, reverse=True)
+        return components
+
+    def getNodesIslands(self, strong=False):
+        """
+        Return the set of the nodes of the biggest component.
+        """
+        components = self.components(strong)
+        return set(components[0]) if components else set()
+
+
+def statistics(components):
+    """
+    Return statistics on a list of components sorted by size.
+    """
+    nb_nodes = sum(len(component) for component in components)
+    largest = len(components[0]) if components else 0
+    return {
+        "nodes": nb_nodes,
+        "components": len(components),
+        "largest": largest,
+        "removed": nb_nodes - largest,
+        "singletons": sum(1 for component in components if len(component) == 1),
+        "sizes": [len(component) for component in components[:10]],
+    }
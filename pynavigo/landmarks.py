@@ -0,0 +1,261 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import struct
+import hashlib
+from array import array
+from heapq import heappush, heappop
+
+from .astar import AStar
+from .engine import DijkstraEngine, INFINITY
+
+MAGIC = b"PYNAVLMK"
+VERSION = 2
+# magic, version, number of landmarks, number of landmarks requested,
+# digest of the graph and number of nodes
+HEADER = struct.Struct("<8sIII20sq")
+
+# number of landmarks used by a query (the best ones for the source
+# and the destination)
+NB_ACTIVE_LANDMARKS = 4
+
+
+def digest(graph):
+    """
+    Return the SHA1 hash of the nodes and of the edges of a
+    CompactGraph.
+    """
+    sha1 = hashlib.sha1()
+    for values in (graph.osm_ids, graph.offsets, graph.targets, graph.distances):
+        sha1.update(memoryview(values).cast("B"))
+    return sha1.digest()
+
+
+class Landmarks(object):
+    """
+    Distances from and to a set of landmarks, used by ALT.
+
+    forward[l][i] is the distance from the landmark l to the node i,
+    backward[l][i] the distance from the node i to the landmark l.
+    requested is the number of landmarks asked for (a graph may have
+    fewer usable nodes) and graph_digest the digest of the graph.
+    """
+
+    def __init__(self, nodes, forward, backward, requested=None, graph_digest=None):
+        self.nodes = nodes
+        self.forward = forward
+        self.backward = backward
+        self.requested = len(nodes) if requested is None else requested
+        self.graph_digest = graph_digest
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def compute(cls, graph, nb_landmarks=16):
+        """
+        Selects the landmarks (farthest-point selection) and computes
+        the distances with a full search for each of them.
+        """
+        nb_nodes = graph.nb_nodes()
+        forward_engine = DijkstraEngine(graph)
+        backward_engine = DijkstraEngine(graph.reverse())
+
+        def distances(engine, source):
+            result = engine.query_indices(source)
+            scratch, generation = result.scratch, result.generation
+            return array(
+                "d",
+                (
+                    scratch.dist[i] if scratch.settled[i] == generation else INFINITY
+                    for i in range(nb_nodes)
+                ),
+            )
+
+        nodes, forward, backward = [], [], []
+        graph_digest = digest(graph)
+        if nb_nodes == 0:
+            return cls(nodes, forward, backward, nb_landmarks, graph_digest)
+        # The first landmark is the farthest node from an arbitrary one,
+        # the next ones the farthest from the landmarks already selected.
+        closest = distances(forward_engine, 0)
+        while len(nodes) < min(nb_landmarks, nb_nodes):
+            candidate, best = -1, -1
+            for i in range(nb_nodes):
+                if closest[i] != INFINITY and closest[i] > best and i not in nodes:
+                    candidate, best = i, closest[i]
+            if candidate == -1:
+                break
+            if not nodes:
+                closest = array("d", [INFINITY]) * nb_nodes
+            nodes.append(candidate)
+            forward.append(distances(forward_engine, candidate))
+            backward.append(distances(backward_engine, candidate))
+            for i, distance in enumerate(forward[-1]):
+                if distance < closest[i]:
+                    closest[i] = distance
+        return cls(nodes, forward, backward, nb_landmarks, graph_digest)
+
+    def save(self, path):
+        """
+        Serializes the landmarks in a binary file.
+        """
+        nb_nodes = len(self.forward[0]) if self.nodes else 0
+        with open(path, "wb") as dump:
+            dump.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    len(self.nodes),
+                    self.requested,
+                    self.graph_digest or bytes(20),
+                    nb_nodes,
+                )
+            )
+            array("q", self.nodes).tofile(dump)
+            for distances in self.forward + self.backward:
+                distances.tofile(dump)
+
+    @classmethod
+    def load(cls, path, graph=None):
+        """
+        Loads landmarks serialized with save. If graph is given, its
+        digest must match. Raise ValueError for a file of an older
+        version or a truncated file.
+        """
+        with open(path, "rb") as dump:
+            header = dump.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Not a landmarks file: %s" % path)
+            magic, version, nb_landmarks, requested, graph_digest, nb_nodes = (
+                HEADER.unpack(header)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Not a landmarks file: %s" % path)
+            if graph is not None and (
+                nb_nodes != graph.nb_nodes() or graph_digest != digest(graph)
+            ):
+                raise ValueError("Landmarks computed for another graph: %s" % path)
+            try:
+                nodes = array("q")
+                nodes.fromfile(dump, nb_landmarks)
+                tables = []
+                for _ in range(2 * nb_landmarks):
+                    distances = array("d")
+                    distances.fromfile(dump, nb_nodes)
+                    tables.append(distances)
+            except EOFError:
+                raise ValueError("Truncated landmarks file: %s" % path)
+        return cls(
+            list(nodes),
+            tables[:nb_landmarks],
+            tables[nb_landmarks:],
+            requested,
+            graph_digest,
+        )
+
+    def lower_bound(self, l, i, t):
+        """
+        Lower bound of the distance from i to t given by the landmark l
+        (triangle inequality).
+        """
+        forward, backward = self.forward[l], self.backward[l]
+        bound = 0.0
+        if forward[i] != INFINITY and forward[t] != INFINITY:
+            bound = max(bound, forward[t] - forward[i])
+        if backward[i] != INFINITY and backward[t] != INFINITY:
+            bound = max(bound, backward[i] - backward[t])
+        return bound
+
+
+class ALT(AStar):
+    """
+    A* with landmarks and the triangle inequality (ALT).
+
+    For a landmark L, d(L, t) - d(L, v) and d(v, L) - d(t, L) are lower
+    bounds of d(v, t). Only the NB_ACTIVE_LANDMARKS landmarks giving the
+    best bound for the source are used by a query.
+    """
+
+    def __init__(self, graph, landmarks, nb_active=NB_ACTIVE_LANDMARKS):
+        AStar.__init__(self, graph, "distance")
+        self.landmarks = landmarks
+        self.nb_active = nb_active
+
+    def route_indices(self, s, t):
+        """
+        Same as route with node indices.
+        """
+        landmarks = self.landmarks
+        active = sorted(
+            range(len(landmarks)),
+            key=lambda l: landmarks.lower_bound(l, s, t),
+            reverse=True,
+        )[: self.nb_active]
+        # (forward, d(L, t), backward, d(t, L)) for each usable landmark
+        bounds = []
+        for l in active:
+            forward, backward = landmarks.forward[l], landmarks.backward[l]
+            if forward[t] != INFINITY and backward[t] != INFINITY:
+                bounds.append((forward, forward[t], backward, backward[t]))
+
+        def heuristic(v):
+            h = 0.0
+            for forward, to_target, backward, from_target in bounds:
+                bound = to_target - forward[v]
+                if bound > h:
+                    h = bound
+                bound = backward[v] - from_target
+                if bound > h and bound != INFINITY:
+                    h = bound
+            return h
+
+        scratch = self.scratch()
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = self.graph.offsets, self.graph.targets, self.weights
+
+        dist[s] = 0.0
+        pred[s] = -1
+        stamp[s] = generation
+        heap = [(0.0, 0.0, s)]
+        nb_settled = 0
+        while heap:
+            _, d, v = heappop(heap)
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            nb_settled += 1
+            if v == t:
+                break
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                nd = d + weights[k]
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    heappush(heap, (nd + heuristic(w), nd, w))
+        self.nb_settled = nb_settled
+
+        if settled[t] != generation:
+            return ([], 0)
+        path = []
+        i = t
+        while i != -1:
+            path.append(i)
+            i = pred[i]
+        path.reverse()
+        return (path, dist[t])
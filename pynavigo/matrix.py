@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import threading
+import multiprocessing
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy
+
+from .engine import DijkstraEngine, INFINITY
+
+# number of blocks of rows given to each worker process (the progress
+# is reported after each block)
+BLOCKS_PER_JOB = 4
+
+# average speed (km/h) of a path without edge, like
+# simpleGraph.Graph.average_speed
+EMPTY_PATH_SPEED = 90
+
+# MatrixEngine of the worker processes, inherited from the parent
+worker_engine = None
+
+
+class DistanceMatrix(object):
+    """
+    Distances (meters) and travel times (hours) between a list of
+    sources and a list of targets (OSM ids): distances[i][j] is the
+    length of the shortest path (for the metric) from sources[i] to
+    targets[j], times[i][j] the time needed to follow it and speeds[i][j]
+    the arithmetic mean of the speeds of its edges. They are infinite
+    when the target can not be reached.
+
+    The paths are not kept, they are computed again on demand.
+    """
+
+    def __init__(
+        self, engine, sources, targets, distances, times, speeds, metric="distance"
+    ):
+        self.engine = engine
+        self.sources = sources
+        self.targets = targets
+        self.distances = distances
+        self.times = times
+        self.speeds = speeds
+        self.metric = metric
+
+    def path(self, i, j):
+        """
+        Return the shortest path (OSM ids) from sources[i] to targets[j].
+        """
+        if self.distances[i, j] == INFINITY:
+            return []
+        return self.engine.route(self.sources[i], self.targets[j], self.metric)[0]
+
+    def average_speed(self, i, j):
+        """
+        Return the average speed (km/h) of the edges of the path from
+        sources[i] to targets[j] (EMPTY_PATH_SPEED without edge), or
+        None if there is no path.
+        """
+        if self.speeds[i, j] == INFINITY:
+            return None
+        return float(self.speeds[i, j])
+
+
+class MatrixEngine(object):
+    """
+    Many-to-many queries on a CompactGraph: one Dijkstra search per
+    source, stopped as soon as all the targets are settled. The length
+    and the travel time of the shortest path (for the metric, see
+    CompactGraph.weights) of each node are computed during the search,
+    no path is built.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.engine = DijkstraEngine(graph)
+        self.local = threading.local()
+
+    def compute(self, sources, targets=None, jobs=1, progress=None, metric="distance"):
+        """
+        Return the DistanceMatrix of the sources and targets (lists of
+        OSM ids, the sources by default) for the paths which are the
+        shortest for the metric. Nodes missing from the graph get
+        infinite rows or columns.
+
+        With jobs > 1, blocks of rows are computed by a pool of forked
+        processes which share the graph of the parent (copy on write).
+        progress, if given, is called with the number of rows done and
+        the number of rows.
+        """
+        sources = list(sources)
+        targets = sources if targets is None else list(targets)
+        index = self.graph.index
+        source_indices = [index.get(source, -1) for source in sources]
+        target_indices = [index.get(target, -1) for target in targets]
+        if jobs > 1 and "fork" in multiprocessing.get_all_start_methods():
+            distances, times, speeds = self.compute_parallel(
+                source_indices, target_indices, jobs, progress, metric
+            )
+        else:
+            distances, times, speeds = self.compute_indices(
+                source_indices, target_indices, metric
+            )
+            if progress is not None:
+                progress(len(sources), len(sources))
+        return DistanceMatrix(
+            self.engine, sources, targets, distances, times, speeds, metric
+        )
+
+    def compute_parallel(
+        self, sources, targets, jobs, progress=None, metric="distance"
+    ):
+        """
+        Same as compute_indices with a pool of jobs processes. The
+        blocks are written at the position of their rows, so the result
+        does not depend on the order in which they are done.
+        """
+        global worker_engine
+        distances = numpy.full((len(sources), len(targets)), INFINITY)
+        times = numpy.full((len(sources), len(targets)), INFINITY)
+        speeds = numpy.full((len(sources), len(targets)), INFINITY)
+        size = max(1, -(-len(sources) // (jobs * BLOCKS_PER_JOB)))
+        blocks = [
+            (start, sources[start : start + size])
+            for start in range(0, len(sources), size)
+        ]
+        worker_engine = self
+        try:
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                futures = [
+                    executor.submit(compute_block, start, block, targets, metric)
+                    for start, block in blocks
+                ]
+                done = 0
+                for future in as_completed(futures):
+                    start, block = future.result()
+                    stop = start + len(block[0])
+                    distances[start:stop], times[start:stop], speeds[start:stop] = block
+                    done += len(block[0])
+                    if progress is not None:
+                        progress(done, len(sources))
+        finally:
+            worker_engine = None
+        return distances, times, speeds
+
+    def compute_indices(self, sources, targets, metric="distance"):
+        """
+        Same as compute with node indices (-1 for a missing node).
+        Return the NumPy arrays of the distances, of the times and of
+        the average speeds.
+        """
+        distances = numpy.full((len(sources), len(targets)), INFINITY)
+        times = numpy.full((len(sources), len(targets)), INFINITY)
+        speeds = numpy.full((len(sources), len(targets)), INFINITY)
+        columns = {}
+        for j, target in enumerate(targets):
+            if target != -1:
+                columns.setdefault(target, []).append(j)
+        if not columns:
+            return distances, times, speeds
+
+        scratch = self.engine.scratch("matrix")
+        elapsed = getattr(self.local, "elapsed", None)
+        if elapsed is None:
+            elapsed = self.local.elapsed = [0.0] * self.graph.nb_nodes()
+            self.local.length = [0.0] * self.graph.nb_nodes()
+            # number of edges and sum of their speeds
+            self.local.nb_edges = [0] * self.graph.nb_nodes()
+            self.local.speed_sum = [0.0] * self.graph.nb_nodes()
+        length = self.local.length
+        nb_edges, speed_sum = self.local.nb_edges, self.local.speed_sum
+        dist, stamp, settled = scratch.dist, scratch.stamp, scratch.settled
+        offsets, heads = self.graph.offsets, self.graph.targets
+        weights, travel_times = self.graph.weights(metric), self.graph.times()
+        lengths, edge_speeds = self.graph.distances, self.graph.speeds
+
+        for i, source in enumerate(sources):
+            if source == -1:
+                continue
+            generation = scratch.next_generation()
+            dist[source] = 0.0
+            elapsed[source] = length[source] = speed_sum[source] = 0.0
+            nb_edges[source] = 0
+            stamp[source] = generation
+            heap = [(0.0, source)]
+            remaining = len(columns)
+            row_distances, row_times, row_speeds = distances[i], times[i], speeds[i]
+            while heap:
+                d, v = heappop(heap)
+                if settled[v] == generation:
+                    continue
+                settled[v] = generation
+                if v in columns:
+                    for j in columns[v]:
+                        row_distances[j] = length[v]
+                        row_times[j] = elapsed[v]
+                        row_speeds[j] = (
+                            speed_sum[v] / nb_edges[v]
+                            if nb_edges[v]
+                            else EMPTY_PATH_SPEED
+                        )
+                    remaining -= 1
+                    if not remaining:
+                        break
+                t, l, n, s = elapsed[v], length[v], nb_edges[v] + 1, speed_sum[v]
+                for k in range(offsets[v], offsets[v + 1]):
+                    w = heads[k]
+                    nd = d + weights[k]
+                    if stamp[w] != generation or nd < dist[w]:
+                        stamp[w] = generation
+                        dist[w] = nd
+                        elapsed[w] = t + travel_times[k]
+                        length[w] = l + lengths[k]
+                        nb_edges[w] = n
+                        speed_sum[w] = s + edge_speeds[k]
+                        heappush(heap, (nd, w))
+        return distances, times, speeds
+
+
+def compute_block(start, sources, targets, metric="distance"):
+    """
+    Computes a block of rows in a worker process.
+    """
+    return start, worker_engine.compute_indices(sources, targets, metric)
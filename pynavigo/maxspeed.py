@@ -8,18 +8,21 @@ __revision__ = "$Date: 2012/04/30 $"
 __copyright__ = "Copyright (c) 2013-2021 Cedric Bonhomme"
 __license__ = ""
 
+import os
 import configparser
 
+MAX_SPEED_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cfg", "maxspeed.cfg"
+)
 
-def load_max_speed(country="france"):
+
+def load_max_speed(country="france", path=MAX_SPEED_FILE):
     """
     Load information about speed limits.
     """
-    config = configparser.SafeConfigParser()
-    try:
-        config.read("./pynavigo/cfg/maxspeed.cfg")
-    except:
-        raise Error("File of max speeds not found.")
+    config = configparser.ConfigParser()
+    if not config.read(path):
+        raise IOError("File of max speeds not found: %s" % path)
 
     max_speed = {
         "motorway": int(config.get(country, "motorway")),
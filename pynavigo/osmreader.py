@@ -0,0 +1,421 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import bz2
+import gzip
+import lzma
+import math
+import zlib
+import struct
+from array import array
+from bisect import bisect_left
+from xml.etree.ElementTree import iterparse
+
+import numpy
+
+NODE, WAY, RELATION = "node", "way", "relation"
+MEMBER_TYPES = (NODE, WAY, RELATION)
+
+# number of elements given to a callback at once
+BATCH_SIZE = 10000
+
+
+class OSMReader(object):
+    """
+    Streaming reader of OSM files (.osm, .osm.bz2, .osm.gz and .pbf).
+
+    The file is read twice: the first pass keeps the ways accepted by
+    way_filter and the sorted ids of their nodes, the second pass
+    stores the coordinates of these nodes only, in arrays. The memory
+    used depends on the size of the road network, not of the file.
+
+    The callbacks receive lists, like the ones of imposm.parser:
+    coords_callback (osm_id, longitude, latitude) for the nodes of the
+    ways, ways_callback (osm_id, tags, refs), relations_callback
+    (osm_id, tags, [(ref, type, role)]) and nodes_callback
+    (osm_id, tags, (longitude, latitude)) for all the tagged nodes.
+    The coordinates are given before the ways.
+    """
+
+    def __init__(
+        self,
+        coords_callback=None,
+        nodes_callback=None,
+        ways_callback=None,
+        relations_callback=None,
+        way_filter=None,
+    ):
+        self.coords_callback = coords_callback
+        self.nodes_callback = nodes_callback
+        self.ways_callback = ways_callback
+        self.relations_callback = relations_callback
+        self.way_filter = way_filter
+        self.node_ids = array("q")
+        self.longitudes = array("d")
+        self.latitudes = array("d")
+
+    def parse(self, path):
+        """
+        Reads the file and calls the callbacks.
+        """
+        read = read_pbf if path.endswith(".pbf") else read_xml
+
+        # First pass: ways and relations.
+        ways, refs, relations = [], array("q"), []
+        for kind, osm_id, tags, data in read(path, nodes=False):
+            if kind == WAY:
+                if self.way_filter is None or self.way_filter(tags):
+                    ways.append((osm_id, tags, data))
+                    refs.extend(data)
+            elif self.relations_callback is not None:
+                relations.append((osm_id, tags, data))
+                if len(relations) == BATCH_SIZE:
+                    self.relations_callback(relations)
+                    relations = []
+        if relations:
+            self.relations_callback(relations)
+        self.node_ids = array("q")
+        self.node_ids.frombytes(
+            numpy.unique(numpy.frombuffer(refs, dtype=numpy.int64)).tobytes()
+        )
+        del refs
+
+        # Second pass: coordinates of the nodes of the ways.
+        nb_nodes = len(self.node_ids)
+        self.longitudes = array("d", [math.nan]) * nb_nodes
+        self.latitudes = array("d", [math.nan]) * nb_nodes
+        nodes = []
+        for _, osm_id, tags, (longitude, latitude) in read(
+            path, ways=False, relations=False
+        ):
+            position = bisect_left(self.node_ids, osm_id)
+            if position < nb_nodes and self.node_ids[position] == osm_id:
+                self.longitudes[position] = longitude
+                self.latitudes[position] = latitude
+            if tags and self.nodes_callback is not None:
+                nodes.append((osm_id, tags, (longitude, latitude)))
+                if len(nodes) == BATCH_SIZE:
+                    self.nodes_callback(nodes)
+                    nodes = []
+        if nodes:
+            self.nodes_callback(nodes)
+
+        if self.coords_callback is not None:
+            coords = []
+            for osm_id, longitude, latitude in zip(
+                self.node_ids, self.longitudes, self.latitudes
+            ):
+                # nodes missing from the file (cut extracts)
+                if math.isnan(longitude):
+                    continue
+                coords.append((osm_id, longitude, latitude))
+                if len(coords) == BATCH_SIZE:
+                    self.coords_callback(coords)
+                    coords = []
+            if coords:
+                self.coords_callback(coords)
+        if self.ways_callback is not None:
+            for start in range(0, len(ways), BATCH_SIZE):
+                self.ways_callback(ways[start : start + BATCH_SIZE])
+
+
+def open_file(path):
+    """
+    Opens a file, compressed or not.
+    """
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_xml(path, nodes=True, ways=True, relations=True):
+    """
+    Generates the (kind, osm_id, tags, data) of the elements of an
+    OSM XML file. data is (longitude, latitude) for a node, the array
+    of node ids for a way and the list of (ref, type, role) of the
+    members for a relation.
+    """
+    with open_file(path) as osm_file:
+        context = iterparse(osm_file, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end":
+                continue
+            kind = element.tag
+            if kind == NODE:
+                if nodes:
+                    yield (
+                        NODE,
+                        int(element.get("id")),
+                        xml_tags(element),
+                        (float(element.get("lon")), float(element.get("lat"))),
+                    )
+            elif kind == WAY:
+                if ways:
+                    refs = array("q", (int(nd.get("ref")) for nd in element.iter("nd")))
+                    yield (WAY, int(element.get("id")), xml_tags(element), refs)
+            elif kind == RELATION:
+                if relations:
+                    members = [
+                        (int(member.get("ref")), member.get("type"), member.get("role"))
+                        for member in element.iter("member")
+                    ]
+                    yield (RELATION, int(element.get("id")), xml_tags(element), members)
+            else:
+                continue
+            # the elements already read are not kept in memory
+            root.clear()
+
+
+def xml_tags(element):
+    return {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+
+
+def read_pbf(path, nodes=True, ways=True, relations=True):
+    """
+    Same as read_xml for an OSM PBF file.
+    """
+    with open(path, "rb") as osm_file:
+        while True:
+            size = osm_file.read(4)
+            if len(size) < 4:
+                break
+            header = dict(fields(osm_file.read(struct.unpack(">I", size)[0])))
+            blob = osm_file.read(header[3])
+            if bytes(header[1]) != b"OSMData":
+                continue
+            yield from read_block(blob_data(blob), nodes, ways, relations)
+
+
+def blob_data(blob):
+    """
+    Return the uncompressed content of a Blob message.
+    """
+    blob = dict(fields(blob))
+    if 1 in blob:
+        return blob[1]
+    if 3 in blob:
+        return memoryview(zlib.decompress(blob[3]))
+    if 4 in blob:
+        return memoryview(lzma.decompress(blob[4]))
+    raise ValueError("Unsupported compression of PBF blob.")
+
+
+def read_block(block, nodes, ways, relations):
+    """
+    Generates the elements of a PrimitiveBlock message.
+    """
+    strings, groups = [], []
+    granularity, lat_offset, lon_offset = 100, 0, 0
+    for number, value in fields(block):
+        if number == 1:
+            strings = [bytes(string).decode("utf-8") for _, string in fields(value)]
+        elif number == 2:
+            groups.append(value)
+        elif number == 17:
+            granularity = value
+        elif number == 19:
+            lat_offset = signed(value)
+        elif number == 20:
+            lon_offset = signed(value)
+
+    def coordinates(latitude, longitude):
+        return (
+            1e-9 * (lon_offset + granularity * longitude),
+            1e-9 * (lat_offset + granularity * latitude),
+        )
+
+    for group in groups:
+        for number, value in fields(group):
+            if number == 1 and nodes:
+                node = dict_of_fields(value)
+                yield (
+                    NODE,
+                    zigzag(node[1][0]),
+                    pbf_tags(node, strings),
+                    coordinates(zigzag(node[8][0]), zigzag(node[9][0])),
+                )
+            elif number == 2 and nodes:
+                yield from read_dense_nodes(value, strings, coordinates)
+            elif number == 3 and ways:
+                way = dict_of_fields(value)
+                refs = array("q", deltas(packed(way.get(8, [b""])[0]), zigzag))
+                yield (WAY, signed(way[1][0]), pbf_tags(way, strings), refs)
+            elif number == 4 and relations:
+                relation = dict_of_fields(value)
+                roles = packed(relation.get(8, [b""])[0])
+                refs = deltas(packed(relation.get(9, [b""])[0]), zigzag)
+                types = packed(relation.get(10, [b""])[0])
+                members = [
+                    (ref, MEMBER_TYPES[member_type], strings[role])
+                    for ref, member_type, role in zip(refs, types, roles)
+                ]
+                yield (
+                    RELATION,
+                    signed(relation[1][0]),
+                    pbf_tags(relation, strings),
+                    members,
+                )
+
+
+def read_dense_nodes(dense, strings, coordinates):
+    """
+    Generates the nodes of a DenseNodes message.
+    """
+    dense = dict_of_fields(dense)
+    ids = deltas(packed(dense[1][0]), zigzag)
+    latitudes = deltas(packed(dense[8][0]), zigzag)
+    longitudes = deltas(packed(dense[9][0]), zigzag)
+    keys_values = packed(dense[10][0]) if 10 in dense else []
+    position = 0
+    for osm_id, latitude, longitude in zip(ids, latitudes, longitudes):
+        tags = {}
+        # the tags of each node are pairs of strings ended by 0
+        while position < len(keys_values) and keys_values[position] != 0:
+            tags[strings[keys_values[position]]] = strings[keys_values[position + 1]]
+            position += 2
+        position += 1
+        yield (NODE, osm_id, tags, coordinates(latitude, longitude))
+
+
+def pbf_tags(message, strings):
+    keys = packed(message.get(2, [b""])[0])
+    values = packed(message.get(3, [b""])[0])
+    return {strings[key]: strings[value] for key, value in zip(keys, values)}
+
+
+def varint(data, position):
+    """
+    Decodes a varint. Return the value and the next position.
+    """
+    result, shift = 0, 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+
+def fields(data):
+    """
+    Generates the (field number, value) of a protobuf message. The
+    value is an integer for a varint and a memoryview otherwise.
+    """
+    data = memoryview(data)
+    position, end = 0, len(data)
+    while position < end:
+        key, position = varint(data, position)
+        wire_type = key & 7
+        if wire_type == 0:
+            value, position = varint(data, position)
+        elif wire_type == 2:
+            length, position = varint(data, position)
+            value = data[position : position + length]
+            position += length
+        elif wire_type == 1:
+            value = data[position : position + 8]
+            position += 8
+        elif wire_type == 5:
+            value = data[position : position + 4]
+            position += 4
+        else:
+            raise ValueError("Unsupported protobuf wire type %s." % wire_type)
+        yield key >> 3, value
+
+
+def dict_of_fields(data):
+    """
+    Return a dictionary field number -> list of values of a message.
+    """
+    result = {}
+    for number, value in fields(data):
+        result.setdefault(number, []).append(value)
+    return result
+
+
+def packed(data):
+    """
+    Decodes a packed repeated varint field.
+    """
+    result = []
+    position, end = 0, len(data)
+    while position < end:
+        value, position = varint(data, position)
+        result.append(value)
+    return result
+
+
+def zigzag(value):
+    """
+    Decodes a sint64.
+    """
+    return (value >> 1) ^ -(value & 1)
+
+
+def signed(value):
+    """
+    Decodes an int64.
+    """
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def deltas(values, decode):
+    """
+    Return the values of a delta-coded list.
+    """
+    result, current = [], 0
+    for value in values:
+        current += decode(value)
+        result.append(current)
+    return result
+
+
+if __name__ == "__main__":
+    # Point of entry in execution mode: reads the road network of a file.
+    # python -m pynavigo.osmreader ./pynavigo/var/luxembourg-little.osm
+    import sys
+    import time
+    import resource
+
+    from .OSM2SimpleGraph import is_road
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m pynavigo.osmreader <file.osm|file.osm.bz2|file.pbf>")
+        sys.exit(1)
+    counts = {"coords": 0, "ways": 0, "relations": 0}
+
+    def counter(name):
+        def callback(elements):
+            counts[name] += len(elements)
+
+        return callback
+
+    reader = OSMReader(
+        coords_callback=counter("coords"),
+        ways_callback=counter("ways"),
+        relations_callback=counter("relations"),
+        way_filter=is_road,
+    )
+    start = time.time()
+    reader.parse(sys.argv[1])
+    print(
+        "%d ways, %d nodes, %d relations read in %.2f seconds (peak memory %d MB)"
+        % (
+            counts["ways"],
+            counts["coords"],
+            counts["relations"],
+            time.time() - start,
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+        )
+    )
@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import hashlib
+
+from . import landmarks
+from . import simpleGraph
+
+# distance (meters) added to each edge of the over-graph
+EDGE_PENALTY = 75 * 4
+
+
+def digest(clients):
+    """
+    Return the hash of the content of a clients configuration.
+    """
+    return hashlib.sha1(clients.encode("utf-8")).hexdigest()
+
+
+class OverGraph(object):
+    """
+    Complete graph of the pickup points, serialized with the list of
+    the pickup points, the hash of the clients configuration and the
+    digest of the graph (landmarks.digest) it was built from.
+
+    The edge between two pickup points p and q goes both ways, like
+    the edges added with simpleGraph.Graph.addEdge: it has the length
+    of the shortest path from the last added of the two points to the
+    other one plus EDGE_PENALTY, and the average speed of the edges of
+    this path (matrix.DistanceMatrix.average_speed). The graph is
+    updated incrementally: an added point costs one search on the
+    graph (its row), a removed point is dropped.
+    """
+
+    def __init__(self):
+        self.graph = simpleGraph.Graph()
+        self.pickups = []
+        self.digest = None
+        self.graph_digest = None
+
+    def update(
+        self,
+        pickups,
+        matrix_engine,
+        clients_digest=None,
+        jobs=1,
+        progress=None,
+        graph_digest=None,
+    ):
+        """
+        Updates the over-graph for a new list of pickup points (OSM
+        ids) with the matrix.MatrixEngine of the graph. Return the
+        lists of the added and of the removed points. All the points
+        are computed again if the graph changed (graph_digest is
+        computed if not given).
+        """
+        if graph_digest is None:
+            graph_digest = landmarks.digest(matrix_engine.graph)
+        if graph_digest != getattr(self, "graph_digest", None):
+            self.graph = simpleGraph.Graph()
+            self.pickups = []
+        pickups = list(dict.fromkeys(pickups))
+        selected = set(pickups)
+        removed = [node for node in self.pickups if node not in selected]
+        kept = [node for node in self.pickups if node in selected]
+        previous = set(kept)
+        added = [node for node in pickups if node not in previous]
+
+        self.graph.remove_nodes(removed)
+        graph = matrix_engine.graph
+        for node in added:
+            latitude, longitude = graph.coordinates(graph.index[node])
+            self.graph.addNode(node, longitude, latitude)
+        if added:
+            # rows: from the added points to all the points
+            self.add_edges(
+                matrix_engine.compute(added, kept + added, jobs, progress), len(kept)
+            )
+        self.pickups = kept + added
+        self.digest = clients_digest
+        self.graph_digest = graph_digest
+        return added, removed
+
+    def add_edges(self, distance_matrix, nb_kept):
+        """
+        Adds the edges of the rows of the added points: the row of the
+        i-th added point gives its edges with the nb_kept first targets
+        (the points already there), with the added points before it
+        and with itself.
+        """
+        for i, source in enumerate(distance_matrix.sources):
+            for j, target in enumerate(distance_matrix.targets[: nb_kept + i + 1]):
+                average = distance_matrix.average_speed(i, j)
+                if average is None:
+                    continue
+                distance = float(distance_matrix.distances[i, j]) + EDGE_PENALTY
+                self.graph.addEdge(source, target, distance, average, False)
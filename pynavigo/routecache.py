@@ -0,0 +1,234 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import time
+import threading
+from collections import OrderedDict
+
+from .engine import INFINITY
+from .snapping import SnappedLocation
+
+
+class LRUCache(object):
+    """
+    Dictionary of bounded size: when it is full, the least recently
+    used entry is dropped. With a ttl (seconds), an entry older than
+    ttl is considered missing. Safe to use from several threads.
+    """
+
+    def __init__(self, capacity, ttl=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the value of key or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[1] > self.ttl:
+                    del self.entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Sets the value of key, dropping the oldest entries if needed.
+        """
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        """
+        Return True if key has a value, without counting a hit or a
+        miss.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            return self.ttl is None or time.monotonic() - entry[1] <= self.ttl
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RouteCache(object):
+    """
+    Cache of the routes computed by a DijkstraEngine, keyed on the
+    (departure, destination, metric) OSM ids. The route from or to a
+    SnappedLocation is the best of the cached routes between the ends
+    of its segment, plus the costs of the parts of the segment
+    (DijkstraEngine.seeds): the cached routes are shared by all the
+    locations of the same segments.
+
+    The routes which are not cached are computed by search (the same
+    for route and route_many): the first query from a source is a
+    point-to-point query, on the simplify.SimplifiedGraph of the graph
+    if given, or a search stopped at its targets; the shortest path
+    tree of a source queried again is computed and kept, so that its
+    next queries are lookups in its tree. The cache is bound to a
+    graph: a new one is created when the graph is loaded again
+    (GraphLoader.prepare_queries).
+    """
+
+    def __init__(self, engine, capacity=4096, nb_trees=32, ttl=None, simplified=None):
+        self.engine = engine
+        self.routes = LRUCache(capacity, ttl)
+        self.trees = LRUCache(nb_trees, ttl)
+        # sources already queried
+        self.sources = LRUCache(capacity, ttl)
+        self.simplified = simplified
+
+    def route(self, source, target, metric="distance"):
+        """
+        Return (path, cost) like DijkstraEngine.route between two OSM
+        nodes or SnappedLocation.
+        """
+        # raise ValueError for an unknown metric
+        self.engine.graph.weights(metric)
+        sources = self.ends(source, SnappedLocation.sources, metric)
+        targets = self.ends(target, SnappedLocation.targets, metric)
+        routes = self.routes_from(sources, [end for end, _ in targets], metric)
+        return self.best(source, target, sources, targets, routes, metric)
+
+    def route_many(self, source, targets, metric="distance"):
+        """
+        Return the list of the (path, cost) from source to each target.
+        The routes which are not cached are computed like for route,
+        with one search from each end of source.
+        """
+        self.engine.graph.weights(metric)
+        sources = self.ends(source, SnappedLocation.sources, metric)
+        ends = [
+            self.ends(target, SnappedLocation.targets, metric) for target in targets
+        ]
+        wanted = list({end for target_ends in ends for end, _ in target_ends})
+        routes = self.routes_from(sources, wanted, metric)
+        return [
+            self.best(source, target, sources, target_ends, routes, metric)
+            for target, target_ends in zip(targets, ends)
+        ]
+
+    def routes_from(self, sources, ends, metric):
+        """
+        Return the routes {(source end, end): (path, cost)} from the
+        ends of a source (see ends) to the OSM nodes ends, from the
+        cache or computed with search.
+        """
+        routes = {}
+        for node, _ in sources:
+            missing = []
+            for end in ends:
+                result = self.routes.get((node, end, metric))
+                if result is None:
+                    missing.append(end)
+                else:
+                    routes[node, end] = result
+            if missing:
+                for end, result in self.search(node, missing, metric).items():
+                    routes[node, end] = result
+                    self.routes.put((node, end, metric), result)
+        return routes
+
+    def search(self, node, ends, metric):
+        """
+        Return {end: (path, cost)} of the routes from the OSM node to
+        the OSM nodes ends. From the tree of node if it is kept or if
+        node was already queried, otherwise with a point-to-point query
+        on the simplified graph for one or two ends (the ends of a
+        segment) or with a search stopped at the ends.
+        """
+        key = (node, metric)
+        if key in self.trees or key in self.sources:
+            tree = self.tree(node, metric)
+            return {end: tree.get(end) for end in ends}
+        self.sources.put(key, True)
+        if self.simplified is not None and len(ends) <= 2:
+            return {end: self.simplified.route(node, end, metric) for end in ends}
+        result = self.engine.query(node, ends, metric)
+        return {end: result.get(end) for end in ends}
+
+    def ends(self, location, snapped_costs, metric):
+        """
+        Return the list of the (OSM id, cost) of the ends of a location
+        (see DijkstraEngine.seeds).
+        """
+        osm_ids = self.engine.graph.osm_ids
+        return [
+            (osm_ids[i], cost)
+            for i, cost in self.engine.seeds(location, snapped_costs, metric)
+        ]
+
+    def best(self, source, target, sources, targets, routes, metric):
+        """
+        Return the best (path, cost) from source to target through the
+        routes {(source end, target end): (path, cost)}, or along their
+        segment if source and target are on the same one.
+        """
+        best, best_path = INFINITY, []
+        if isinstance(source, SnappedLocation) and isinstance(target, SnappedLocation):
+            direct = source.direct_cost(target, metric)
+            if direct is not None:
+                best = direct
+        for node, start_cost in sources:
+            for end, end_cost in targets:
+                path, cost = routes[node, end]
+                if path and start_cost + cost + end_cost < best:
+                    best, best_path = start_cost + cost + end_cost, path
+        if best == INFINITY:
+            return ([], 0)
+        return (best_path, best)
+
+    def tree(self, source, metric="distance"):
+        """
+        Return the ShortestPathTree of the whole graph from source.
+        """
+        tree = self.trees.get((source, metric))
+        if tree is None:
+            tree = self.engine.query(source, metric=metric).tree()
+            self.trees.put((source, metric), tree)
+        return tree
+
+    def clear(self):
+        self.routes.clear()
+        self.trees.clear()
+        self.sources.clear()
+
+    def stats(self):
+        """
+        Return the counters of the cache.
+        """
+        return {
+            "routes": len(self.routes),
+            "hits": self.routes.hits,
+            "misses": self.routes.misses,
+            "trees": len(self.trees),
+            "tree_hits": self.trees.hits,
+            "tree_misses": self.trees.misses,
+        }
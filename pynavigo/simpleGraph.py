@@ -10,7 +10,10 @@ __license__ = ""
 
 from . import dijkstra
 from . import isolated
+from . import spatial
 from . import utils
+from .compactgraph import CompactGraph, edge_time, way_segments
+from .simplify import SimplifiedGraph
 
 
 class Node(object):
@@ -36,15 +39,17 @@ class Node(object):
 
 class Edge(object):
     """
-    Represent an edge (can be oriented).
+    Represent an edge (can be oriented). The time (in hours) needed
+    to cross the edge is computed when the edge is created.
     """
 
-    def __init__(self, fromnode, tonode, time, distance, speed):
+    def __init__(self, fromnode, tonode, time, distance, speed, highway=None):
         self.fromnode = fromnode
         self.tonode = tonode
         self.time = time
         self.distance = distance
         self.speed = speed
+        self.highway = highway
 
     def __str__(self):
         """
@@ -62,13 +67,14 @@ class Way(object):
     is represented by one ore more edges.
     """
 
-    def __init__(self, refs, oneway, speed_limit=50):
+    def __init__(self, refs, oneway, speed_limit=50, highway=None):
         """
-        A way can be one sided.
+        A way can be one sided. highway is its road class.
         """
         self.refs = refs
         self.oneway = oneway
         self.speed_limit = speed_limit
+        self.highway = highway
 
     def __str__(self):
         """
@@ -89,16 +95,53 @@ class Graph(object):
         Initializes the graph.
         """
         self.graph_structure = {}
+        self.reverse_structure = {}
         self.graph_info = {}
         self.ways = []
+        # turn restrictions: (fromnode, via, tonode, only)
+        self.restrictions = []
+        self.spatial_index = None
+
+    def __getstate__(self):
+        """
+        The spatial index is not serialized.
+        """
+        state = self.__dict__.copy()
+        state.pop("spatial_index", None)
+        state.pop("spatial_ids", None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Graphs serialized before the reverse structure existed
+        get it rebuilt when they are loaded.
+        """
+        self.__dict__.update(state)
+        self.spatial_index = None
+        if "reverse_structure" not in state:
+            self.create_reverse_structure()
+        if "restrictions" not in state:
+            self.restrictions = []
+
+    def create_reverse_structure(self):
+        """
+        Creates the reverse adjacency: reverse_structure[node][neighbor]
+        is the edge from neighbor to node.
+        """
+        self.reverse_structure = {node: {} for node in self.graph_structure}
+        for fromnode, neighbors in self.graph_structure.items():
+            for tonode, edge in neighbors.items():
+                self.reverse_structure[tonode][fromnode] = edge
 
     def addNode(self, node_id, longitude, latitude):
         """
         Adds a node with no neighbors.
         """
-        if node_id not in list(self.graph_structure.keys()):
+        if node_id not in self.graph_structure:
             self.graph_structure[node_id] = {}
+            self.reverse_structure[node_id] = {}
             self.graph_info[node_id] = Node(node_id, longitude, latitude)
+            self.spatial_index = None
 
     def get_node(self, osm_id):
         """
@@ -113,42 +156,59 @@ class Graph(object):
         """
         Delete a node from the graph.
         """
-        for neighbor_id in list(self.graph_structure[node_id].keys()):
-            del self.graph_structure[neighbor_id][node_id]
-        del self.graph_structure[node_id]
-        del self.graph_info[node_id]
+        self.remove_nodes([node_id])
+
+    def remove_nodes(self, nodes):
+        """
+        Delete several nodes and all their edges (in and out) from
+        the graph.
+        """
+        nodes = set(nodes)
+        for node in nodes:
+            for neighbor in self.graph_structure[node]:
+                if neighbor not in nodes:
+                    del self.reverse_structure[neighbor][node]
+            for neighbor in self.reverse_structure[node]:
+                if neighbor not in nodes:
+                    del self.graph_structure[neighbor][node]
+        for node in nodes:
+            del self.graph_structure[node]
+            del self.reverse_structure[node]
+            del self.graph_info[node]
+        self.spatial_index = None
 
     def removeEdge(self, node_id, neighbor_id, oriented=False):
         """
         Delete an edge from the graph.
         """
         del self.graph_structure[node_id][neighbor_id]
+        del self.reverse_structure[neighbor_id][node_id]
         if oriented == False:
             del self.graph_structure[neighbor_id][node_id]
+            del self.reverse_structure[node_id][neighbor_id]
 
     def remove_isolated_nodes(self):
         """
-        Remove nodes with no relation.
+        Remove nodes with no relation (no edge in or out).
         """
         isolated_nodes = [
             node
-            for node in list(self.graph_structure.keys())
-            if self.graph_structure[node] == {}
+            for node, neighbors in self.graph_structure.items()
+            if not neighbors and not self.reverse_structure[node]
         ]
-        for node in isolated_nodes:
-            self.removeNode(node)
+        self.remove_nodes(isolated_nodes)
         return len(isolated_nodes)
 
-    def remove_islands(self):
+    def remove_islands(self, strong=False):
         """
-        Reduce to the biggest connected graph.
+        Reduce to the biggest connected graph. If strong is True, the
+        biggest strongly connected component is kept: every node can be
+        reached from every other one, one-way streets included.
+        Return statistics on the components.
         """
-        remove = isolated.RemoveIslands(self)
-        biggest_connected_graph = remove.getNodesIslands()
-
-        for node in list(self.graph_structure.keys()):
-            if node not in biggest_connected_graph:
-                self.removeNode(node)
+        components = isolated.RemoveIslands(self).components(strong)
+        self.remove_nodes(node for component in components[1:] for node in component)
+        return isolated.statistics(components)
 
     def len_way(self, way):
         """
@@ -163,14 +223,15 @@ class Graph(object):
         """
         Returns the time needed to cross a way.
         """
-        way_list = list(zip(way, way[1:]))
-        return sum(
-            [
-                self.graph_structure[edge[0]][edge[1]].distance
-                / (self.graph_structure[edge[0]][edge[1]].speed * 1000)
-                for edge in way_list
-            ]
-        )
+        time = 0
+        for fromnode, tonode in zip(way, way[1:]):
+            edge = self.graph_structure[fromnode][tonode]
+            if edge.time is None:
+                # edges of the graphs serialized before the times existed
+                time += edge_time(edge.distance, edge.speed)
+            else:
+                time += edge.time
+        return time
 
     def average_speed(self, path):
         """
@@ -183,20 +244,63 @@ class Graph(object):
         except ZeroDivisionError:
             return 90
 
+    def build_spatial_index(self):
+        """
+        Builds the KD-tree of the nodes used by osm_node_from_coordinates.
+        The index is dropped when nodes are added or removed.
+        """
+        self.spatial_ids = list(self.graph_info.keys())
+        self.spatial_index = spatial.KDTree(
+            [self.graph_info[node].latitude for node in self.spatial_ids],
+            [self.graph_info[node].longitude for node in self.spatial_ids],
+        )
+        return self.spatial_index
+
+    def nearest_nodes(self, latitude, longitude, k):
+        """
+        Return the OSM ids of the k closest nodes of a point.
+        """
+        if self.spatial_index is None:
+            self.build_spatial_index()
+        return [
+            self.spatial_ids[i]
+            for i in self.spatial_index.k_nearest(latitude, longitude, k)
+        ]
+
+    def nodes_within(self, latitude, longitude, radius):
+        """
+        Return the OSM ids of the nodes at less than radius meters
+        of a point, closest first.
+        """
+        if self.spatial_index is None:
+            self.build_spatial_index()
+        return [
+            self.spatial_ids[i]
+            for i in self.spatial_index.within(latitude, longitude, radius)
+        ]
+
+    def osm_nodes_from_coordinates(self, coordinates):
+        """
+        Batch version of osm_node_from_coordinates for a list of
+        (latitude, longitude).
+        """
+        if self.spatial_index is None:
+            self.build_spatial_index()
+        result = []
+        for i in self.spatial_index.nearest_many(coordinates):
+            node = self.graph_info[self.spatial_ids[i]]
+            result.append((node.osm_id, node.latitude, node.longitude))
+        return result
+
     def osm_node_from_coordinates(self, latitude, longitude):
         """
         Given a point in the map (latitude, longitude)
         returns the closest OSM node of the graph.
         """
-        result = None
-        distance_min = float("inf")
-        for node in list(self.graph_info.values()):
-            distance = utils.EarthDistance(
-                (latitude, longitude), (node.latitude, node.longitude)
-            )
-            if distance <= distance_min:
-                distance_min = distance
-                result = node
+        if self.spatial_index is None:
+            self.build_spatial_index()
+        i = self.spatial_index.nearest(latitude, longitude)
+        result = self.graph_info[self.spatial_ids[i]]
         return result.osm_id, result.latitude, result.longitude
 
     def nb_nodes(self):
@@ -276,13 +380,13 @@ class Graph(object):
         """
         return repr(self.graph_structure)
 
-    def addWay(self, refs, oneway, speed_limit=50):
+    def addWay(self, refs, oneway, speed_limit=50, highway=None):
         """
         Add a way in the list of ways.
         A way is a sorted list of OSM node.
         In the graph a way could be composed of directed edges.
         """
-        way = Way(refs, oneway, speed_limit)
+        way = Way(refs, oneway, speed_limit, highway)
         # add the new way
         self.ways.append(way)
 
@@ -295,28 +399,75 @@ class Graph(object):
                 print("Key Error with node id:", ref)
                 pass
 
-    def addEdge(self, fromnode, tonode, distance, speed_limit=None, oneway=False):
-        """
-        Add a directed edge with a cost (distance).
-        An edge is a part of a way.
-        """
+    def addEdge(
+        self,
+        fromnode,
+        tonode,
+        distance,
+        speed_limit=None,
+        oneway=False,
+        highway=None,
+    ):
+        """
+        Add a directed edge with a cost (distance) and the time
+        needed to cross it at speed_limit.
+        An edge is a part of a way, highway is its road class.
+        """
+        time = edge_time(distance, speed_limit)
         self.graph_structure[fromnode][tonode] = Edge(
-            fromnode, tonode, None, distance, speed_limit
-        )  # TODO: None should be the time
+            fromnode, tonode, time, distance, speed_limit, highway
+        )
         if not oneway:
             self.graph_structure[tonode][fromnode] = Edge(
-                tonode, fromnode, None, distance, speed_limit
+                tonode, fromnode, time, distance, speed_limit, highway
             )
         else:
             self.graph_structure[tonode][fromnode] = Edge(
-                tonode, fromnode, None, float("inf"), speed_limit
+                tonode, fromnode, float("inf"), float("inf"), speed_limit, highway
             )
+        self.reverse_structure[tonode][fromnode] = self.graph_structure[fromnode][
+            tonode
+        ]
+        self.reverse_structure[fromnode][tonode] = self.graph_structure[tonode][
+            fromnode
+        ]
 
-    def create_graph_structure(self):
+    def addRestriction(self, fromnode, via, tonode, only=False):
+        """
+        Forbids the turn fromnode -> via -> tonode. With only, the turn
+        is the only one allowed from fromnode at via.
+        """
+        self.restrictions.append((fromnode, via, tonode, only))
+
+    def compact(self):
+        """
+        Return the frozen CompactGraph form of the graph, used for
+        the queries.
+        """
+        return CompactGraph.from_graph(self)
+
+    def simplify(self):
+        """
+        Return the SimplifiedGraph of the graph: the chains of nodes
+        used by one way only are contracted.
+        """
+        compact_graph = self.compact()
+        uses = [self.graph_info[osm_id].use for osm_id in compact_graph.osm_ids]
+        return SimplifiedGraph.from_graph(compact_graph, uses)
+
+    def create_graph_structure(self, compact=False, jobs=1):
         """
         Creates the structure of the graph with the nodes that were
         previously stored in self.ways.
+
+        If compact is True, the dictionaries of edges are not created
+        and a CompactGraph is directly returned.
+        The edges are computed by jobs processes.
         """
+        if compact:
+            return CompactGraph.from_ways(
+                self.graph_info, self.ways, jobs, self.restrictions
+            )
 
         # Option 1 - Keep only the fist and last node of ways (save CPU usage but less accurate).
         # for way in self.ways:
@@ -330,24 +481,17 @@ class Graph(object):
         # pass
 
         # Option 2 - All nodes are loaded in the graph (more CPU usage and more accurate).
-        for way in self.ways:
-            try:
-                for fromnode, tonode in zip(way.refs, way.refs[1:]):
-                    distance = utils.EarthDistance(
-                        (
-                            self.graph_info[fromnode].latitude,
-                            self.graph_info[fromnode].longitude,
-                        ),
-                        (
-                            self.graph_info[tonode].latitude,
-                            self.graph_info[tonode].longitude,
-                        ),
-                    )
-                    self.addEdge(
-                        fromnode, tonode, distance, way.speed_limit, way.oneway
-                    )
-            except:
-                pass
+        # The lengths of all the edges are computed in one vectorized pass.
+        segments, lengths = way_segments(self.graph_info, self.ways, jobs)
+        for (fromnode, tonode, way), distance in zip(segments, lengths.tolist()):
+            self.addEdge(
+                fromnode,
+                tonode,
+                distance,
+                way.speed_limit,
+                way.oneway,
+                getattr(way, "highway", None),
+            )
 
 
 if __name__ == "__main__":
@@ -385,3 +529,7 @@ if __name__ == "__main__":
     dj = dijkstra.Dijkstra(graph.graph_structure, "A")
     shortest_path, distance = dj.get("D")
     print(shortest_path, distance)
+    bdj = dijkstra.BidirectionalDijkstra(
+        graph.graph_structure, graph.reverse_structure, "A"
+    )
+    print(bdj.get("D"))
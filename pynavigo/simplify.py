@@ -0,0 +1,326 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+from array import array
+
+from .compactgraph import CompactGraph, DEFAULT_SPEED
+from .engine import DijkstraEngine
+from .snapping import SnappedLocation
+
+
+class SimplifiedGraph(CompactGraph):
+    """
+    CompactGraph whose chains of degree-2 nodes (shape points of the
+    ways) are contracted: an edge goes from an intersection to the next
+    one and its distance is the sum of the distances of the chain. The
+    speed of the edge is such that its travel time is the sum of the
+    travel times of the chain, which is stored as the time of the edge.
+
+    The contracted nodes of the edge k (OSM ids, in the order of
+    travel) are geometry[geometry_offsets[k]:geometry_offsets[k + 1]],
+    geometry_distances giving their distance from the tail of the edge.
+    Two edges never have the same tail and head, so a path of the
+    graph (list of nodes) can be expanded back to the full path.
+    """
+
+    def __init__(
+        self,
+        osm_ids,
+        latitudes,
+        longitudes,
+        offsets,
+        targets,
+        distances,
+        speeds,
+        geometry_offsets,
+        geometry,
+        geometry_distances,
+        original,
+        travel_times=None,
+        road_classes=None,
+    ):
+        CompactGraph.__init__(
+            self,
+            osm_ids,
+            latitudes,
+            longitudes,
+            offsets,
+            targets,
+            distances,
+            speeds,
+            travel_times=travel_times,
+            road_classes=road_classes,
+        )
+        self.geometry_offsets = geometry_offsets
+        self.geometry = geometry
+        self.geometry_distances = geometry_distances
+        self.original = original
+        self.engine = None
+        # OSM id of a contracted node -> position in geometry
+        self.contracted = {}
+        for position, osm_id in enumerate(geometry):
+            self.contracted.setdefault(osm_id, position)
+        # edge of each position of geometry
+        self.geometry_edges = array("i", bytes(4 * len(geometry)))
+        for k in range(len(targets)):
+            for position in range(geometry_offsets[k], geometry_offsets[k + 1]):
+                self.geometry_edges[position] = k
+
+    @classmethod
+    def from_graph(cls, graph, uses=None):
+        """
+        Contracts the chains of a CompactGraph. A node is contracted if
+        it has two neighbors and can be crossed in one or both
+        directions (not a one way entrance into a two way street). If
+        uses (number of ways of each node index, Node.use) is given,
+        the nodes shared by several ways are kept.
+        """
+        nb_nodes = graph.nb_nodes()
+        offsets, heads = graph.offsets, graph.targets
+        reverse = graph.reverse()
+        interior = [False] * nb_nodes
+        for i in range(nb_nodes):
+            if uses is not None and uses[i] > 1:
+                continue
+            successors = set(heads[offsets[i] : offsets[i + 1]])
+            predecessors = set(
+                reverse.targets[reverse.offsets[i] : reverse.offsets[i + 1]]
+            )
+            if i in successors:
+                continue
+            if len(successors) == 2 and successors == predecessors:
+                interior[i] = True
+            elif (
+                len(successors) == 1
+                and len(predecessors) == 1
+                and successors != predecessors
+            ):
+                interior[i] = True
+
+        def next_edge(w, previous):
+            # the edge from w to the neighbor which is not the previous node
+            for l in range(offsets[w], offsets[w + 1]):
+                if heads[l] != previous:
+                    return l
+
+        times = graph.times()
+        while True:
+            chains = []
+            visited = [False] * nb_nodes
+            for u in range(nb_nodes):
+                if interior[u]:
+                    continue
+                for k in range(offsets[u], offsets[u + 1]):
+                    nodes, distances = [], []
+                    distance, time = graph.distances[k], times[k]
+                    previous, w = u, heads[k]
+                    while interior[w]:
+                        visited[w] = True
+                        nodes.append(w)
+                        distances.append(distance)
+                        # the neighbor of w which is not the previous node
+                        l = next_edge(w, previous)
+                        distance += graph.distances[l]
+                        time += times[l]
+                        previous, w = w, heads[l]
+                    chains.append(
+                        (u, w, nodes, distances, distance, time, graph.road_classes[k])
+                    )
+
+            # Cycles with no intersection: one of their nodes is kept.
+            # Chains with the same tail and head (parallel or loops):
+            # a node of all but one of them is kept.
+            kept = []
+            for i in range(nb_nodes):
+                if interior[i] and not visited[i]:
+                    kept.append(i)
+                    previous, w = i, heads[offsets[i]]
+                    while w != i:
+                        visited[w] = True
+                        previous, w = w, heads[next_edge(w, previous)]
+            pairs = {}
+            for u, v, nodes, _, _, _, _ in chains:
+                # the two directions of a chain have the same nodes
+                chain = min(nodes[0], nodes[-1]) if nodes else -1
+                pairs.setdefault((u, v), set()).add(chain)
+                if u == v and nodes:
+                    kept.append(nodes[len(nodes) // 2])
+            for chain_ids in pairs.values():
+                kept.extend(sorted(chain_ids)[1:] if len(chain_ids) > 1 else [])
+            if not kept:
+                break
+            for i in kept:
+                interior[i] = False
+
+        nodes = [i for i in range(nb_nodes) if not interior[i]]
+        renumber = {i: n for n, i in enumerate(nodes)}
+        osm_ids = array("q", (graph.osm_ids[i] for i in nodes))
+        latitudes = array("d", (graph.latitudes[i] for i in nodes))
+        longitudes = array("d", (graph.longitudes[i] for i in nodes))
+        new_offsets = array("q", [0])
+        targets, distances, speeds = array("i"), array("d"), array("d")
+        travel_times, road_classes = array("d"), array("B")
+        geometry_offsets, geometry, geometry_distances = (
+            array("q", [0]),
+            array("q"),
+            array("d"),
+        )
+        # the chains are grouped by tail, in the order of the nodes
+        position = 0
+        for u in nodes:
+            while position < len(chains) and chains[position][0] == u:
+                _, v, chain, chain_distances, distance, time, road = chains[position]
+                position += 1
+                targets.append(renumber[v])
+                distances.append(distance)
+                speeds.append(distance / (time * 1000) if time > 0 else DEFAULT_SPEED)
+                travel_times.append(time)
+                # the road class of the first edge of the chain
+                road_classes.append(road)
+                geometry.extend(graph.osm_ids[i] for i in chain)
+                geometry_distances.extend(chain_distances)
+                geometry_offsets.append(len(geometry))
+            new_offsets.append(len(targets))
+        return cls(
+            osm_ids,
+            latitudes,
+            longitudes,
+            new_offsets,
+            targets,
+            distances,
+            speeds,
+            geometry_offsets,
+            geometry,
+            geometry_distances,
+            graph,
+            travel_times,
+            road_classes,
+        )
+
+    def locate(self, osm_id):
+        """
+        Return the OSM id of a node of the graph or, for a contracted
+        node, the SnappedLocation of the node on its edge, usable as
+        source or target of DijkstraEngine.route.
+        """
+        position = self.contracted.get(osm_id)
+        if position is None:
+            return osm_id
+        k = self.geometry_edges[position]
+        u = self.tail(k)
+        v = self.targets[k]
+        latitude, longitude = self.original.coordinates(self.original.index[osm_id])
+        # a chain of zero length: the node is at the tail
+        fraction = 0.0
+        if self.distances[k] > 0:
+            fraction = self.geometry_distances[position] / self.distances[k]
+        return SnappedLocation(
+            self,
+            u,
+            v,
+            fraction,
+            self.distances[k],
+            True,
+            self.two_way(k),
+            latitude,
+            longitude,
+            0.0,
+        )
+
+    def two_way(self, k):
+        """
+        Return True if the chain of the edge k can also be followed
+        in the other direction.
+        """
+        u, v = self.tail(k), self.targets[k]
+        twin = self.edge(v, u)
+        return (
+            twin is not None
+            and self.geometry_offsets[twin] < self.geometry_offsets[twin + 1]
+            and self.geometry[self.geometry_offsets[twin]]
+            == self.geometry[self.geometry_offsets[k + 1] - 1]
+        )
+
+    def tail(self, k):
+        """
+        Return the node index at the origin of the edge k.
+        """
+        low, high = 0, self.nb_nodes()
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.offsets[middle] <= k:
+                low = middle
+            else:
+                high = middle
+        return low
+
+    def partial(self, osm_id, end):
+        """
+        Return the contracted nodes from osm_id (included) to the end
+        (OSM id, excluded) of its edge.
+        """
+        position = self.contracted[osm_id]
+        k = self.geometry_edges[position]
+        start, stop = self.geometry_offsets[k], self.geometry_offsets[k + 1]
+        if self.osm_ids[self.targets[k]] == end:
+            return list(self.geometry[position:stop])
+        return list(self.geometry[start : position + 1])[::-1]
+
+    def expand(self, path, source=None, target=None):
+        """
+        Return the full path (OSM ids of the original graph) of a path
+        of the graph. source and target are the OSM ids given to the
+        query when they may be contracted nodes.
+        """
+        contracted = self.contracted
+        if not path:
+            if source in contracted and target in contracted:
+                p, q = contracted[source], contracted[target]
+                k = self.geometry_edges[p]
+                if k == self.geometry_edges[q] and p <= q:
+                    return list(self.geometry[p : q + 1])
+                if k == self.geometry_edges[q] and self.two_way(k):
+                    return list(self.geometry[q : p + 1])[::-1]
+            return []
+        result = []
+        if source in contracted:
+            result.extend(self.partial(source, path[0]))
+        index = self.index
+        for fromnode, tonode in zip(path, path[1:]):
+            result.append(fromnode)
+            k = self.edge(index[fromnode], index[tonode])
+            result.extend(
+                self.geometry[self.geometry_offsets[k] : self.geometry_offsets[k + 1]]
+            )
+        result.append(path[-1])
+        if target in contracted:
+            result.extend(self.partial(target, path[-1])[::-1])
+        return result
+
+    def route(self, source, target, metric="distance"):
+        """
+        Shortest path between two nodes (OSM ids) of the original graph,
+        computed on the simplified graph. Return (path, cost) like
+        DijkstraEngine.route, with the full path.
+        """
+        if source == target:
+            return ([source], 0.0)
+        if self.engine is None:
+            self.engine = DijkstraEngine(self)
+        path, cost = self.engine.route(self.locate(source), self.locate(target), metric)
+        path = self.expand(path, source, target)
+        return (path, cost) if path else ([], 0)
+
+    def __repr__(self):
+        return "<SimplifiedGraph nodes=%s edges=%s contracted=%s>" % (
+            self.nb_nodes(),
+            self.nb_edges(),
+            len(self.contracted),
+        )
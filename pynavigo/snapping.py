@@ -0,0 +1,249 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import math
+from array import array
+
+from . import utils
+
+# size (in degrees) of the cells of the grid
+CELL_SIZE = 0.002
+
+
+class SnappedLocation(object):
+    """
+    A point of the map projected on a segment (edge) of the graph.
+
+    u and v are the node indices of the segment, fraction the position
+    of the projection between u (0) and v (1), length the length of the
+    segment in meters and forward/backward tell if the edges u -> v
+    and v -> u exist (one way streets).
+    """
+
+    def __init__(
+        self,
+        graph,
+        u,
+        v,
+        fraction,
+        length,
+        forward,
+        backward,
+        latitude,
+        longitude,
+        distance,
+    ):
+        self.graph = graph
+        self.u = u
+        self.v = v
+        self.fraction = fraction
+        self.length = length
+        self.forward = forward
+        self.backward = backward
+        self.latitude = latitude
+        self.longitude = longitude
+        self.distance = distance
+
+    @property
+    def edge(self):
+        """
+        OSM ids of the nodes of the segment.
+        """
+        return self.graph.osm_ids[self.u], self.graph.osm_ids[self.v]
+
+    @property
+    def node(self):
+        """
+        OSM id of the closest end of the segment.
+        """
+        return self.graph.osm_ids[self.u if self.fraction <= 0.5 else self.v]
+
+    def weight(self, fromnode, tonode, metric="distance"):
+        """
+        Return the cost of the whole edge fromnode -> tonode of the
+        segment for a metric (see CompactGraph.weights).
+        """
+        if metric == "distance":
+            return self.length
+        return self.graph.weights(metric)[self.graph.edge(fromnode, tonode)]
+
+    def sources(self, metric="distance"):
+        """
+        (node index, cost) of the nodes which can be reached from the
+        location, used to start a search.
+        """
+        result = []
+        if self.forward:
+            result.append(
+                (self.v, (1 - self.fraction) * self.weight(self.u, self.v, metric))
+            )
+        if self.backward:
+            result.append((self.u, self.fraction * self.weight(self.v, self.u, metric)))
+        return result
+
+    def targets(self, metric="distance"):
+        """
+        (node index, cost) of the nodes from which the location can be
+        reached, used to end a search.
+        """
+        result = []
+        if self.forward:
+            result.append((self.u, self.fraction * self.weight(self.u, self.v, metric)))
+        if self.backward:
+            result.append(
+                (self.v, (1 - self.fraction) * self.weight(self.v, self.u, metric))
+            )
+        return result
+
+    def direct_cost(self, other, metric="distance"):
+        """
+        Cost from this location to an other location of the same
+        segment without leaving it, or None.
+        """
+        if (self.u, self.v) != (other.u, other.v):
+            return None
+        delta = other.fraction - self.fraction
+        if delta >= 0 and self.forward:
+            return delta * self.weight(self.u, self.v, metric)
+        if delta <= 0 and self.backward:
+            return -delta * self.weight(self.v, self.u, metric)
+        return None
+
+    def __repr__(self):
+        return "<SnappedLocation %s -> %s at %.3f, %.1f m>" % (
+            self.edge[0],
+            self.edge[1],
+            self.fraction,
+            self.distance,
+        )
+
+
+class SegmentIndex(object):
+    """
+    Uniform latitude/longitude grid of the segments of a CompactGraph.
+
+    Each segment (pair of nodes linked in one or both directions) is
+    stored once, in all the cells its bounding box overlaps.
+    """
+
+    def __init__(self, graph, cell_size=CELL_SIZE):
+        self.graph = graph
+        self.cell_size = cell_size
+        self.seg_u, self.seg_v = array("i"), array("i")
+        self.seg_length = array("d")
+        # position of the edges u -> v and v -> u, or -1
+        self.seg_forward, self.seg_backward = array("q"), array("q")
+        self.cells = {}
+
+        segments = {}
+        offsets, targets = graph.offsets, graph.targets
+        for i in range(graph.nb_nodes()):
+            for k in range(offsets[i], offsets[i + 1]):
+                j = targets[k]
+                key = (i, j) if i < j else (j, i)
+                if key not in segments:
+                    segments[key] = [-1, -1]
+                segments[key][0 if i < j else 1] = k
+        for (u, v), (forward, backward) in segments.items():
+            segment = len(self.seg_u)
+            self.seg_u.append(u)
+            self.seg_v.append(v)
+            self.seg_forward.append(forward)
+            self.seg_backward.append(backward)
+            self.seg_length.append(
+                graph.distances[forward if forward != -1 else backward]
+            )
+            lat_u, lon_u = graph.coordinates(u)
+            lat_v, lon_v = graph.coordinates(v)
+            row_min, col_min = self.cell(min(lat_u, lat_v), min(lon_u, lon_v))
+            row_max, col_max = self.cell(max(lat_u, lat_v), max(lon_u, lon_v))
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    self.cells.setdefault((row, col), []).append(segment)
+
+    def cell(self, latitude, longitude):
+        """
+        Return the (row, column) of the cell of a point.
+        """
+        return (
+            int(math.floor(latitude / self.cell_size)),
+            int(math.floor(longitude / self.cell_size)),
+        )
+
+    def project(self, segment, latitude, longitude):
+        """
+        Projects a point on a segment in a local plane centered on the
+        point (equirectangular projection).
+        Return (distance in meters, fraction).
+        """
+        graph = self.graph
+        lat_u, lon_u = graph.coordinates(self.seg_u[segment])
+        lat_v, lon_v = graph.coordinates(self.seg_v[segment])
+        radius = utils.CalcRad(latitude)
+        scale_y = utils.Deg2Rad(radius)
+        scale_x = scale_y * math.cos(utils.Deg2Rad(latitude))
+        ux, uy = (lon_u - longitude) * scale_x, (lat_u - latitude) * scale_y
+        vx, vy = (lon_v - longitude) * scale_x, (lat_v - latitude) * scale_y
+        dx, dy = vx - ux, vy - uy
+        squared_length = dx * dx + dy * dy
+        if squared_length == 0:
+            fraction = 0.0
+        else:
+            fraction = min(1.0, max(0.0, -(ux * dx + uy * dy) / squared_length))
+        px, py = ux + fraction * dx, uy + fraction * dy
+        return math.sqrt(px * px + py * py), fraction
+
+    def snap(self, latitude, longitude, max_rings=50):
+        """
+        Return the SnappedLocation of the closest segment of a point, or
+        None if there is no segment in the max_rings rings of cells
+        around it.
+        """
+        row, col = self.cell(latitude, longitude)
+        # smallest distance covered by one ring of cells
+        ring_size = utils.Deg2Rad(utils.CalcRad(latitude)) * self.cell_size
+        ring_size *= math.cos(utils.Deg2Rad(latitude))
+        best, best_segment, best_fraction = float("inf"), -1, 0.0
+        seen = set()
+        for ring in range(max_rings + 1):
+            if best <= (ring - 1) * ring_size:
+                break
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if ring and abs(r - row) != ring and abs(c - col) != ring:
+                        continue
+                    for segment in self.cells.get((r, c), ()):
+                        if segment in seen:
+                            continue
+                        seen.add(segment)
+                        distance, fraction = self.project(segment, latitude, longitude)
+                        if distance < best:
+                            best, best_segment, best_fraction = (
+                                distance,
+                                segment,
+                                fraction,
+                            )
+        if best_segment == -1:
+            return None
+        u, v = self.seg_u[best_segment], self.seg_v[best_segment]
+        lat_u, lon_u = self.graph.coordinates(u)
+        lat_v, lon_v = self.graph.coordinates(v)
+        return SnappedLocation(
+            self.graph,
+            u,
+            v,
+            best_fraction,
+            self.seg_length[best_segment],
+            self.seg_forward[best_segment] != -1,
+            self.seg_backward[best_segment] != -1,
+            lat_u + best_fraction * (lat_v - lat_u),
+            lon_u + best_fraction * (lon_v - lon_u),
+            best,
+        )
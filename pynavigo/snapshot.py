@@ -0,0 +1,245 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import os
+import sys
+import mmap
+import pickle
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+from .compactgraph import CompactGraph
+
+MAGIC = b"PYNAVSNP"
+VERSION = 5
+# magic, version, byte order (1 for little endian), number of nodes, of
+# edges and of forbidden turns (0 in the headers before the version 4),
+# size and modification time of the file the graph was built from (0 if
+# unknown and in the headers before the version 5)
+HEADER = struct.Struct("<8sIIqqqqd")
+HEADER_SIZE = 64
+
+# (name, typecode, size) of the arrays stored after the header, the size
+# being "n" (number of nodes), "n+1", "m" (number of edges) or "2r"
+# (pairs of edges of the forbidden turns)
+SECTIONS = (
+    ("osm_ids", "q", "n"),
+    ("latitudes", "d", "n"),
+    ("longitudes", "d", "n"),
+    ("offsets", "q", "n+1"),
+    ("sorted_ids", "q", "n"),
+    ("sorted_positions", "q", "n"),
+    ("targets", "i", "m"),
+    ("distances", "d", "m"),
+    ("speeds", "d", "m"),
+    ("times", "d", "m"),
+    ("road_classes", "B", "m"),
+    ("restrictions", "i", "2r"),
+)
+# number of sections of each version: no travel times in the version 1
+# (computed when needed), no road classes before the version 3 and no
+# turn restrictions before the version 4
+NB_SECTIONS = {
+    1: len(SECTIONS) - 3,
+    2: len(SECTIONS) - 2,
+    3: len(SECTIONS) - 1,
+    4: len(SECTIONS),
+    VERSION: len(SECTIONS),
+}
+
+
+class SortedIndex(Mapping):
+    """
+    Read-only mapping OSM id -> node index backed by two arrays: the
+    sorted OSM ids and the node index of each of them (binary search).
+    Unlike a dictionary it costs nothing to build and its memory is
+    shared when the arrays are memory-mapped.
+    """
+
+    def __init__(self, sorted_ids, sorted_positions):
+        self.sorted_ids = sorted_ids
+        self.sorted_positions = sorted_positions
+
+    def __getitem__(self, osm_id):
+        position = bisect_left(self.sorted_ids, osm_id)
+        if position < len(self.sorted_ids) and self.sorted_ids[position] == osm_id:
+            return self.sorted_positions[position]
+        raise KeyError(osm_id)
+
+    def __iter__(self):
+        return iter(self.sorted_ids)
+
+    def __len__(self):
+        return len(self.sorted_ids)
+
+
+def section_length(size, nb_nodes, nb_edges, nb_restrictions=0):
+    return {
+        "n": nb_nodes,
+        "n+1": nb_nodes + 1,
+        "m": nb_edges,
+        "2r": 2 * nb_restrictions,
+    }[size]
+
+
+def padding(position):
+    """
+    Number of bytes needed to align position on 8 bytes.
+    """
+    return -position % 8
+
+
+def stamp(source):
+    """
+    Return the (size, modification time) of the file a graph is built
+    from, or (0, 0.0) if there is none.
+    """
+    if source is None:
+        return (0, 0.0)
+    status = os.stat(source)
+    return (status.st_size, status.st_mtime)
+
+
+def save(graph, path, source=None):
+    """
+    Writes a CompactGraph in a snapshot file, with the stamp of the file
+    source it was built from. The file is replaced at once: the
+    processes which map the previous one keep it.
+    """
+    nb_nodes, nb_edges = graph.nb_nodes(), graph.nb_edges()
+    order = sorted(range(nb_nodes), key=graph.osm_ids.__getitem__)
+    arrays = {
+        "sorted_ids": array("q", (graph.osm_ids[i] for i in order)),
+        "sorted_positions": array("q", order),
+    }
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as snapshot:
+        nb_restrictions = len(graph.restrictions) // 2
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            sys.byteorder == "little",
+            nb_nodes,
+            nb_edges,
+            nb_restrictions,
+            *stamp(source)
+        )
+        snapshot.write(header + bytes(HEADER_SIZE - len(header)))
+        for name, typecode, size in SECTIONS:
+            values = arrays.get(name)
+            if values is None:
+                values = graph.times() if name == "times" else getattr(graph, name)
+            data = array(typecode, values).tobytes()
+            assert len(data) == array(typecode).itemsize * section_length(
+                size, nb_nodes, nb_edges, nb_restrictions
+            )
+            snapshot.write(data + bytes(padding(len(data))))
+    os.replace(temporary, path)
+
+
+def load(path, source=None):
+    """
+    Maps a snapshot file in memory and return a CompactGraph whose
+    arrays are views of the file: loading is immediate and the
+    pages are shared by all the processes which load the same file.
+
+    Raise ValueError if the file is not a complete snapshot, or, with
+    the file source the graph is built from, if the snapshot is of an
+    older version or was built from another state of source.
+    """
+    with open(path, "rb") as snapshot:
+        mapping = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapping) < HEADER_SIZE:
+        raise ValueError("Truncated snapshot: %s" % path)
+    (
+        magic,
+        version,
+        little_endian,
+        nb_nodes,
+        nb_edges,
+        nb_restrictions,
+        source_size,
+        source_mtime,
+    ) = HEADER.unpack_from(mapping)
+    if magic != MAGIC:
+        raise ValueError("Not a graph snapshot: %s" % path)
+    if version not in NB_SECTIONS:
+        raise ValueError("Unsupported snapshot version %s: %s" % (version, path))
+    if bool(little_endian) != (sys.byteorder == "little"):
+        raise ValueError("Snapshot written on a machine of other byte order.")
+    if source is not None and (
+        version != VERSION or (source_size, source_mtime) != stamp(source)
+    ):
+        raise ValueError("Snapshot out of date: %s" % path)
+
+    sections = []
+    position = HEADER_SIZE
+    for name, typecode, size in SECTIONS[: NB_SECTIONS[version]]:
+        length = array(typecode).itemsize * section_length(
+            size, nb_nodes, nb_edges, nb_restrictions
+        )
+        sections.append((name, typecode, position, length))
+        position += length + padding(length)
+    if position != len(mapping):
+        raise ValueError("Truncated snapshot: %s" % path)
+    buffer = memoryview(mapping)
+    views = {
+        name: buffer[position : position + length].cast(typecode)
+        for name, typecode, position, length in sections
+    }
+
+    graph = CompactGraph(
+        views["osm_ids"],
+        views["latitudes"],
+        views["longitudes"],
+        views["offsets"],
+        views["targets"],
+        views["distances"],
+        views["speeds"],
+        SortedIndex(views["sorted_ids"], views["sorted_positions"]),
+        views.get("times"),
+        views.get("road_classes"),
+        views.get("restrictions"),
+    )
+    # keep the file mapped as long as the graph is used
+    graph.snapshot = mapping
+    return graph
+
+
+def convert(dump_file, snapshot_file=None):
+    """
+    Converts a pickled graph (the .dump files of GraphLoader) to a
+    snapshot file.
+    """
+    if snapshot_file is None:
+        snapshot_file = os.path.splitext(dump_file)[0] + ".snapshot"
+    with open(dump_file, "rb") as dump_graph:
+        # dumps written by Python 2 contain byte strings
+        graph = pickle.load(dump_graph, encoding="latin1")
+    save(graph.compact(), snapshot_file, dump_file)
+    return snapshot_file
+
+
+if __name__ == "__main__":
+    # Point of entry in execution mode: converts a pickled graph.
+    # python -m pynavigo.snapshot ./pynavigo/var/luxembourg-little.osm.dump
+    import time
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m pynavigo.snapshot <graph.dump> [<graph.snapshot>]")
+        sys.exit(1)
+    start = time.time()
+    snapshot_file = convert(*sys.argv[1:3])
+    print(("Snapshot written to", snapshot_file, time.time() - start, "seconds."))
+    start = time.time()
+    graph = load(snapshot_file)
+    print(("Snapshot loaded:", graph, time.time() - start, "seconds."))
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import math
+from array import array
+from heapq import heappush, heapreplace
+
+from . import utils
+
+# number of points in a leaf of the tree
+LEAF_SIZE = 8
+
+
+class KDTree(object):
+    """
+    KD-tree of points given by their latitude and longitude.
+
+    The points are stored as 3D unit vectors: the euclidean distance
+    between two unit vectors (chord) increases with the great-circle
+    distance, so the nearest point for the chord is the nearest point on
+    the Earth. The tree is implicit: a node covers a range of the
+    permutation self.points and is split at its median on the axis with
+    the largest spread.
+
+    The queries return indices in the list of points used to build
+    the tree.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.x, self.y, self.z = array("d"), array("d"), array("d")
+        for latitude, longitude in zip(latitudes, longitudes):
+            vector = utils.UnitVector(latitude, longitude)
+            self.x.append(vector[0])
+            self.y.append(vector[1])
+            self.z.append(vector[2])
+        self.coordinates = (self.x, self.y, self.z)
+        self.points = array("i", range(len(self.x)))
+        # nodes of the tree: (start, end, axis, split value, left, right)
+        self.nodes = []
+        if len(self.points):
+            self.build()
+
+    def build(self):
+        """
+        Builds the tree without recursion.
+        """
+        points = self.points
+        stack = [(0, len(points), -1, None)]
+        while stack:
+            start, end, parent, side = stack.pop()
+            node = len(self.nodes)
+            if parent != -1:
+                self.nodes[parent][side] = node
+            if end - start <= LEAF_SIZE:
+                self.nodes.append([start, end, -1, 0.0, -1, -1])
+                continue
+            spreads = []
+            for values in self.coordinates:
+                selection = [values[i] for i in points[start:end]]
+                spreads.append(max(selection) - min(selection))
+            axis = spreads.index(max(spreads))
+            values = self.coordinates[axis]
+            points[start:end] = array(
+                "i", sorted(points[start:end], key=values.__getitem__)
+            )
+            middle = (start + end) // 2
+            self.nodes.append([start, end, axis, values[points[middle]], -1, -1])
+            stack.append((middle, end, node, 5))
+            stack.append((start, middle, node, 4))
+
+    def search(self, latitude, longitude, k=1, radius=None):
+        """
+        Return the list of (squared chord, point) of the k nearest
+        points, or of all the points closer than the squared chord radius.
+        """
+        if not self.nodes:
+            return []
+        query = utils.UnitVector(latitude, longitude)
+        xs, ys, zs = self.coordinates
+        qx, qy, qz = query
+        # max-heap (negative distances) of the best candidates
+        best = []
+        bound = radius if radius is not None else math.inf
+        stack = [(0, 0.0)]
+        while stack:
+            node, distance = stack.pop()
+            if distance > bound:
+                continue
+            start, end, axis, split, left, right = self.nodes[node]
+            if axis == -1:
+                for i in self.points[start:end]:
+                    d = (xs[i] - qx) ** 2 + (ys[i] - qy) ** 2 + (zs[i] - qz) ** 2
+                    if d > bound:
+                        continue
+                    if radius is not None:
+                        best.append((d, i))
+                    elif len(best) < k:
+                        heappush(best, (-d, i))
+                        if len(best) == k:
+                            bound = -best[0][0]
+                    else:
+                        heapreplace(best, (-d, i))
+                        bound = -best[0][0]
+                continue
+            delta = query[axis] - split
+            near, far = (left, right) if delta < 0 else (right, left)
+            # the far side is at least delta away on this axis
+            stack.append((far, delta * delta))
+            stack.append((near, distance))
+        if radius is not None:
+            return sorted(best)
+        return sorted((-d, i) for d, i in best)
+
+    def nearest(self, latitude, longitude):
+        """
+        Return the index of the nearest point or None.
+        """
+        result = self.search(latitude, longitude, 1)
+        return result[0][1] if result else None
+
+    def k_nearest(self, latitude, longitude, k):
+        """
+        Return the indices of the k nearest points, closest first.
+        """
+        return [i for _, i in self.search(latitude, longitude, k)]
+
+    def within(self, latitude, longitude, radius):
+        """
+        Return the indices of the points at less than radius meters,
+        closest first.
+        """
+        # chord of the angle radius / R, R being the radius of curvature
+        # at the latitude of the query
+        angle = radius / utils.CalcRad(latitude)
+        chord = 2 * math.sin(min(angle, math.pi) / 2)
+        return [i for _, i in self.search(latitude, longitude, radius=chord * chord)]
+
+    def nearest_many(self, coordinates):
+        """
+        Return the index of the nearest point of each (latitude, longitude)
+        of an iterable.
+        The queries are sorted by position so that consecutive queries
+        visit the same parts of the tree.
+        """
+        coordinates = list(coordinates)
+        order = sorted(
+            range(len(coordinates)),
+            key=lambda q: (round(coordinates[q][0], 2), coordinates[q][1]),
+        )
+        result = [None] * len(coordinates)
+        for q in order:
+            result[q] = self.nearest(*coordinates[q])
+        return result
@@ -0,0 +1,274 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import os
+import math
+import datetime
+import configparser
+from bisect import bisect_right
+from heapq import heappush, heappop
+
+from .astar import AStar
+from .compactgraph import ROAD_CLASSES
+from .engine import DijkstraEngine, SearchResult
+
+SPEED_PROFILES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cfg", "speedprofiles.cfg"
+)
+
+# sets of profiles of speedprofiles.cfg
+WEEKDAY, WEEKEND = "weekday", "weekend"
+
+# formats of the times of the clients configurations
+TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M",
+)
+
+
+class SpeedProfile(object):
+    """
+    Piecewise-linear factor of the speed limit over a day: points is
+    the sorted list of (hour, factor), the factor is interpolated
+    between two points and from the last point to the first point of
+    the next day.
+    """
+
+    def __init__(self, points):
+        self.hours = [hour for hour, _ in points]
+        self.factors = [factor for _, factor in points]
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Reads a profile given as "HH:MM factor, HH:MM factor, ...".
+        """
+        points = []
+        for point in value.split(","):
+            moment, factor = point.split()
+            hours, minutes = moment.split(":")
+            points.append((int(hours) + int(minutes) / 60.0, float(factor)))
+        points.sort()
+        if (
+            not points
+            or points[-1][0] >= 24
+            or min(factor for _, factor in points) <= 0
+        ):
+            raise ValueError("Incorrect speed profile: %s" % value)
+        return cls(points)
+
+    def factor(self, hour):
+        """
+        Return the factor of the speed at an hour (of any day).
+        """
+        hour %= 24
+        hours, factors = self.hours, self.factors
+        i = bisect_right(hours, hour)
+        if i == 0:
+            previous_hour, previous = hours[-1] - 24, factors[-1]
+        else:
+            previous_hour, previous = hours[i - 1], factors[i - 1]
+        if i == len(hours):
+            next_hour, next = hours[0] + 24, factors[0]
+        else:
+            next_hour, next = hours[i], factors[i]
+        if next_hour == previous_hour:
+            return previous
+        return previous + (next - previous) * (hour - previous_hour) / (
+            next_hour - previous_hour
+        )
+
+
+def load_speed_profiles(day=WEEKDAY, path=SPEED_PROFILES_FILE):
+    """
+    Load the speed profiles of a set (weekday or weekend). Return the
+    list of the profiles of the road classes (compactgraph.ROAD_CLASSES),
+    the road classes with no profile sharing the default one.
+    """
+    config = configparser.RawConfigParser()
+    if not config.read(path):
+        raise IOError("File of speed profiles not found: %s" % path)
+    profiles = {}
+    if config.has_section(day):
+        for name, value in config.items(day):
+            profiles[name] = SpeedProfile.parse(value)
+    default = profiles.get("default", SpeedProfile([(0.0, 1.0)]))
+    return [profiles.get(name, default) for name in ROAD_CLASSES]
+
+
+def parse_time(value):
+    """
+    Return the datetime of a time of a clients configuration (or of an
+    ISO 8601 time).
+    """
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(value.strip(), time_format)
+        except ValueError:
+            pass
+    raise ValueError("Incorrect time: %s" % value)
+
+
+class TimeDependentEngine(object):
+    """
+    Fastest paths on a CompactGraph when the speed on an edge depends
+    on the time it is entered: the time of an edge is its travel time
+    at the speed limit divided by the factor of the speed profile of
+    its road class. The profiles of the weekdays or of the weekend are
+    used, according to the day of the departure (or of the arrival).
+
+    The queries are Dijkstra (A* for the point-to-point queries, with
+    the heuristic of astar.AStar for the time divided by the highest
+    factor) where the cost of a node is the time elapsed since the
+    departure. The reverse queries search on the reversed graph from
+    the arrival: the departure time from the tail of an edge is found
+    with two fixed-point iterations.
+    """
+
+    def __init__(self, graph, path=SPEED_PROFILES_FILE, country="france"):
+        self.graph = graph
+        self.engine = DijkstraEngine(graph)
+        self.profiles = {
+            WEEKDAY: load_speed_profiles(WEEKDAY, path),
+            WEEKEND: load_speed_profiles(WEEKEND, path),
+        }
+        highest = max(
+            max(profile.factors)
+            for profiles in self.profiles.values()
+            for profile in profiles
+        )
+        self.scale = AStar(graph, "time", country).scale / highest
+
+    def day_profiles(self, moment):
+        """
+        Return the profiles of the road classes for a datetime.
+        """
+        return self.profiles[WEEKEND if moment.weekday() >= 5 else WEEKDAY]
+
+    def query(self, source, departure, targets=None):
+        """
+        Fastest paths from the OSM node source leaving at departure
+        (datetime) to one or many targets (all the nodes if None).
+        Return a SearchResult whose costs are the travel times in hours.
+        """
+        index = self.graph.index
+        if source not in index:
+            return SearchResult(self.graph, self.engine.scratch("time"), source)
+        if targets is not None:
+            if not isinstance(targets, (list, tuple, set, frozenset)):
+                targets = [targets]
+            targets = [index[target] for target in targets if target in index]
+        self.search(index[source], departure, targets)
+        return SearchResult(self.graph, self.engine.scratch("time"), source)
+
+    def route(self, source, target, departure):
+        """
+        Return the fastest path (OSM ids) from source to target leaving
+        at departure (datetime) and its travel time in hours, or ([], 0).
+        """
+        index = self.graph.index
+        if source not in index or target not in index:
+            return ([], 0)
+        self.search(index[source], departure, target=index[target])
+        return SearchResult(self.graph, self.engine.scratch("time"), source).get(target)
+
+    def route_arrival(self, source, target, arrival):
+        """
+        Return the path (OSM ids) from source to target which arrives
+        at arrival (datetime) with the latest departure, and its travel
+        time in hours, or ([], 0).
+        """
+        index = self.graph.index
+        if source not in index or target not in index:
+            return ([], 0)
+        s, t = index[source], index[target]
+        scratch = self.search(t, arrival, target=s, backward=True)
+        if scratch.settled[s] != scratch.generation:
+            return ([], 0)
+        osm_ids, pred = self.graph.osm_ids, scratch.pred
+        path = []
+        i = s
+        while i != -1:
+            path.append(osm_ids[i])
+            i = pred[i]
+        return (path, scratch.dist[s])
+
+    def search(self, source, moment, targets=None, target=None, backward=False):
+        """
+        Time-dependent search from the node index source at moment
+        (departure, or arrival if backward). The search stops when the
+        targets (or the target, with A*) are settled. Return the scratch
+        buffers: dist is the travel time from (or to) source in hours.
+        """
+        graph = self.graph.reverse() if backward else self.graph
+        profiles = self.day_profiles(moment)
+        clock = (
+            moment.hour
+            + moment.minute / 60.0
+            + (moment.second + moment.microsecond / 1e6) / 3600.0
+        )
+        scratch = self.engine.scratch("time")
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads = graph.offsets, graph.targets
+        times, road_classes = graph.times(), graph.road_classes
+
+        remaining = -1
+        is_target = ()
+        if targets is not None:
+            is_target = set(targets)
+            remaining = len(is_target)
+        if target is not None:
+            x, y, z = self.graph.unit_vectors()
+            xt, yt, zt = x[target], y[target], z[target]
+            scale, sqrt = self.scale, math.sqrt
+            is_target, remaining = (target,), 1
+
+        dist[source] = 0.0
+        pred[source] = -1
+        stamp[source] = generation
+        heap = [(0.0, 0.0, source)]
+        while heap and remaining:
+            _, d, v = heappop(heap)
+            if settled[v] == generation:
+                continue
+            settled[v] = generation
+            if v in is_target:
+                remaining -= 1
+                if not remaining:
+                    break
+            for k in range(offsets[v], offsets[v + 1]):
+                w = heads[k]
+                profile = profiles[road_classes[k]]
+                if backward:
+                    # departure from w to arrive at v at clock - d
+                    arrival = clock - d
+                    departure = arrival - times[k] / profile.factor(arrival)
+                    departure = arrival - times[k] / profile.factor(departure)
+                    nd = clock - departure
+                else:
+                    nd = d + times[k] / profile.factor(clock + d)
+                if stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = v
+                    key = nd
+                    if target is not None:
+                        dx, dy, dz = x[w] - xt, y[w] - yt, z[w] - zt
+                        key += scale * sqrt(dx * dx + dy * dy + dz * dz)
+                    heappush(heap, (key, nd, w))
+        return scratch
@@ -0,0 +1,253 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+from array import array
+from heapq import heappush, heappop
+
+from .engine import INFINITY, DijkstraEngine, SearchResult, ShortestPathTree
+from .snapping import SnappedLocation
+
+
+class TurnSearchResult(SearchResult):
+    """
+    Result of a TurnEngine query. The nodes which are the via node of
+    a restriction are labelled by their entering edge: a path can go
+    through such a node twice (a loop to turn legally), so its path is
+    followed state by state.
+    """
+
+    def __init__(self, graph, scratch, source, edge_dist, edge_pred, first):
+        SearchResult.__init__(self, graph, scratch, source)
+        self.edge_dist = edge_dist
+        self.edge_pred = edge_pred
+        self.first = first
+
+    def settled(self, i):
+        self.check()
+        state = self.first.get(i)
+        if state is not None:
+            return True
+        return (
+            i not in self.graph.turn_restrictions()
+            and self.scratch.settled[i] == self.generation
+        )
+
+    def cost_index(self, i):
+        if not self.settled(i):
+            return None
+        return self.state_cost(self.first.get(i, i))
+
+    def state_cost(self, state):
+        nb_nodes = len(self.scratch.dist)
+        if state < nb_nodes:
+            return self.scratch.dist[state]
+        return self.edge_dist[state - nb_nodes]
+
+    def path_indices(self, i):
+        if not self.settled(i):
+            return []
+        nb_nodes, heads = len(self.scratch.dist), self.graph.targets
+        pred, edge_pred = self.scratch.pred, self.edge_pred
+        state = self.first.get(i, i)
+        path = []
+        while state != -1:
+            if state < nb_nodes:
+                path.append(state)
+                state = pred[state]
+            else:
+                path.append(heads[state - nb_nodes])
+                state = edge_pred[state - nb_nodes]
+        path.reverse()
+        return path
+
+    def get(self, end):
+        i = self.graph.index.get(end)
+        if i is None or not self.settled(i):
+            return ([], 0)
+        osm_ids = self.graph.osm_ids
+        return ([osm_ids[j] for j in self.path_indices(i)], self.cost_index(i))
+
+    def tree(self):
+        """
+        Return a copy of the labels of the search (TurnShortestPathTree)
+        which stays valid after the next queries.
+        """
+        self.check()
+        generation, scratch = self.generation, self.scratch
+        nb_nodes = self.graph.nb_nodes()
+        dist = array("d", [INFINITY]) * nb_nodes
+        pred = array("q", [-1]) * nb_nodes
+        for i in range(nb_nodes):
+            if scratch.settled[i] == generation:
+                pred[i] = scratch.pred[i]
+            if self.settled(i):
+                dist[i] = self.cost_index(i)
+        return TurnShortestPathTree(
+            self.graph, self.source, dist, pred, dict(self.edge_pred), self.first
+        )
+
+
+class TurnShortestPathTree(ShortestPathTree):
+    """
+    Shortest paths of a TurnEngine query kept after the query: dist is
+    the cost of each node index, pred the predecessor state of the
+    states of the nodes, edge_pred the one of the states of the edges
+    and first the state of the via nodes (see TurnSearchResult).
+    """
+
+    def __init__(self, graph, source, dist, pred, edge_pred, first):
+        ShortestPathTree.__init__(self, graph, source, dist, pred)
+        self.edge_pred = edge_pred
+        self.first = first
+
+    def get(self, end):
+        i = self.graph.index.get(end)
+        if i is None or self.dist[i] == INFINITY:
+            return ([], 0)
+        nb_nodes, heads, osm_ids = (
+            len(self.dist),
+            self.graph.targets,
+            self.graph.osm_ids,
+        )
+        state = self.first.get(i, i)
+        path = []
+        while state != -1:
+            if state < nb_nodes:
+                path.append(osm_ids[state])
+                state = self.pred[state]
+            else:
+                path.append(osm_ids[heads[state - nb_nodes]])
+                state = self.edge_pred[state - nb_nodes]
+        path.reverse()
+        return (path, self.dist[i])
+
+
+class TurnEngine(DijkstraEngine):
+    """
+    Dijkstra on a CompactGraph which honours its turn restrictions
+    (CompactGraph.turn_restrictions).
+
+    The search is edge-based only where it has to be: a via node of a
+    restriction is labelled once per entering edge (state nb_nodes + k
+    for the edge k), so that the turns forbidden after this edge are
+    skipped, the other nodes keep one label. The overhead compared with
+    DijkstraEngine grows with the number of restricted nodes, not with
+    the size of the graph.
+    """
+
+    def query_indices(self, source, targets=None, metric="distance"):
+        """
+        Same as DijkstraEngine.query_indices, return a TurnSearchResult.
+        """
+        graph = self.graph
+        scratch = self.scratch()
+        generation = scratch.next_generation()
+        dist, pred, stamp, settled = (
+            scratch.dist,
+            scratch.pred,
+            scratch.stamp,
+            scratch.settled,
+        )
+        offsets, heads, weights = (
+            graph.offsets,
+            graph.targets,
+            graph.weights(metric),
+        )
+        turns = graph.turn_restrictions()
+        nb_nodes = len(dist)
+        # labels of the states of the via nodes, by entering edge, and
+        # first state settled at each via node
+        edge_dist, edge_pred, edge_settled, first = {}, {}, set(), {}
+
+        if targets is None:
+            remaining = -1
+            is_target = ()
+        else:
+            is_target = set(targets)
+            remaining = len(is_target)
+
+        if isinstance(source, int):
+            source = [(source, 0.0)]
+        heap = []
+        for node, cost in source:
+            if stamp[node] != generation or cost < dist[node]:
+                dist[node] = cost
+                pred[node] = -1
+                stamp[node] = generation
+                heappush(heap, (cost, node))
+        while heap and remaining:
+            d, state = heappop(heap)
+            if state < nb_nodes:
+                v, entering = state, -1
+                if settled[v] == generation:
+                    continue
+                settled[v] = generation
+            else:
+                entering = state - nb_nodes
+                if entering in edge_settled:
+                    continue
+                edge_settled.add(entering)
+                v = heads[entering]
+            forbidden = ()
+            if v in turns:
+                # a via node is reached first by its best state
+                if v not in first:
+                    first[v] = state
+                    if v in is_target:
+                        remaining -= 1
+                        if not remaining:
+                            break
+                forbidden = turns[v].get(entering, ())
+            elif v in is_target:
+                remaining -= 1
+                if not remaining:
+                    break
+            for k in range(offsets[v], offsets[v + 1]):
+                if k in forbidden:
+                    continue
+                w = heads[k]
+                nd = d + weights[k]
+                if w in turns:
+                    if nd < edge_dist.get(k, INFINITY):
+                        edge_dist[k] = nd
+                        edge_pred[k] = state
+                        heappush(heap, (nd, nb_nodes + k))
+                elif stamp[w] != generation or nd < dist[w]:
+                    stamp[w] = generation
+                    dist[w] = nd
+                    pred[w] = state
+                    heappush(heap, (nd, w))
+        return TurnSearchResult(graph, scratch, source, edge_dist, edge_pred, first)
+
+    def route(self, source, target, metric="distance"):
+        """
+        Point-to-point query between two OSM nodes (or SnappedLocation)
+        with the turn restrictions: one search from source stopped when
+        the entry nodes of target are settled. Return (path, cost) like
+        DijkstraEngine.route.
+        """
+        sources = self.seeds(source, SnappedLocation.sources, metric)
+        targets = self.seeds(target, SnappedLocation.targets, metric)
+        if not sources or not targets:
+            return ([], 0)
+        best, end = INFINITY, -1
+        if isinstance(source, SnappedLocation) and isinstance(target, SnappedLocation):
+            direct = source.direct_cost(target, metric)
+            if direct is not None:
+                best = direct
+        result = self.query_indices(sources, [node for node, _ in targets], metric)
+        for node, cost in targets:
+            reached = result.cost_index(node)
+            if reached is not None and reached + cost < best:
+                best, end = reached + cost, node
+        if end == -1:
+            return ([], 0 if best == INFINITY else best)
+        osm_ids = self.graph.osm_ids
+        return ([osm_ids[i] for i in result.path_indices(end)], best)
@@ -4,9 +4,8 @@
 import math
 import time
 import datetime
-import urllib.request, urllib.parse, urllib.error
-import json
-import io as StringIO
+
+import numpy
 
 # some multipliers for interpreting GPS output
 METERS_TO_FEET = 3.2808399  # Meters to U.S./British feet
@@ -19,32 +18,21 @@ MPS_TO_MPH = 2.2369363  # Meters/second to miles per hour
 MPS_TO_KNOTS = 1.9438445  # Meters per second to knots
 
 
-def translate_address_to_coordinates(address):
+def translate_address_to_coordinates(address, timeout=5):
     """
     Translates an address to coordinates with a request
-    to Google Maps.
+    to Google Maps (see the geocoding module for the cached
+    and offline backends).
 
     >>> print(translateAddressToCoordinates('17 chemin sous les vignes, Montenach'))
     {'lat': 49.4226396, 'lng': 6.378915}
     """
-    urlParams = {
-        "address": address,
-        "sensor": "false",
-    }
-    url = "http://maps.google.com/maps/api/geocode/json?" + urllib.parse.urlencode(
-        urlParams
-    )
-    response = urllib.request.urlopen(url)
-    responseBody = response.read()
-    body = StringIO.StringIO(responseBody)
-    result = json.load(body)
-    if "status" not in result or result["status"] != "OK":
+    from . import geocoding
+
+    try:
+        return geocoding.GoogleBackend().geocode(address, timeout)
+    except geocoding.GeocodingError:
         return None
-    else:
-        return {
-            "lat": result["results"][0]["geometry"]["location"]["lat"],
-            "lng": result["results"][0]["geometry"]["location"]["lng"],
-        }
 
 
 def Deg2Rad(x):
@@ -113,6 +101,65 @@ def EarthDistance(xxx_todo_changeme, xxx_todo_changeme1):
     return CalcRad((lat1 + lat2) / 2) * math.acos(a)
 
 
+def calc_rad_many(lat):
+    """
+    Vectorized CalcRad: radius of curvature in meters for an array
+    of latitudes.
+    """
+    a = 6378.137
+    e2 = 0.081082 * 0.081082
+    sc = numpy.sin(Deg2Rad(lat))
+    x = a * (1.0 - e2)
+    z = 1.0 - e2 * sc * sc
+    return x / numpy.power(z, 1.5) * 1000.0
+
+
+def earth_distance_many(lat1, lon1, lat2, lon2):
+    """
+    Vectorized EarthDistance: distances in meters between the points
+    (lat1[i], lon1[i]) and (lat2[i], lon2[i]) given as arrays (or
+    scalars, broadcast) in degrees.
+    """
+    lat1 = numpy.asarray(lat1, dtype=numpy.float64)
+    lon1 = numpy.asarray(lon1, dtype=numpy.float64)
+    lat2 = numpy.asarray(lat2, dtype=numpy.float64)
+    lon2 = numpy.asarray(lon2, dtype=numpy.float64)
+    r1, r2 = calc_rad_many(lat1), calc_rad_many(lat2)
+    colat1, colat2 = Deg2Rad(90 - lat1), Deg2Rad(90 - lat2)
+    x1 = r1 * numpy.cos(Deg2Rad(lon1)) * numpy.sin(colat1)
+    x2 = r2 * numpy.cos(Deg2Rad(lon2)) * numpy.sin(colat2)
+    y1 = r1 * numpy.sin(Deg2Rad(lon1)) * numpy.sin(colat1)
+    y2 = r2 * numpy.sin(Deg2Rad(lon2)) * numpy.sin(colat2)
+    z1 = r1 * numpy.cos(colat1)
+    z2 = r2 * numpy.cos(colat2)
+    rm = calc_rad_many((lat1 + lat2) / 2)
+    a = (x1 * x2 + y1 * y2 + z1 * z2) / (rm * rm)
+    # same rounding guard as EarthDistance
+    a = numpy.where(numpy.abs(a) > 1, 1.0, a)
+    return rm * numpy.arccos(a)
+
+
+def earth_distance_one_to_many(lat, lon, lats, lons):
+    """
+    Distances in meters from the point (lat, lon) to the points of
+    the arrays lats and lons.
+    """
+    return earth_distance_many(lat, lon, lats, lons)
+
+
+def UnitVector(lat, lon):
+    """
+    Coordinates (x, y, z) on the unit sphere of a point specified
+    in degrees.
+    """
+    lat, lon = Deg2Rad(lat), Deg2Rad(lon)
+    return (
+        math.cos(lat) * math.cos(lon),
+        math.cos(lat) * math.sin(lon),
+        math.sin(lat),
+    )
+
+
 def MeterOffset(xxx_todo_changeme2, xxx_todo_changeme3):
     """
     Return offset in meters of second arg from first.
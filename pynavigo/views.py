@@ -1,62 +1,374 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import re
+import math
+import json
+import time
 import datetime
-from flask import render_template
+import threading
+from collections import OrderedDict
+from flask import render_template, request, abort, jsonify, Response
+from flask import stream_with_context
 
 
-from pynavigo import utils
+from pynavigo import geocoding
 from pynavigo import graphloader
+from pynavigo import timedependent
 from pynavigo import app
 
 
+VAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "var")
+# The files generated from the map (snapshot, caches) are written in the
+# directory given by the PYNAVIGO_DATA_DIR environment variable.
+DATA_DIR = os.environ.get("PYNAVIGO_DATA_DIR", VAR_DIR)
+
 # GL = graphloader.GraphLoader("./pynavigo/var/tests-muriel/trips-cedric.osm.bz2")
-GL = graphloader.GraphLoader("./pynavigo/var/luxembourg-little.osm")
-GRAPH = GL.load_graph()
+GL = graphloader.GraphLoader(
+    os.path.join(VAR_DIR, "luxembourg-little.osm"), data_dir=DATA_DIR
+)
+# The graph and the geocoder are loaded by the first request (see load).
+GEOCODER = None
+LOCK = threading.Lock()
+
+# maximum number of origin/destination pairs of a batch request
+MAX_BATCH_SIZE = 1000
+
+# maximum number of distinct addresses (not coordinates) of a batch
+# request, and seconds given to their geocoding
+MAX_BATCH_ADDRESSES = 100
+BATCH_GEOCODING_TIME = 30
+
+# digits of the weight of the time in a blend of the metrics (at most
+# 9 blends are computed for 1 digit)
+BLEND_DIGITS = 1
+
+# maximum budget of an isochrone request
+MAX_MINUTES = 120
+MAX_METERS = 100000
+
+# maximum number of alternative routes of a request
+MAX_ALTERNATIVES = 3
+
+
+@app.before_request
+def load():
+    """
+    Loads the graph and the geocoder before the first request, so that
+    importing the application has no side effect. The compact graph is
+    memory-mapped, its pages are shared by the workers.
+    """
+    global GEOCODER
+    if GEOCODER is not None:
+        return
+    with LOCK:
+        if GEOCODER is None:
+            GL.load_snapshot()
+            # The addresses of the map are geocoded offline, the others
+            # by Google.
+            GEOCODER = geocoding.Geocoder(
+                [GL.load_gazetteer(), geocoding.GoogleBackend()],
+                cache=geocoding.GeocodingCache(
+                    os.path.join(DATA_DIR, "geocoding.sqlite")
+                ),
+            )
+
+
+def coordinates(point):
+    """
+    Return the (latitude, longitude) of a point given as a pair of
+    numbers or as a "latitude, longitude" string, or None.
+    """
+    if isinstance(point, (list, tuple)) and len(point) == 2:
+        try:
+            return float(point[0]), float(point[1])
+        except (TypeError, ValueError):
+            return None
+    if not isinstance(point, str):
+        return None
+    match = re.match(r"^\s*(-?[\d\.]+)\s*,\s*(-?[\d\.]+)\s*$", point)
+    if match is not None:
+        try:
+            return float(match.group(1)), float(match.group(2))
+        except ValueError:
+            pass
+    return None
+
+
+def locate(point, timeout=None):
+    """
+    Return the (latitude, longitude) of a point given as coordinates
+    (see coordinates) or as an address, or None. timeout bounds the
+    geocoding of an address (see Geocoder.geocode).
+    """
+    location = coordinates(point)
+    if location is not None or not isinstance(point, str):
+        return location
+    location = GEOCODER.geocode(point, timeout)
+    if location is None:
+        return None
+    return location["lat"], location["lng"]
+
+
+def snap(point, timeout=None):
+    """
+    Return the SnappedLocation of a point (see locate) on the closest
+    road segment, or None.
+    """
+    location = locate(point, timeout)
+    if location is None:
+        return None
+    return GL.segment_index.snap(*location)
+
+
+def metric(value):
+    """
+    Return the metric of a request: "distance" (default), "time" or
+    the weight of the time in a blend of both (see
+    CompactGraph.weights), or None. The weight is rounded to
+    BLEND_DIGITS digits: the graph keeps the costs of each blend.
+    """
+    if value in (None, "", "distance"):
+        return "distance"
+    if value == "time":
+        return value
+    try:
+        weight = round(float(value), BLEND_DIGITS)
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= weight <= 1:
+        return None
+    if weight == 0:
+        return "distance"
+    if weight == 1:
+        return "time"
+    return weight
+
+
+def route_json(path, geometry=True, departure=None, destination=None):
+    """
+    Return the JSON object of a route: its distance (meters), its
+    travel time (seconds) and the coordinates of its nodes. With the
+    SnappedLocation of its departure and destination, the parts of
+    their segments are included.
+    """
+    graph = GL.compact_graph
+    points = [graph.coordinates(graph.index[node]) for node in path]
+    distance, hours = graph.len_way(path), graph.time_way(path)
+    found = bool(path)
+    if departure is not None and destination is not None:
+        if path:
+            first, last = graph.index[path[0]], graph.index[path[-1]]
+            distance += dict(departure.sources("distance")).get(first, 0.0)
+            distance += dict(destination.targets("distance")).get(last, 0.0)
+            hours += dict(departure.sources("time")).get(first, 0.0)
+            hours += dict(destination.targets("time")).get(last, 0.0)
+        elif departure.direct_cost(destination) is not None:
+            # along the segment of both locations
+            found = True
+            distance = departure.direct_cost(destination)
+            hours = departure.direct_cost(destination, "time")
+        if found:
+            points.insert(0, (departure.latitude, departure.longitude))
+            points.append((destination.latitude, destination.longitude))
+    result = {
+        "found": found,
+        "distance": distance if found else None,
+        "time": 3600 * hours if found else None,
+    }
+    if geometry:
+        result["path"] = points
+    return result
 
 
 @app.route("/")
-def index(departure=None, destination=None):
-    if departure == None or destination == None:
-        now = datetime.datetime.now().strftime("%Y-%m-%dT%H:%MZ")
+def index():
+    now = datetime.datetime.now().strftime("%Y-%m-%dT%H:%MZ")
+    departure = request.args.get("departure")
+    destination = request.args.get("destination")
+    if departure and destination:
+        # Get the requirements of the user (coordinates or addresses)
+        # and snap them on the closest road segments.
+        departure_location, destination_location = snap(departure), snap(destination)
+        if departure_location is None or destination_location is None:
+            # We don't understand the inputs of the user
+            abort(400, "Incorrect value(s).")
+
+        # The routes are cached by pair of ends of the segments.
+        shortest_path, distance = GL.route_cache.route(
+            departure_location, destination_location
+        )
+        print(shortest_path)
+    return render_template("index.html", now=now)
+
+
+@app.route("/api/route")
+def api_route():
+    """
+    Route between the departure and destination parameters, the
+    shortest for the metric parameter. With a departure_time (or an
+    arrival_time) parameter, the fastest route for the traffic at that
+    time (see timedependent), which is not cached. With alternatives=n,
+    up to n other routes (see alternatives) are given too, only for a
+    route without time on a graph without turn restrictions (the
+    alternatives are computed on the static graph without them).
+    """
+    departure = snap(request.args.get("departure", ""))
+    destination = snap(request.args.get("destination", ""))
+    route_metric = metric(request.args.get("metric"))
+    count = request.args.get("alternatives", "0")
+    if departure is None or destination is None or route_metric is None:
+        return jsonify({"error": "Incorrect value(s)."}), 400
+    if not count.isdigit() or int(count) > MAX_ALTERNATIVES:
+        return jsonify({"error": "Incorrect number of alternatives."}), 400
+    count = int(count)
+    departure_time = request.args.get("departure_time")
+    arrival_time = request.args.get("arrival_time")
+    restricted = len(GL.compact_graph.restrictions) != 0
+    if count and (departure_time or arrival_time or restricted):
+        return jsonify({"error": "No alternatives for this route."}), 400
+    try:
+        # the time-dependent routes are between the closest nodes
+        if departure_time:
+            moment = timedependent.parse_time(departure_time)
+            path, hours = GL.td_engine.route(departure.node, destination.node, moment)
+        elif arrival_time:
+            moment = timedependent.parse_time(arrival_time)
+            path, hours = GL.td_engine.route_arrival(
+                departure.node, destination.node, moment
+            )
+        else:
+            path, _ = GL.route_cache.route(departure, destination, route_metric)
+    except ValueError:
+        return jsonify({"error": "Incorrect time."}), 400
+    if departure_time or arrival_time:
+        result = route_json(path)
+        if path:
+            result["time"] = 3600 * hours
     else:
-        # Get the requirements of the user
-        m_departure = re.search("([ \d\.,]+),([ \d\.,]+)", departure)
-        m_destination = re.search("([ \d\.,]+),([ \d\.,]+)", destination)
-        try:
-            # If inputs are coordinates
-            departure_latitude_original = float(m_departure.group(1))
-            departure_longitude_original = float(m_departure.group(2))
-            destination_latitude_original = float(m_destination.group(1))
-            destination_longitude_original = float(m_destination.group(2))
-        except:
-            # If inputs are addresses
-            departure = utils.translate_address_to_coordinates(departure)
-            destination = utils.translate_address_to_coordinates(destination)
-            if departure == None or destination == None:
-                # We don't understand the inputs of the user
-                return self.error("Incorrect value(s).")
-            departure_latitude_original = departure["lat"]
-            departure_longitude_original = departure["lng"]
-            destination_latitude_original = destination["lat"]
-            destination_longitude_original = destination["lng"]
-
-        (
-            departure_osmid,
-            departure_latitude,
-            departure_longitude,
-        ) = self.graph.osm_node_from_coordinates(
-            departure_latitude_original, departure_longitude_original
+        result = route_json(path, True, departure, destination)
+    if count and result["found"]:
+        routes = GL.alternatives_engine.alternatives(
+            departure, destination, route_metric, count + 1
+        )
+        result["alternatives"] = [
+            route_json(other, True, departure, destination) for other, _ in routes[1:]
+        ]
+    result["departure"], result["destination"] = departure.node, destination.node
+    return jsonify(result)
+
+
+@app.route("/api/isochrone")
+def api_isochrone():
+    """
+    Nodes reachable within a number of minutes (or of meters) from one
+    or many origin parameters, and the polygon of the area with
+    polygon=true. With many origins, each node is assigned to the
+    closest one (service areas). The budget is at most MAX_MINUTES (or
+    MAX_METERS).
+    """
+    origins = [snap(origin) for origin in request.args.getlist("origin")]
+    try:
+        if "minutes" in request.args:
+            budget_metric, limit = "time", MAX_MINUTES
+            budget = float(request.args["minutes"])
+        else:
+            budget_metric, limit = "distance", MAX_METERS
+            budget = float(request.args.get("meters", ""))
+    except ValueError:
+        budget = None
+    if budget is not None and not (math.isfinite(budget) and 0 <= budget <= limit):
+        budget = None
+    if not origins or None in origins or budget is None:
+        return jsonify({"error": "Incorrect value(s)."}), 400
+    if budget_metric == "time":
+        budget /= 60.0
+    area = GL.isochrone_engine.service_areas(origins, budget, budget_metric)
+    # costs in seconds or in meters
+    scale = 3600 if budget_metric == "time" else 1
+    result = {
+        "origins": [origin.node for origin in origins],
+        "nodes": area.osm_ids.tolist(),
+        "costs": (scale * area.costs).tolist(),
+        "areas": area.origins.tolist(),
+    }
+    if request.args.get("polygon") == "true":
+        result["polygon"] = area.polygon()
+    return jsonify(result)
+
+
+@app.route("/api/route/batch", methods=["POST"])
+def api_route_batch():
+    """
+    Routes between many pairs of points, posted as JSON:
+    {"pairs": [[departure, destination], ...], "geometry": true,
+    "metric": "distance"}.
+
+    The pairs are grouped by departure, each departure runs one search
+    for all its destinations. The routes are streamed (one JSON object
+    per line, with the position of its pair) as they are computed.
+
+    At most MAX_BATCH_ADDRESSES distinct addresses are accepted, they
+    are geocoded as the response streams: the pairs whose addresses are
+    not geocoded within BATCH_GEOCODING_TIME are rejected.
+    """
+    body = request.get_json(silent=True)
+    pairs = body.get("pairs") if isinstance(body, dict) else None
+    if not isinstance(pairs, list) or not 0 < len(pairs) <= MAX_BATCH_SIZE:
+        return (
+            jsonify({"error": "1 to %d pairs expected." % MAX_BATCH_SIZE}),
+            400,
         )
-        (
-            destination_osmid,
-            destination_latitude,
-            destination_longitude,
-        ) = self.graph.osm_node_from_coordinates(
-            destination_latitude_original, destination_longitude_original
+    geometry = bool(body.get("geometry", True))
+    route_metric = metric(body.get("metric"))
+    if route_metric is None:
+        return jsonify({"error": "Incorrect metric."}), 400
+    addresses = {
+        point
+        for pair in pairs
+        if isinstance(pair, (list, tuple)) and len(pair) == 2
+        for point in pair
+        if isinstance(point, str) and coordinates(point) is None
+    }
+    if len(addresses) > MAX_BATCH_ADDRESSES:
+        return (
+            jsonify({"error": "At most %d addresses expected." % MAX_BATCH_ADDRESSES}),
+            400,
         )
 
-        dj = dijkstra.Dijkstra(self.graph.graph_structure, departure_osmid)
-        shortest_path, distance = dj.get(destination_osmid)
-        print(shortest_path)
-    return render_template("index.html", now=now)
+    def generate():
+        deadline = time.monotonic() + BATCH_GEOCODING_TIME
+        nodes, origins = {}, OrderedDict()
+        for position, pair in enumerate(pairs):
+            error = "Incorrect value(s)."
+            snapped = []
+            if isinstance(pair, (list, tuple)) and len(pair) == 2:
+                for point in pair:
+                    key = json.dumps(point)
+                    if key not in nodes:
+                        remaining = deadline - time.monotonic()
+                        address = isinstance(point, str) and point in addresses
+                        if address and remaining <= 0:
+                            error = "Geocoding timed out."
+                            break
+                        nodes[key] = snap(point, remaining)
+                    snapped.append(nodes[key])
+            if len(snapped) != 2 or None in snapped:
+                yield json.dumps({"index": position, "error": error}) + "\n"
+                continue
+            origins.setdefault(snapped[0], []).append((position, snapped[1]))
+        for departure, destinations in origins.items():
+            routes = GL.route_cache.route_many(
+                departure,
+                [destination for _, destination in destinations],
+                route_metric,
+            )
+            for (position, destination), (path, _) in zip(destinations, routes):
+                result = route_json(path, geometry, departure, destination)
+                result["index"] = position
+                result["departure"] = departure.node
+                result["destination"] = destination.node
+                yield json.dumps(result) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
@@ -0,0 +1,122 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import pytest
+
+from pynavigo import simpleGraph
+
+# size of the grid of the test graph
+SIZE = 6
+# spacing of the grid, in degrees (about 200 meters)
+STEP = 0.002
+
+
+def make_graph():
+    """
+    Small fixed road network near Luxembourg: a SIZE x SIZE grid whose
+    rows are two-way residential streets and whose columns are one-way
+    primary roads (alternately up and down), a two-way secondary road
+    through a chain of nodes (contracted by simplify) from the first
+    corner to the last one, and a dead end.
+    """
+    graph = simpleGraph.Graph()
+
+    def node(row, col):
+        return 1 + row * SIZE + col
+
+    for row in range(SIZE):
+        for col in range(SIZE):
+            # the jitter avoids the ties between the paths
+            graph.addNode(
+                node(row, col),
+                6.1 + col * STEP + 0.0001 * ((row * 7 + col * 3) % 5),
+                49.6 + row * STEP + 0.0001 * ((row * 3 + col * 5) % 7),
+            )
+    for row in range(SIZE):
+        graph.addWay([node(row, col) for col in range(SIZE)], False, 30, "residential")
+    for col in range(SIZE):
+        refs = [node(row, col) for row in range(SIZE)]
+        if col % 2:
+            refs.reverse()
+        graph.addWay(refs, True, 70, "primary")
+    chain = [100 + i for i in range(6)]
+    for i, osm_id in enumerate(chain):
+        graph.addNode(
+            osm_id,
+            6.1 - 0.001 + i * STEP * (SIZE - 1) / 5,
+            49.6 + STEP * (SIZE - 1) / 2 + 0.003 * (1 - abs(i - 2.5) / 2.5),
+        )
+    graph.addWay([node(0, 0)] + chain + [node(SIZE - 1, SIZE - 1)], False, 90)
+    graph.addNode(200, 6.1 + STEP * SIZE, 49.6)
+    graph.addWay([node(0, SIZE - 1), 200], False, 30, "living_street")
+    graph.create_graph_structure()
+    return graph
+
+
+@pytest.fixture(scope="session")
+def graph():
+    return make_graph()
+
+
+@pytest.fixture(scope="session")
+def compact_graph(graph):
+    return graph.compact()
+
+
+@pytest.fixture(scope="session")
+def restricted_graph():
+    """
+    Compact form of the test graph with one forbidden turn (not a
+    U-turn) at every other intersection.
+    """
+    graph = make_graph()
+    for via in sorted(graph.graph_structure)[::2]:
+        entering = sorted(
+            node
+            for node, edge in graph.reverse_structure[via].items()
+            if edge.distance != float("inf")
+        )
+        leaving = sorted(
+            node
+            for node, edge in graph.graph_structure[via].items()
+            if edge.distance != float("inf")
+        )
+        if len(leaving) >= 3:
+            fromnode = entering[0]
+            tonode = [node for node in leaving if node != fromnode][0]
+            graph.addRestriction(fromnode, via, tonode)
+    return graph.compact()
+
+
+@pytest.fixture(scope="session")
+def pairs(compact_graph):
+    """
+    All the pairs of distinct OSM nodes of the test graph.
+    """
+    nodes = list(compact_graph.osm_ids)
+    return [(s, t) for s in nodes for t in nodes if s != t]
+
+
+@pytest.fixture(scope="session")
+def expected(graph, pairs):
+    """
+    Shortest distances of all the pairs with dijkstra.Dijkstra on the
+    dictionaries of the graph (None if the target is not reachable).
+    """
+    from pynavigo.dijkstra import Dijkstra
+
+    result = {}
+    for source in {s for s, _ in pairs}:
+        search = Dijkstra(graph.graph_structure, source)
+        for s, target in pairs:
+            if s == source:
+                path, cost = search.get(target)
+                result[s, target] = cost if path and cost != float("inf") else None
+    return result
@@ -0,0 +1,30 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import numpy
+
+from pynavigo import build
+
+
+def test_parallel_segments(monkeypatch, compact_graph):
+    node_ids = sorted(compact_graph.osm_ids)
+    latitudes = [compact_graph.coordinates(compact_graph.index[i])[0] for i in node_ids]
+    longitudes = [
+        compact_graph.coordinates(compact_graph.index[i])[1] for i in node_ids
+    ]
+    # ways of 3 nodes, some refs unknown
+    ways_refs = [node_ids[i : i + 3] for i in range(0, len(node_ids), 2)]
+    ways_refs.append([node_ids[0], -1, node_ids[1]])
+    monkeypatch.setattr(build, "MIN_SHARD_SIZE", 4)
+    single = build.segments(node_ids, latitudes, longitudes, ways_refs)
+    parallel = build.segments(node_ids, latitudes, longitudes, ways_refs, jobs=2)
+    assert len(single[0])
+    for expected, result in zip(single, parallel):
+        assert numpy.array_equal(expected, result)
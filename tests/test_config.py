@@ -0,0 +1,136 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import pickle
+import datetime
+
+import pytest
+
+from pynavigo import ch
+from pynavigo import graphloader
+from pynavigo import landmarks
+from pynavigo import maxspeed
+from pynavigo import snapshot
+from pynavigo import timedependent
+from pynavigo.turns import TurnEngine
+
+
+def test_config_files_found_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert maxspeed.load_max_speed("france")["motorway"] == 130
+    profiles = timedependent.load_speed_profiles(timedependent.WEEKDAY)
+    assert len(profiles) == len(timedependent.ROAD_CLASSES)
+
+
+def test_missing_config_files(tmp_path):
+    with pytest.raises(IOError):
+        maxspeed.load_max_speed("france", str(tmp_path / "maxspeed.cfg"))
+    with pytest.raises(IOError):
+        timedependent.load_speed_profiles(
+            timedependent.WEEKDAY, str(tmp_path / "speedprofiles.cfg")
+        )
+
+
+def test_time_dependent_route(compact_graph):
+    engine = timedependent.TimeDependentEngine(compact_graph)
+    night = datetime.datetime(2012, 4, 2, 3)
+    peak = datetime.datetime(2012, 4, 2, 8)
+    path, hours = engine.route(1, 36, night)
+    assert path[0] == 1 and path[-1] == 36
+    # free flow at night, slower at the peak hour
+    assert hours == pytest.approx(compact_graph.time_way(path))
+    assert engine.route(1, 36, peak)[1] > hours
+    # arriving at the arrival time of the path leaves at the departure
+    arrival = night + datetime.timedelta(hours=hours)
+    assert engine.route_arrival(1, 36, arrival)[1] == pytest.approx(hours)
+
+
+def test_lazy_engines(tmp_path, compact_graph):
+    loader = graphloader.GraphLoader(str(tmp_path / "test.osm"), serialize=False)
+    loader.prepare_queries(compact_graph)
+    assert not set(graphloader.LAZY_ENGINES) & set(vars(loader))
+    td_engine = loader.td_engine
+    assert loader.td_engine is td_engine
+    # a new graph gets new engines
+    loader.prepare_queries(compact_graph)
+    assert loader.td_engine is not td_engine
+
+
+def test_loader_engine_honours_turn_restrictions(
+    tmp_path, compact_graph, restricted_graph
+):
+    loader = graphloader.GraphLoader(str(tmp_path / "test.osm"), serialize=False)
+    loader.prepare_queries(compact_graph)
+    assert not isinstance(loader.engine, TurnEngine)
+    # the routes of the cache are computed on the simplified graph
+    assert loader.route_cache.simplified is loader.simplified_graph
+    assert loader.simplified_graph.nb_nodes() < compact_graph.nb_nodes()
+    loader.prepare_queries(restricted_graph)
+    assert isinstance(loader.engine, TurnEngine)
+    assert loader.route_cache.simplified is None
+    assert loader.route_cache.engine is loader.engine
+
+
+def test_landmarks_cache(tmp_path, monkeypatch, graph, compact_graph):
+    loader = graphloader.GraphLoader(str(tmp_path / "test.osm"), nb_landmarks=100)
+    loader.prepare_queries(compact_graph)
+    computed = []
+    compute = landmarks.Landmarks.compute
+
+    def count(graph, nb_landmarks):
+        computed.append(nb_landmarks)
+        return compute(graph, nb_landmarks)
+
+    monkeypatch.setattr(landmarks.Landmarks, "compute", count)
+    # fewer usable nodes than requested landmarks
+    assert len(loader.load_landmarks()) == compact_graph.nb_nodes()
+    # the file is used for the same graph (here memory-mapped)
+    snapshot.save(compact_graph, str(tmp_path / "test.snapshot"))
+    loader.prepare_queries(snapshot.load(str(tmp_path / "test.snapshot")))
+    loader.load_landmarks()
+    assert computed == [100]
+    # but not for another graph with the same number of nodes
+    changed = pickle.loads(pickle.dumps(graph))
+    changed.graph_structure[1][2].distance += 1
+    loader.prepare_queries(changed.compact())
+    loader.load_landmarks()
+    assert computed == [100, 100]
+    # nor for a truncated file
+    with open(loader.dump_landmarks, "r+b") as dump:
+        dump.truncate(landmarks.HEADER.size + 8)
+    with pytest.raises(ValueError):
+        landmarks.Landmarks.load(loader.dump_landmarks)
+    loader.load_landmarks()
+    assert computed == [100, 100, 100]
+
+
+def test_hierarchy_cache(tmp_path, monkeypatch, graph, compact_graph):
+    loader = graphloader.GraphLoader(str(tmp_path / "test.osm"))
+    loader.prepare_queries(compact_graph)
+    built = []
+    build = ch.ContractionHierarchy.build
+
+    def count(graph):
+        built.append(graph)
+        return build(graph)
+
+    monkeypatch.setattr(ch.ContractionHierarchy, "build", count)
+    loader.load_hierarchy()
+    # the file is used for the same graph
+    loader.load_hierarchy()
+    assert len(built) == 1
+    # but not for another graph with the same number of nodes
+    changed = pickle.loads(pickle.dumps(graph))
+    changed.graph_structure[1][2].distance += 1
+    loader.prepare_queries(changed.compact())
+    loader.load_hierarchy()
+    assert len(built) == 2
+    with pytest.raises(ValueError):
+        ch.ContractionHierarchy.load(loader.dump_hierarchy, compact_graph)
@@ -0,0 +1,186 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import json
+import time
+import socket
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pynavigo import geocoding
+
+# answers of the test server, by address
+ANSWERS = {
+    "found": {
+        "status": "OK",
+        "results": [{"geometry": {"location": {"lat": 49.6, "lng": 6.1}}}],
+    },
+    "unknown": {"status": "ZERO_RESULTS", "results": []},
+    "quota": {"status": "OVER_QUERY_LIMIT", "results": []},
+    "no results": {"status": "OK", "results": []},
+    "no location": {"status": "OK", "results": [{"geometry": {}}]},
+    "not an object": ["OK"],
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Geocoding API answering ANSWERS, "slow" after one second, "error"
+    with an internal error and the others with invalid JSON.
+    """
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        address = query["address"][0]
+        if address == "slow":
+            time.sleep(1)
+        if address == "error":
+            self.send_error(500)
+            return
+        body = json.dumps(ANSWERS[address]) if address in ANSWERS else "{"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield geocoding.GoogleBackend("http://127.0.0.1:%d/json" % server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+def test_google_backend(backend):
+    assert backend.geocode("found") == {"lat": 49.6, "lng": 6.1}
+    assert backend.geocode("unknown") is None
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["quota", "no results", "no location", "not an object", "invalid", "error"],
+)
+def test_google_backend_errors(backend, address):
+    with pytest.raises(geocoding.GeocodingError):
+        backend.geocode(address)
+
+
+def test_google_backend_timeout(backend):
+    start = time.time()
+    with pytest.raises(geocoding.GeocodingError):
+        backend.geocode("slow", timeout=0.2)
+    assert time.time() - start < 0.9
+
+
+def test_google_backend_unreachable():
+    # a port on which nothing listens
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+    with pytest.raises(geocoding.GeocodingError):
+        geocoding.GoogleBackend("http://127.0.0.1:%d/json" % port).geocode("found", 1)
+
+
+class Backend(geocoding.Backend):
+    """
+    Backend which counts its requests and fails while failing is True.
+    """
+
+    def __init__(self, addresses):
+        self.addresses = addresses
+        self.nb_requests = 0
+        self.failing = False
+
+    def geocode(self, address, timeout=geocoding.TIMEOUT):
+        self.nb_requests += 1
+        if self.failing:
+            raise geocoding.GeocodingError("Unreachable")
+        return self.addresses.get(address)
+
+
+class Clock(object):
+    """
+    Replaces the time module of geocoding.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_cache(tmp_path):
+    backend = Backend({"Place d'Armes": {"lat": 49.6, "lng": 6.1}})
+    path = str(tmp_path / "geocoding.sqlite")
+    geocoder = geocoding.Geocoder([backend], geocoding.GeocodingCache(path))
+    assert geocoder.geocode("Place d'Armes") == {"lat": 49.6, "lng": 6.1}
+    # same normalized form, from the cache (also after a restart)
+    geocoder = geocoding.Geocoder([backend], geocoding.GeocodingCache(path))
+    assert geocoder.geocode("place d armes") == {"lat": 49.6, "lng": 6.1}
+    assert backend.nb_requests == 1
+
+
+def test_negative_cache_expires(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(geocoding, "time", clock)
+    backend = Backend({})
+    cache = geocoding.GeocodingCache(":memory:", negative_ttl=60)
+    geocoder = geocoding.Geocoder([backend], cache)
+    assert geocoder.geocode("nowhere") is None
+    clock.now += 59
+    assert geocoder.geocode("nowhere") is None
+    assert backend.nb_requests == 1
+    # requested again after the ttl
+    clock.now += 2
+    backend.addresses["nowhere"] = {"lat": 49.6, "lng": 6.1}
+    assert geocoder.geocode("nowhere") == {"lat": 49.6, "lng": 6.1}
+    assert backend.nb_requests == 2
+
+
+def test_failures_not_cached(caplog):
+    failing, other = Backend({}), Backend({})
+    failing.failing = True
+    geocoder = geocoding.Geocoder(
+        [failing, other], geocoding.GeocodingCache(":memory:")
+    )
+    assert geocoder.geocode("nowhere") is None
+    assert "Unreachable" in caplog.text
+    # the other backend did not know it, but the first one could
+    assert geocoder.geocode("nowhere") is None
+    assert failing.nb_requests == other.nb_requests == 2
+    failing.failing = False
+    failing.addresses["nowhere"] = {"lat": 49.6, "lng": 6.1}
+    assert geocoder.geocode("nowhere") == {"lat": 49.6, "lng": 6.1}
+    assert geocoder.geocode("nowhere") == {"lat": 49.6, "lng": 6.1}
+    assert failing.nb_requests == 3
+
+
+def test_geocoder_timeout():
+    class Backend(geocoding.Backend):
+        def geocode(self, address, timeout=geocoding.TIMEOUT):
+            timeouts.append(timeout)
+            return None
+
+    timeouts = []
+    geocoder = geocoding.Geocoder([Backend()], timeout=5)
+    geocoder.geocode("somewhere")
+    geocoder.geocode("elsewhere", 2)
+    geocoder.geocode("nowhere", 10)
+    assert timeouts == [5, 2, 5]
@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import pickle
+
+import pytest
+
+from pynavigo import graphloader
+from pynavigo import overgraph
+from pynavigo import simpleGraph
+from pynavigo.dijkstra import Dijkstra
+from pynavigo.matrix import MatrixEngine
+
+
+def reference(graph, nodes):
+    """
+    Over-graph built like the original loop of GraphLoader: one search
+    per pickup point and the edges added in both directions.
+    """
+    over_graph = simpleGraph.Graph()
+    for node in nodes:
+        over_graph.addNode(node, 0, 0)
+        dj = Dijkstra(graph.graph_structure, node)
+        for node1 in nodes:
+            shortest_path, distance = dj.get(node1)
+            if shortest_path != []:
+                average = graph.average_speed(shortest_path)
+                over_graph.addNode(node1, 0, 0)
+                over_graph.addEdge(
+                    node, node1, distance + overgraph.EDGE_PENALTY, average, False
+                )
+    return over_graph
+
+
+def check(state, expected, nodes):
+    for node in nodes:
+        for node1 in nodes:
+            edge = state.graph.graph_structure[node].get(node1)
+            other = expected.graph_structure[node].get(node1)
+            if other is None:
+                assert edge is None
+                continue
+            assert edge.distance == pytest.approx(other.distance)
+            assert edge.speed == pytest.approx(other.speed)
+    assert set(state.graph.graph_structure) == set(nodes)
+
+
+def test_over_graph(graph, compact_graph):
+    nodes = [1, 8, 36, 200, 15, 102, 29]
+    matrix_engine = MatrixEngine(compact_graph)
+    state = overgraph.OverGraph()
+    assert state.update(nodes[:4], matrix_engine) == (nodes[:4], [])
+    check(state, reference(graph, nodes[:4]), nodes[:4])
+    # the points already there keep their edges
+    assert state.update(nodes, matrix_engine, jobs=2) == (nodes[4:], [])
+    check(state, reference(graph, nodes), nodes)
+    assert state.update(nodes[1:], matrix_engine) == ([], [1])
+    check(state, reference(graph, nodes[1:]), nodes[1:])
+    # self-loops have the default speed
+    assert state.graph.graph_structure[8][8].speed == 90
+
+
+def clients(compact_graph, pairs):
+    """
+    Clients configuration whose points are the nodes of pairs.
+    """
+    sections = []
+    for position, pair in enumerate(pairs):
+        points = [
+            "%.7f %.7f" % compact_graph.coordinates(compact_graph.index[node])
+            for node in pair
+        ]
+        sections.append(
+            "[client%d]\ndepart = %s\ndestination = %s\n" % (position, *points)
+        )
+    return "\n".join(sections)
+
+
+def test_update_over_graph(tmp_path, monkeypatch, graph, compact_graph):
+    loader = graphloader.GraphLoader(str(tmp_path / "test.osm"), serialize=False)
+    loader.prepare_queries(compact_graph)
+    # the over-graph only needs the compact graph
+    loader.graph = None
+    rows = []
+    compute = MatrixEngine.compute
+
+    def count_rows(self, sources, *args, **kwargs):
+        rows.extend(sources)
+        return compute(self, sources, *args, **kwargs)
+
+    monkeypatch.setattr(MatrixEngine, "compute", count_rows)
+    pairs = [(1, 36), (8, 29), (15, 102)]
+    over_graph = loader.update_over_graph(clients(compact_graph, pairs))
+    assert set(over_graph.graph_structure) == {node for pair in pairs for node in pair}
+    assert len(rows) == 6
+    # one client changed: one search per new point
+    del rows[:]
+    pairs[1] = (9, 30)
+    over_graph = loader.update_over_graph(clients(compact_graph, pairs))
+    assert set(over_graph.graph_structure) == {node for pair in pairs for node in pair}
+    assert sorted(rows) == [9, 30]
+    # same clients: nothing to compute
+    del rows[:]
+    loader.update_over_graph(clients(compact_graph, pairs))
+    assert rows == []
+    # same clients on another graph: all the points are computed again
+    changed = pickle.loads(pickle.dumps(graph))
+    changed.graph_structure[1][2].distance += 1
+    loader.prepare_queries(changed.compact())
+    over_graph = loader.update_over_graph(clients(compact_graph, pairs))
+    assert set(over_graph.graph_structure) == {node for pair in pairs for node in pair}
+    assert len(rows) == 6
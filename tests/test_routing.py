@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import pytest
+
+from pynavigo import simpleGraph
+from pynavigo.astar import AStar
+from pynavigo.ch import ContractionHierarchy
+from pynavigo.dijkstra import BidirectionalDijkstra
+from pynavigo.engine import DijkstraEngine
+from pynavigo.landmarks import ALT, Landmarks
+from pynavigo.matrix import MatrixEngine
+from pynavigo.routecache import RouteCache
+from pynavigo.simplify import SimplifiedGraph
+from pynavigo.turns import TurnEngine
+
+
+def check(route, compact_graph, pairs, expected):
+    """
+    Checks that route(source, target) returns the shortest distances of
+    dijkstra.Dijkstra, with a path of this length.
+    """
+    for source, target in pairs:
+        path, cost = route(source, target)
+        if expected[source, target] is None:
+            assert path == []
+            continue
+        assert cost == pytest.approx(expected[source, target])
+        assert path[0] == source and path[-1] == target
+        assert compact_graph.len_way(path) == pytest.approx(cost)
+
+
+def test_engine_query(compact_graph, pairs, expected):
+    engine = DijkstraEngine(compact_graph)
+    check(lambda s, t: engine.query(s, t).get(t), compact_graph, pairs, expected)
+    check(lambda s, t: engine.query(s).get(t), compact_graph, pairs, expected)
+
+
+def test_engine_route(compact_graph, pairs, expected):
+    engine = DijkstraEngine(compact_graph)
+    check(engine.route, compact_graph, pairs, expected)
+
+
+def test_bidirectional_dijkstra(graph, compact_graph, pairs, expected):
+    def route(source, target):
+        return BidirectionalDijkstra(
+            graph.graph_structure, graph.reverse_structure, source
+        ).get(target)
+
+    check(route, compact_graph, pairs, expected)
+
+
+def test_astar(compact_graph, pairs, expected):
+    check(AStar(compact_graph).route, compact_graph, pairs, expected)
+
+
+def test_astar_time(compact_graph, pairs):
+    engine, astar = DijkstraEngine(compact_graph), AStar(compact_graph, "time")
+    for source, target in pairs:
+        _, cost = astar.route(source, target)
+        assert cost == pytest.approx(engine.route(source, target, "time")[1])
+
+
+def test_landmarks(compact_graph, pairs, expected):
+    landmarks = Landmarks.compute(compact_graph, 4)
+    assert len(landmarks) == 4
+    check(ALT(compact_graph, landmarks).route, compact_graph, pairs, expected)
+
+
+def test_contraction_hierarchy(compact_graph, pairs, expected, tmp_path):
+    hierarchy = ContractionHierarchy.build(compact_graph)
+    check(hierarchy.route, compact_graph, pairs, expected)
+    hierarchy.save(str(tmp_path / "graph.ch"))
+    hierarchy = ContractionHierarchy.load(str(tmp_path / "graph.ch"))
+    check(hierarchy.route, compact_graph, pairs, expected)
+
+
+def test_simplified_graph(graph, compact_graph, pairs, expected):
+    simplified = graph.simplify()
+    assert simplified.nb_nodes() < compact_graph.nb_nodes()
+    check(simplified.route, compact_graph, pairs, expected)
+
+
+def test_simplified_graph_zero_length_chain():
+    # a chain of nodes at the same place between two intersections
+    graph = simpleGraph.Graph()
+    for osm_id in (1, 2, 3, 4):
+        graph.addNode(osm_id, 6.1, 49.6)
+    for osm_id, latitude in ((5, 49.601), (6, 49.599), (7, 49.602), (8, 49.598)):
+        graph.addNode(osm_id, 6.101, latitude)
+    graph.addWay([5, 1, 6], False, 50)
+    graph.addWay([7, 4, 8], False, 50)
+    graph.addWay([1, 2, 3, 4], False, 50)
+    graph.create_graph_structure()
+    compact_graph = graph.compact()
+    simplified = SimplifiedGraph.from_graph(compact_graph)
+    assert 2 in simplified.contracted
+    engine = DijkstraEngine(compact_graph)
+    for source, target in ((2, 7), (5, 3), (3, 2)):
+        path, cost = simplified.route(source, target)
+        assert cost == pytest.approx(engine.route(source, target)[1])
+        assert path[0] == source and path[-1] == target
+
+
+def test_turn_engine_without_restrictions(compact_graph, pairs, expected):
+    check(TurnEngine(compact_graph).route, compact_graph, pairs, expected)
+
+
+def test_route_cache(compact_graph, pairs, expected):
+    cache = RouteCache(DijkstraEngine(compact_graph), nb_trees=4)
+    check(cache.route, compact_graph, pairs, expected)
+    # the second time from the cache
+    check(cache.route, compact_graph, pairs, expected)
+    assert cache.stats()["hits"]
+    assert cache.stats()["tree_hits"]
+
+
+def test_route_cache_many(compact_graph, pairs, expected):
+    cache = RouteCache(DijkstraEngine(compact_graph))
+    nodes = list(compact_graph.osm_ids)
+    for source in nodes:
+        targets = [target for target in nodes if target != source]
+        routes = dict(zip(targets, cache.route_many(source, targets)))
+        check(
+            lambda s, t: routes[t],
+            compact_graph,
+            [(source, t) for t in targets],
+            expected,
+        )
+
+
+def test_matrix(compact_graph, expected):
+    nodes = list(compact_graph.osm_ids)
+    distance_matrix = MatrixEngine(compact_graph).compute(nodes)
+    for i, source in enumerate(nodes):
+        for j, target in enumerate(nodes):
+            cost = distance_matrix.distances[i, j]
+            if i == j:
+                assert cost == 0
+            elif expected[source, target] is None:
+                assert cost == float("inf")
+            else:
+                assert cost == pytest.approx(expected[source, target])
+
+
+def snapped_locations(compact_graph):
+    """
+    Locations snapped on the segments of the test graph, several of them
+    on the same segments.
+    """
+    from pynavigo.snapping import SegmentIndex
+
+    index = SegmentIndex(compact_graph)
+    latitudes, longitudes = compact_graph.latitudes, compact_graph.longitudes
+    locations = []
+    for k in range(0, compact_graph.nb_nodes() - 1, 3):
+        for share in (0.2, 0.3, 0.7):
+            locations.append(
+                index.snap(
+                    latitudes[k] + share * (latitudes[k + 1] - latitudes[k]),
+                    longitudes[k] + share * (longitudes[k + 1] - longitudes[k]),
+                )
+            )
+    return locations
+
+
+def test_route_cache_snapped(compact_graph):
+    engine = DijkstraEngine(compact_graph)
+    cache = RouteCache(engine)
+    locations = snapped_locations(compact_graph)
+    for metric in ("distance", "time"):
+        for source in locations:
+            routes = cache.route_many(source, locations, metric)
+            for target, (path, cost) in zip(locations, routes):
+                expected_path, expected_cost = engine.route(source, target, metric)
+                assert cost == pytest.approx(expected_cost)
+                assert bool(path) == bool(expected_path)
+                assert cache.route(source, target, metric)[1] == pytest.approx(cost)
+
+    # the same routes from the simplified graph
+    simplified = RouteCache(
+        engine, simplified=SimplifiedGraph.from_graph(compact_graph)
+    )
+    for source in locations:
+        routes = simplified.route_many(source, locations)
+        for target, (path, cost) in zip(locations, routes):
+            assert cost == pytest.approx(engine.route(source, target)[1])
+            assert simplified.route(source, target)[1] == pytest.approx(cost)
+
+
+def test_route_cache_simplified(graph, compact_graph, pairs, expected):
+    engine = DijkstraEngine(compact_graph)
+    cache = RouteCache(engine, simplified=graph.simplify())
+    check(cache.route, compact_graph, pairs, expected)
+    locations = snapped_locations(compact_graph)
+    for source in locations:
+        for target in locations:
+            expected_path, expected_cost = engine.route(source, target, "time")
+            path, cost = cache.route(source, target, "time")
+            assert cost == pytest.approx(expected_cost)
+            assert bool(path) == bool(expected_path)
+    # the repeated sources are looked up in their tree
+    stats = cache.stats()
+    assert stats["trees"] and stats["tree_hits"]
+
+
+def test_turn_restrictions(restricted_graph, pairs, expected):
+    turn_engine = TurnEngine(restricted_graph)
+    turns = restricted_graph.turn_restrictions()
+    assert turns
+    cache = RouteCache(turn_engine)
+    nb_longer = 0
+    for source, target in pairs:
+        path, cost = turn_engine.route(source, target)
+        if not path:
+            continue
+        assert cost >= expected[source, target] - 1e-6
+        nb_longer += cost > expected[source, target] + 1e-6
+        assert restricted_graph.len_way(path) == pytest.approx(cost)
+        # no forbidden turn on the path
+        indices = [restricted_graph.index[node] for node in path]
+        for u, v, w in zip(indices, indices[1:], indices[2:]):
+            a, b = restricted_graph.edge(u, v), restricted_graph.edge(v, w)
+            assert b not in turns.get(v, {}).get(a, ())
+        # the trees of the cache follow the same paths
+        assert cache.route(source, target) == (path, pytest.approx(cost))
+        assert cache.route_many(source, [target])[0][1] == pytest.approx(cost)
+    assert nb_longer
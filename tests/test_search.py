@@ -0,0 +1,89 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import pytest
+
+from pynavigo.alternatives import AlternativesEngine, STRETCH
+from pynavigo.engine import DijkstraEngine
+from pynavigo.isochrone import IsochroneEngine, concave_hull
+from pynavigo.snapping import SegmentIndex
+
+
+def test_isochrone(compact_graph):
+    engine = DijkstraEngine(compact_graph)
+    isochrone_engine = IsochroneEngine(compact_graph)
+    for source in compact_graph.osm_ids:
+        tree = engine.query(source).tree()
+        for budget in (100, 500, 1000):
+            isochrone = isochrone_engine.isochrone(source, budget, "distance")
+            # the same nodes as a filter of the full search
+            assert sorted(isochrone.osm_ids.tolist()) == sorted(
+                compact_graph.osm_ids[i]
+                for i in range(compact_graph.nb_nodes())
+                if tree.dist[i] <= budget
+            )
+
+
+def test_service_areas(compact_graph):
+    engine = DijkstraEngine(compact_graph)
+    depots = [1, 36, 102]
+    trees = [engine.query(depot).tree() for depot in depots]
+    areas = IsochroneEngine(compact_graph).service_areas(depots, 1000, "distance")
+    for osm_id, cost, origin in zip(areas.osm_ids, areas.costs, areas.origins):
+        i = compact_graph.index[osm_id]
+        # each node is served by the closest depot
+        assert cost == pytest.approx(min(tree.dist[i] for tree in trees))
+        assert cost == pytest.approx(trees[origin].dist[i])
+
+
+def test_concave_hull(compact_graph):
+    coordinates = [
+        compact_graph.coordinates(i) for i in range(compact_graph.nb_nodes())
+    ]
+    ring = concave_hull(coordinates)
+    assert len(ring) >= 4 and ring[0] == ring[-1]
+    # the rings of fewer than three points are closed too
+    for points in (coordinates[:2], coordinates[:1], coordinates[:1] * 3):
+        ring = concave_hull(points)
+        assert ring[0] == ring[-1]
+        assert sorted(set(ring)) == sorted(set(points))
+    assert concave_hull([]) == []
+
+
+def test_alternatives(compact_graph, pairs, expected):
+    alternatives_engine = AlternativesEngine(compact_graph)
+    for source, target in pairs:
+        routes = alternatives_engine.alternatives(source, target)
+        if expected[source, target] is None:
+            assert routes == []
+            continue
+        # the shortest route first
+        assert routes[0][1] == pytest.approx(expected[source, target])
+        for path, cost in routes:
+            assert path[0] == source and path[-1] == target
+            assert len(set(path)) == len(path)
+            assert compact_graph.len_way(path) == pytest.approx(cost)
+            assert cost <= STRETCH * expected[source, target] + 1e-6
+
+
+def test_snapped_route(compact_graph):
+    engine = DijkstraEngine(compact_graph)
+    index = SegmentIndex(compact_graph)
+    # on the residential street of the first row, between the nodes 2 and 3
+    lat_2, lon_2 = compact_graph.coordinates(compact_graph.index[2])
+    lat_3, lon_3 = compact_graph.coordinates(compact_graph.index[3])
+    source = index.snap((lat_2 + lat_3) / 2 + 0.00001, (lon_2 + lon_3) / 2)
+    assert set(source.edge) == {2, 3}
+    path, cost = engine.route(source, 36)
+    # the route starts with the part of the segment to its first node
+    start = path[0]
+    part = abs((1 if start == source.edge[1] else 0) - source.fraction)
+    _, rest = engine.route(start, 36)
+    assert cost == pytest.approx(part * source.length + rest, rel=1e-6)
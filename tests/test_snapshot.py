@@ -0,0 +1,109 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import os
+import pickle
+
+import pytest
+
+from pynavigo import graphloader
+from pynavigo import snapshot
+
+
+def test_round_trip(tmp_path, restricted_graph):
+    path = str(tmp_path / "graph.snapshot")
+    snapshot.save(restricted_graph, path)
+    graph = snapshot.load(path)
+    for name in (
+        "osm_ids",
+        "latitudes",
+        "longitudes",
+        "offsets",
+        "targets",
+        "distances",
+        "speeds",
+        "road_classes",
+        "restrictions",
+    ):
+        assert list(getattr(graph, name)) == list(getattr(restricted_graph, name))
+    assert list(graph.times()) == list(restricted_graph.times())
+    assert dict(graph.index) == dict(restricted_graph.index)
+
+
+@pytest.mark.parametrize("size", [0, 10, snapshot.HEADER_SIZE, -1, -100])
+def test_truncated(tmp_path, compact_graph, size):
+    path = str(tmp_path / "graph.snapshot")
+    snapshot.save(compact_graph, path)
+    with open(path, "rb") as snapshot_file:
+        data = snapshot_file.read()
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(data[:size])
+    with pytest.raises(ValueError):
+        snapshot.load(path)
+
+
+def test_out_of_date(tmp_path, compact_graph):
+    source = tmp_path / "graph.osm"
+    source.write_text("<osm/>")
+    path = str(tmp_path / "graph.snapshot")
+    snapshot.save(compact_graph, path, str(source))
+    snapshot.load(path, str(source))
+    source.write_text("<osm></osm>")
+    with pytest.raises(ValueError):
+        snapshot.load(path, str(source))
+    # still a valid snapshot without its source
+    assert snapshot.load(path).nb_nodes() == compact_graph.nb_nodes()
+
+
+def test_loader_rebuilds_out_of_date_snapshot(tmp_path, graph):
+    osm_file = str(tmp_path / "test.osm")
+    with open(osm_file + ".dump", "wb") as dump_graph:
+        pickle.dump(graph, dump_graph)
+    loader = graphloader.GraphLoader(osm_file, data_dir=str(tmp_path / "data"))
+    first = loader.load_snapshot()
+    assert os.path.exists(loader.dump_snapshot)
+    assert first.nb_nodes() == graph.compact().nb_nodes()
+    # mapped from the snapshot
+    assert hasattr(
+        graphloader.GraphLoader(
+            osm_file, data_dir=str(tmp_path / "data")
+        ).load_snapshot(),
+        "snapshot",
+    )
+    # the graph changes: one node less
+    changed = pickle.loads(pickle.dumps(graph))
+    changed.remove_nodes([200])
+    with open(osm_file + ".dump", "wb") as dump_graph:
+        pickle.dump(changed, dump_graph)
+    reloaded = loader.load_snapshot()
+    assert reloaded.nb_nodes() == first.nb_nodes() - 1
+    assert snapshot.load(loader.dump_snapshot, loader.source_file()).nb_nodes() == (
+        reloaded.nb_nodes()
+    )
+
+
+def test_loader_graph_dump_in_data_dir(tmp_path, graph):
+    osm_file = str(tmp_path / "map" / "test.osm")
+    os.makedirs(os.path.dirname(osm_file))
+    # the dump which comes with the map
+    with open(osm_file + ".dump", "wb") as dump_graph:
+        pickle.dump(graph, dump_graph)
+    loader = graphloader.GraphLoader(osm_file, data_dir=str(tmp_path / "data"))
+    assert loader.dump_graph == str(tmp_path / "data" / "test.osm.dump")
+    assert loader.graph_dump() == osm_file + ".dump"
+    assert loader.load_snapshot().nb_nodes() == graph.compact().nb_nodes()
+    assert os.listdir(os.path.dirname(osm_file)) == ["test.osm.dump"]
+    # a dump in the data directory is used first
+    changed = pickle.loads(pickle.dumps(graph))
+    changed.remove_nodes([200])
+    with open(loader.dump_graph, "wb") as dump_graph:
+        pickle.dump(changed, dump_graph)
+    assert loader.source_file() == loader.dump_graph
+    assert loader.load_snapshot().nb_nodes() == graph.compact().nb_nodes() - 1
@@ -0,0 +1,238 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "Cedric Bonhomme"
+__version__ = "$Revision: 0.1 $"
+__date__ = "$Date: 2026/10/18 $"
+__revision__ = "$Date: 2026/10/18 $"
+__copyright__ = "Copyright (c) 2013-2026 Cedric Bonhomme"
+__license__ = ""
+
+import json
+
+import pytest
+
+from pynavigo import app
+from pynavigo import geocoding
+from pynavigo import views
+from pynavigo.engine import DijkstraEngine
+
+
+@pytest.fixture(scope="module")
+def client(compact_graph):
+    """
+    Test client of the web service on the test graph, with a gazetteer
+    which knows one address.
+    """
+    views.GL.prepare_queries(compact_graph)
+    gazetteer = geocoding.Gazetteer()
+    latitude, longitude = compact_graph.coordinates(compact_graph.index[36])
+    gazetteer.addresses[geocoding.normalize("Place d'Armes")] = (latitude, longitude)
+    views.GEOCODER = geocoding.Geocoder(
+        [gazetteer], cache=geocoding.GeocodingCache(":memory:")
+    )
+    return app.test_client()
+
+
+def point(compact_graph, u, v, share):
+    """
+    "latitude, longitude" of a point between the OSM nodes u and v.
+    """
+    lat_u, lon_u = compact_graph.coordinates(compact_graph.index[u])
+    lat_v, lon_v = compact_graph.coordinates(compact_graph.index[v])
+    return "%.7f, %.7f" % (
+        lat_u + share * (lat_v - lat_u),
+        lon_u + share * (lon_v - lon_u),
+    )
+
+
+def test_route_between_snapped_points(client, compact_graph, expected):
+    departure = point(compact_graph, 2, 3, 0.4)
+    destination = point(compact_graph, 33, 34, 0.6)
+    result = client.get(
+        "/api/route", query_string={"departure": departure, "destination": destination}
+    ).get_json()
+    assert result["found"]
+    # the parts of the segments are included
+    index = views.GL.segment_index
+    cost = DijkstraEngine(compact_graph).route(
+        index.snap(*map(float, departure.split(","))),
+        index.snap(*map(float, destination.split(","))),
+    )[1]
+    assert result["distance"] == pytest.approx(cost)
+    # the parts of the segments and the route between their ends
+    # (dijkstra.Dijkstra)
+    through = (
+        0.6 * compact_graph.len_way([2, 3])
+        + expected[3, 33]
+        + 0.6 * compact_graph.len_way([33, 34])
+    )
+    assert result["distance"] == pytest.approx(through)
+    assert result["path"][0] == pytest.approx(
+        [float(value) for value in departure.split(",")], abs=1e-4
+    )
+
+
+def test_route_on_one_segment(client, compact_graph):
+    result = client.get(
+        "/api/route",
+        query_string={
+            "departure": point(compact_graph, 2, 3, 0.2),
+            "destination": point(compact_graph, 2, 3, 0.7),
+        },
+    ).get_json()
+    assert result["found"]
+    length = compact_graph.len_way([2, 3])
+    assert result["distance"] == pytest.approx(0.5 * length, rel=0.01)
+
+
+def test_route_address(client):
+    result = client.get(
+        "/api/route", query_string={"departure": "1", "destination": "Place d'Armes"}
+    )
+    assert result.status_code == 400
+    result = client.get(
+        "/api/route",
+        query_string={
+            "departure": "49.6, 6.1",
+            "destination": "place d armes",
+            "alternatives": "2",
+        },
+    ).get_json()
+    assert result["found"] and result["destination"] == 36
+    assert "alternatives" in result
+
+
+def test_route_alternatives_incorrect(client, compact_graph, restricted_graph):
+    query = {
+        "departure": point(compact_graph, 2, 3, 0.4),
+        "destination": point(compact_graph, 33, 34, 0.6),
+        "alternatives": "2",
+    }
+    # not with a time
+    for name in ("departure_time", "arrival_time"):
+        response = client.get(
+            "/api/route", query_string=dict(query, **{name: "2026-10-19T08:00"})
+        )
+        assert response.status_code == 400
+    # nor with turn restrictions
+    views.GL.prepare_queries(restricted_graph)
+    try:
+        response = client.get("/api/route", query_string=query)
+        assert response.status_code == 400
+    finally:
+        views.GL.prepare_queries(compact_graph)
+    assert client.get("/api/route", query_string=query).get_json()["found"]
+
+
+def test_route_batch(client, compact_graph):
+    pairs = [
+        [point(compact_graph, 2, 3, 0.4), point(compact_graph, 33, 34, 0.6)],
+        [point(compact_graph, 2, 3, 0.4), "Place d'Armes"],
+        ["nowhere", "Place d'Armes"],
+    ]
+    response = client.post("/api/route/batch", json={"pairs": pairs})
+    results = sorted(
+        (json.loads(line) for line in response.data.decode().splitlines()),
+        key=lambda result: result["index"],
+    )
+    assert [result.get("found") for result in results] == [True, True, None]
+    single = client.get(
+        "/api/route",
+        query_string={"departure": pairs[0][0], "destination": pairs[0][1]},
+    ).get_json()
+    assert results[0]["distance"] == pytest.approx(single["distance"])
+
+
+def test_route_batch_addresses(client, compact_graph, monkeypatch):
+    pairs = [
+        [point(compact_graph, 2, 3, 0.4), "Place d'Armes"],
+        ["place d armes", point(compact_graph, 33, 34, 0.6)],
+        [point(compact_graph, 2, 3, 0.4), point(compact_graph, 33, 34, 0.6)],
+    ]
+    monkeypatch.setattr(views, "MAX_BATCH_ADDRESSES", 1)
+    response = client.post("/api/route/batch", json={"pairs": pairs})
+    assert response.status_code == 400
+    # no time left to geocode: only the pair of coordinates is routed
+    monkeypatch.setattr(views, "MAX_BATCH_ADDRESSES", 2)
+    monkeypatch.setattr(views, "BATCH_GEOCODING_TIME", 0)
+    response = client.post("/api/route/batch", json={"pairs": pairs})
+    results = sorted(
+        (json.loads(line) for line in response.data.decode().splitlines()),
+        key=lambda result: result["index"],
+    )
+    assert [result.get("error") for result in results] == [
+        "Geocoding timed out.",
+        "Geocoding timed out.",
+        None,
+    ]
+    assert results[2]["found"]
+
+
+def test_isochrone_budget(client, compact_graph):
+    origin = point(compact_graph, 2, 3, 0.4)
+    result = client.get(
+        "/api/isochrone", query_string={"origin": origin, "minutes": "2"}
+    ).get_json()
+    assert result["nodes"] and max(result["costs"]) <= 120
+    result = client.get(
+        "/api/isochrone", query_string={"origin": origin, "meters": "500"}
+    ).get_json()
+    assert result["nodes"] and max(result["costs"]) <= 500
+    for budget in ("nan", "inf", "-inf", "-1", str(views.MAX_MINUTES + 1), "x"):
+        response = client.get(
+            "/api/isochrone", query_string={"origin": origin, "minutes": budget}
+        )
+        assert response.status_code == 400
+    response = client.get(
+        "/api/isochrone",
+        query_string={"origin": origin, "meters": str(views.MAX_METERS * 2)},
+    )
+    assert response.status_code == 400
+
+
+def test_route_batch_coordinates(client, compact_graph):
+    def coordinates(u, v, share):
+        return [float(value) for value in point(compact_graph, u, v, share).split(",")]
+
+    pairs = [
+        [coordinates(2, 3, 0.4), coordinates(33, 34, 0.6)],
+        [coordinates(2, 3, 0.4), "Place d'Armes"],
+        ["place d armes", [49.6, "x"]],
+    ]
+    response = client.post("/api/route/batch", json={"pairs": pairs})
+    assert response.status_code == 200
+    results = sorted(
+        (json.loads(line) for line in response.data.decode().splitlines()),
+        key=lambda result: result["index"],
+    )
+    assert [result.get("found") for result in results] == [True, True, None]
+    assert results[1]["destination"] == 36
+
+
+@pytest.mark.parametrize("body", [[], [["1, 2", "3, 4"]], "pairs", 3, {}])
+def test_route_batch_incorrect_body(client, body):
+    response = client.post("/api/route/batch", json=body)
+    assert response.status_code == 400
+
+
+def test_metric_blends(client, compact_graph):
+    assert views.metric("0.34") == 0.3
+    assert views.metric("0.04") == "distance"
+    assert views.metric("0.97") == "time"
+    for value in ("nan", "inf", "-0.2", "1.5", "x"):
+        assert views.metric(value) is None
+    departure = point(compact_graph, 2, 3, 0.4)
+    destination = point(compact_graph, 33, 34, 0.6)
+    for i in range(1, 100):
+        result = client.get(
+            "/api/route",
+            query_string={
+                "departure": departure,
+                "destination": destination,
+                "metric": "%.2f" % (i / 100),
+            },
+        ).get_json()
+        assert result["found"]
+    # the costs of at most 9 blends are kept
+    assert len(compact_graph.weight_arrays) <= 9